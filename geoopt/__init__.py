@@ -3,6 +3,7 @@ from . import optim
 from . import tensor
 from . import samplers
 from . import linalg
+from . import index
 
 from .tensor import ManifoldParameter, ManifoldTensor
 from .manifolds import (
@@ -16,7 +17,11 @@ from .manifolds import (
     SphereExact,
     PoincareBall,
     PoincareBallExact,
+    Lorentz,
+    Klein,
     SymmetricPositiveDefinite,
+    LogEuclideanSymmetricPositiveDefinite,
+    BuresWassersteinSymmetricPositiveDefinite,
 )
 
 __version__ = "0.0.1"
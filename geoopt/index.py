@@ -0,0 +1,276 @@
+import heapq
+
+import torch
+
+from .tensor import ManifoldTensor
+from .utils import size2shape
+
+__all__ = ["VPTree"]
+
+
+class VPTree(object):
+    r"""
+    Vantage-point tree for nearest neighbour search on a manifold
+
+    Parameters
+    ----------
+    points : tensor
+        points of shape ``(N, *point_shape)``, a :class:`geoopt.ManifoldTensor`
+        brings its manifold
+    manifold : :class:`geoopt.Manifold`
+        manifold with a metric :meth:`geoopt.Manifold.dist`
+        (default: manifold of ``points``)
+    leaf_size : int
+        maximum number of points in a leaf (default: 16)
+    seed : int
+        seed for the choice of vantage points (default: 0)
+
+    Notes
+    -----
+    Every node splits its points by the median distance to a vantage point.
+    Queries prune subtrees with the triangle inequality, so the distance
+    should be a metric, e.g. of :class:`geoopt.PoincareBall` or :class:`geoopt.Sphere`.
+    The tree is stored in flat arrays, use :meth:`save` and :meth:`load`
+    to serialize it.
+    """
+
+    def __init__(self, points, manifold=None, leaf_size=16, seed=0):
+        if manifold is None:
+            if not isinstance(points, ManifoldTensor):
+                raise ValueError("manifold should be provided for a plain tensor")
+            manifold = points.manifold
+        if leaf_size < 1:
+            raise ValueError("leaf_size should be positive, got {}".format(leaf_size))
+        points = points.data
+        manifold._assert_check_shape(size2shape(*points.shape[1:]), "x")
+        self.points = points
+        self.manifold = manifold
+        self.leaf_size = leaf_size
+        self._build(torch.Generator().manual_seed(seed))
+
+    def _build(self, generator):
+        # per node: vantage point (-1 for a leaf), median radius, children,
+        # and a range of ``order`` for a leaf
+        vantage, radius, left, right, start, end = [], [], [], [], [], []
+        order = []
+        root = self._new_node(vantage, radius, left, right, start, end)
+        stack = [(root, torch.arange(len(self.points)))]
+        while stack:
+            node, idx = stack.pop()
+            if len(idx) <= self.leaf_size:
+                start[node], end[node] = len(order), len(order) + len(idx)
+                order.extend(idx.tolist())
+                continue
+            i = int(torch.randint(len(idx), (1,), generator=generator))
+            vp, idx = idx[i], torch.cat([idx[:i], idx[i + 1 :]])
+            with torch.no_grad():
+                dist = self.manifold.dist(self.points[vp], self.points[idx])
+            dist = dist.reshape(len(idx))
+            mu = dist.median()
+            inside = dist <= mu
+            vantage[node], radius[node] = int(vp), float(mu)
+            for child, mask in ((left, inside), (right, ~inside)):
+                child[node] = self._new_node(vantage, radius, left, right, start, end)
+                stack.append((child[node], idx[mask]))
+        self.vantage = torch.tensor(vantage)
+        self.radius = torch.tensor(radius, dtype=torch.float64)
+        self.left = torch.tensor(left)
+        self.right = torch.tensor(right)
+        self.start = torch.tensor(start)
+        self.end = torch.tensor(end)
+        self.order = torch.tensor(order, dtype=torch.long)
+        self._prepare()
+
+    def _prepare(self):
+        # nodes as python lists and points in the order of nodes are made once,
+        # a query then visits a node with a single distance call on a slice,
+        # an inner node owns the slice of its vantage point
+        order = self.order.tolist()
+        vantage = self.vantage.tolist()
+        start, end = self.start.tolist(), self.end.tolist()
+        for node, vp in enumerate(vantage):
+            if vp >= 0:
+                start[node], end[node] = len(order), len(order) + 1
+                order.append(vp)
+        self._nodes = list(
+            zip(vantage, self.radius.tolist(), self.left.tolist(), self.right.tolist())
+        )
+        self._ranges = list(zip(start, end))
+        self._order = order
+        self._ordered = self.points[torch.tensor(order, dtype=torch.long)]
+
+    @staticmethod
+    def _new_node(*arrays):
+        for array, default in zip(arrays, (-1, 0.0, -1, -1, 0, 0)):
+            array.append(default)
+        return len(arrays[0]) - 1
+
+    def __len__(self):
+        return len(self.points)
+
+    def _search(self, q, tau, on_found):
+        # best-first traversal, ``tau`` returns the current pruning radius
+        heap = [(0.0, 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if bound > tau():
+                break
+            start, end = self._ranges[node]
+            if start == end:
+                continue
+            dist = self.manifold.dist(q, self._ordered[start:end])
+            dist = dist.reshape(end - start).tolist()
+            on_found(dist, self._order[start:end])
+            vantage, mu, left, right = self._nodes[node]
+            if vantage >= 0:
+                d = dist[0]
+                heapq.heappush(heap, (max(d - mu, bound), left))
+                heapq.heappush(heap, (max(mu - d, bound), right))
+
+    def _queries(self, query):
+        point_dim = self.points.dim() - 1
+        batch_shape = query.shape[: query.dim() - point_dim]
+        return query.reshape((-1,) + self.points.shape[1:]), batch_shape
+
+    def knn(self, query, k):
+        """
+        Find k nearest neighbours
+
+        Parameters
+        ----------
+        query : tensor
+            query points of shape ``(..., *point_shape)``
+        k : int
+            number of neighbours
+
+        Returns
+        -------
+        tuple
+            distances and indices of shape ``(..., k)``, sorted by distance
+        """
+        if not 0 < k <= len(self):
+            raise ValueError("k should be in [1, {}], got {}".format(len(self), k))
+        queries, batch_shape = self._queries(query)
+        dists, indices = [], []
+        with torch.no_grad():
+            for q in queries:
+                # max heap of the current k nearest points
+                best = []
+
+                def tau():
+                    return -best[0][0] if len(best) == k else float("inf")
+
+                def on_found(dist, idx):
+                    for d, i in zip(dist, idx):
+                        if len(best) < k:
+                            heapq.heappush(best, (-d, i))
+                        elif d < -best[0][0]:
+                            heapq.heapreplace(best, (-d, i))
+
+                self._search(q, tau, on_found)
+                best = sorted((-d, i) for d, i in best)
+                dists.append([d for d, _ in best])
+                indices.append([i for _, i in best])
+        dists = torch.tensor(dists, dtype=self.points.dtype)
+        indices = torch.tensor(indices, dtype=torch.long)
+        shape = batch_shape + (k,)
+        return (
+            dists.reshape(shape).to(self.points.device),
+            indices.reshape(shape).to(self.points.device),
+        )
+
+    def radius_search(self, query, r):
+        """
+        Find all points within a distance
+
+        Parameters
+        ----------
+        query : tensor
+            query points of shape ``(..., *point_shape)``
+        r : float
+            search radius
+
+        Returns
+        -------
+        list
+            pairs of distances and indices sorted by distance, one per query point
+            in the flattened batch
+        """
+        queries, _ = self._queries(query)
+        res = []
+        with torch.no_grad():
+            for q in queries:
+                found = []
+
+                def on_found(dist, idx):
+                    found.extend((d, i) for d, i in zip(dist, idx) if d <= r)
+
+                self._search(q, lambda: r, on_found)
+                found.sort()
+                res.append(
+                    (
+                        torch.tensor(
+                            [d for d, _ in found],
+                            dtype=self.points.dtype,
+                            device=self.points.device,
+                        ),
+                        torch.tensor(
+                            [i for _, i in found],
+                            dtype=torch.long,
+                            device=self.points.device,
+                        ),
+                    )
+                )
+        return res
+
+    def state_dict(self):
+        return dict(
+            points=self.points,
+            manifold=self.manifold,
+            leaf_size=self.leaf_size,
+            vantage=self.vantage,
+            radius=self.radius,
+            left=self.left,
+            right=self.right,
+            start=self.start,
+            end=self.end,
+            order=self.order,
+        )
+
+    def save(self, path):
+        """
+        Save the tree with :func:`torch.save`
+
+        Parameters
+        ----------
+        path : str|file
+            destination
+        """
+        torch.save(self.state_dict(), path)
+
+    @classmethod
+    def load(cls, path, map_location=None):
+        """
+        Load a tree saved with :meth:`save`
+
+        Parameters
+        ----------
+        path : str|file
+            source
+        map_location :
+            see :func:`torch.load`
+
+        Returns
+        -------
+        VPTree
+        """
+        state = torch.load(path, map_location=map_location)
+        tree = cls.__new__(cls)
+        tree.__dict__.update(state)
+        tree._prepare()
+        return tree
+
+    def __repr__(self):
+        return "VPTree(n={}, leaf_size={}, manifold={})".format(
+            len(self), self.leaf_size, self.manifold
+        )
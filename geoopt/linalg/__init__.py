@@ -1 +1,11 @@
-from .batch_linalg import svd, qr, sym, extract_diag, matrix_rank, expm, block_matrix
+from .batch_linalg import (
+    svd,
+    qr,
+    sym,
+    extract_diag,
+    matrix_rank,
+    expm,
+    block_matrix,
+    set_num_workers,
+    get_num_workers,
+)
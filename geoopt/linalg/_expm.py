@@ -77,3 +77,88 @@ def expm_one(A):  # pragma: no cover
     R, _ = torch.solve(P, Q)  # solve P = Q*R
     expmA = matrix_2_power(R, n_squarings)
     return expmA
+
+
+# Higham, N. J. (2005). The scaling and squaring method for the matrix exponential revisited.
+# Coefficients of the [m/m] Pade approximants and the 1-norm bounds theta_m
+# such that the approximant is accurate to double precision.
+_PADE_COEFS = {
+    3: (120.0, 60.0, 12.0, 1.0),
+    5: (30240.0, 15120.0, 3360.0, 420.0, 30.0, 1.0),
+    7: (17297280.0, 8648640.0, 1995840.0, 277200.0, 25200.0, 1512.0, 56.0, 1.0),
+    9: (
+        17643225600.0,
+        8821612800.0,
+        2075673600.0,
+        302702400.0,
+        30270240.0,
+        2162160.0,
+        110880.0,
+        3960.0,
+        90.0,
+        1.0,
+    ),
+}
+_PADE_THETAS = (
+    (3, 1.495585217958292e-2),
+    (5, 2.539398330063230e-1),
+    (7, 9.504178996162932e-1),
+    (9, 2.097847961257068e0),
+)
+_THETA_13 = 5.371920351148152
+
+
+def torch_pade_low(A, b):
+    # Pade approximants of order 3, 5, 7, 9 share the same structure
+    ident = torch.eye(A.shape[-1], dtype=A.dtype, device=A.device)
+    A2 = torch.matmul(A, A)
+    powers = [ident, A2]
+    for _ in range(2, len(b) // 2):
+        powers.append(torch.matmul(powers[-1], A2))
+    U = sum(b[2 * k + 1] * powers[k] for k in range(len(powers)))
+    U = torch.matmul(A, U)
+    V = sum(b[2 * k] * powers[k] for k in range(len(powers)))
+    return U, V
+
+
+def expm_batched(A):
+    """
+    Matrix exponential for a stack of matrices ``(batch, n, n)``
+
+    The order of Pade approximant and the number of squarings are chosen
+    for every matrix separately, matrices that do not need a squaring
+    are not squared.
+    """
+    A_norm1 = A.detach().abs().sum(dim=-2).max(dim=-1)[0]
+    orders = torch.full_like(A_norm1, 13, dtype=torch.long)
+    for m, theta in reversed(_PADE_THETAS):
+        orders[A_norm1 <= theta] = m
+
+    # Scaling step, only matrices using order 13 are scaled
+    n_squarings = torch.clamp(torch.ceil(torch.log2(A_norm1 / _THETA_13)), min=0).long()
+    n_squarings[orders != 13] = 0
+    scaling = 2.0 ** n_squarings.to(A.dtype)
+    Ascaled = A / scaling[:, None, None]
+
+    # Pade approximation, one evaluation per present order
+    U = torch.zeros_like(A)
+    V = torch.zeros_like(A)
+    for m in torch.unique(orders).tolist():
+        idx = (orders == m).nonzero().view(-1)
+        if m == 13:
+            Um, Vm = torch_pade13(Ascaled[idx])
+        else:
+            Um, Vm = torch_pade_low(Ascaled[idx], _PADE_COEFS[m])
+        U = U.index_copy(0, idx, Um)
+        V = V.index_copy(0, idx, Vm)
+    P = U + V
+    Q = -U + V
+
+    R, _ = torch.solve(P, Q)  # solve P = Q*R for all the matrices at once
+
+    # Squaring step, matrices with fewer squarings are masked out
+    for i in range(int(n_squarings.max()) if n_squarings.numel() else 0):
+        idx = (n_squarings > i).nonzero().view(-1)
+        Ri = R[idx]
+        R = R.index_copy(0, idx, torch.matmul(Ri, Ri))
+    return R
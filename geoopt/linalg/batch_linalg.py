@@ -1,58 +1,226 @@
+import concurrent.futures
+import threading
 import torch.jit
 from . import _expm
 
-__all__ = ["svd", "qr", "sym", "extract_diag", "matrix_rank", "expm", "block_matrix"]
+__all__ = [
+    "svd",
+    "qr",
+    "sym",
+    "extract_diag",
+    "matrix_rank",
+    "expm",
+    "block_matrix",
+    "set_num_workers",
+    "get_num_workers",
+]
 
 
-@torch.jit.script
-def svd(x):  # pragma: no cover
-    # inspired by
-    # https://discuss.pytorch.org/t/multidimensional-svd/4366/2
-    # prolonged here:
+def _supports_batching(fn):
+    # older pytorch versions raise for stacked matrices in some decompositions,
+    # for them we fall back to a loop over the slices
+    try:
+        fn(torch.eye(2).expand(1, 2, 2))
+    except RuntimeError:
+        return False
+    else:
+        return True
+
+
+_BATCHED_SVD = _supports_batching(torch.svd)
+_BATCHED_QR = _supports_batching(torch.qr)
+
+# thread pool for the per-matrix fallbacks, see set_num_workers
+_num_workers = 0
+_executor = None
+# guards the pool, slices are submitted under it so that a concurrent
+# set_num_workers never shuts the pool down in between
+_executor_lock = threading.Lock()
+
+
+def svd(x):
+    """
+    Singular value decomposition for stacked matrices
+
+    Parameters
+    ----------
+    x : tensor
+        matrices of shape ``(..., n, m)``
+
+    Returns
+    -------
+    U, S, V : tensors
+        the same output as :func:`torch.svd` has, but batched
+    """
+    if x.dim() == 2 or _BATCHED_SVD:
+        return torch.svd(x)
+    else:
+        return _svd_loop(x)
+
+
+def qr(x):
+    """
+    QR decomposition for stacked matrices
+
+    Parameters
+    ----------
+    x : tensor
+        matrices of shape ``(..., n, m)``
+
+    Returns
+    -------
+    Q, R : tensors
+        the same output as :func:`torch.qr` has, but batched
+    """
+    if x.dim() == 2 or _BATCHED_QR:
+        return torch.qr(x)
+    else:
+        return _qr_loop(x)
+
+
+def matrix_rank(x):
+    """
+    Matrix rank for stacked matrices
+
+    Parameters
+    ----------
+    x : tensor
+        matrices of shape ``(..., n, m)``
+
+    Returns
+    -------
+    tensor
+        ranks of shape ``(...)``
+
+    Notes
+    -----
+    The tolerance is the same as in :func:`torch.matrix_rank`,
+    that is ``S.max() * max(n, m) * eps``
+    """
     if x.dim() == 2:
-        # 17 milliseconds on my mac to check that condition, that is low overhead
-        result = torch.svd(x)
+        return torch.matrix_rank(x)
+    elif _BATCHED_SVD:
+        _, s, _ = torch.svd(x, compute_uv=False)
+        tol = s.max(dim=-1, keepdim=True)[0] * max(x.shape[-2:])
+        tol = tol * torch.finfo(x.dtype).eps
+        return (s > tol).sum(dim=-1)
     else:
-        batches = x.shape[:-2]
-        other = x.shape[-2:]
-        flat = x.view((-1,) + other)
-        slices = flat.unbind(0)
-        U, D, V = [], [], []
-        # I wish I had a parallel_for
-        for i in range(flat.shape[0]):
-            u, d, v = torch.svd(slices[i])
-            U += [u]
-            D += [d]
-            V += [v]
-        U = torch.stack(U).view(batches + U[0].shape)
-        D = torch.stack(D).view(batches + D[0].shape)
-        V = torch.stack(V).view(batches + V[0].shape)
-        result = U, D, V
-    return result
+        return _matrix_rank_loop(x)
 
 
-@torch.jit.script
-def qr(x):  # pragma: no cover
+def expm(x):
+    """
+    Matrix exponential for stacked matrices
+
+    Parameters
+    ----------
+    x : tensor
+        matrices of shape ``(..., n, n)``
+
+    Returns
+    -------
+    tensor
+        matrix exponentials of shape ``(..., n, n)``
+
+    Notes
+    -----
+    Scaling and squaring algorithm [1]_ with the Pade order and the number
+    of squarings chosen for every matrix in the stack separately
+
+    .. [1] Higham, N. J. (2005). The scaling and squaring method for the matrix exponential revisited.
+    """
+    flat = x.reshape((-1,) + x.shape[-2:])
+    return _expm.expm_batched(flat).view(x.shape)
+
+
+def set_num_workers(num_workers):
+    """
+    Set the number of threads used by per-matrix fallbacks
+
+    Some decompositions are not available for stacked matrices
+    in older pytorch versions, they are computed slice by slice.
+    These slices are independent and can be spread over a thread pool,
+    pytorch releases the GIL inside linear algebra routines.
+
+    Parameters
+    ----------
+    num_workers : int
+        number of threads, ``0`` or ``1`` runs the slices serially (default)
+
+    Notes
+    -----
+    Every slice may itself use intra-op parallelism, consider
+    :func:`torch.set_num_threads` to avoid oversubscription
+    """
+    global _num_workers, _executor
+    if num_workers < 0:
+        raise ValueError(
+            "num_workers should be non negative, got {}".format(num_workers)
+        )
+    with _executor_lock:
+        executor, _executor = _executor, None
+        _num_workers = num_workers
+    if executor is not None:
+        # submitted slices are still completed
+        executor.shutdown()
+
+
+def get_num_workers():
+    """
+    Get the number of threads used by per-matrix fallbacks
+
+    Returns
+    -------
+    int
+    """
+    return _num_workers
+
+
+def _map_slices(fn, flat):
+    # results are always ordered as the slices
+    global _executor
+    slices = flat.unbind(0)
+    with _executor_lock:
+        if _num_workers <= 1 or len(slices) <= 1:
+            futures = None
+        else:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=_num_workers
+                )
+            futures = [_executor.submit(fn, s) for s in slices]
+    if futures is None:
+        return [fn(s) for s in slices]
+    return [future.result() for future in futures]
+
+
+def _svd_loop(x):
     # inspired by
     # https://discuss.pytorch.org/t/multidimensional-svd/4366/2
     # prolonged here:
-    if x.dim() == 2:
-        result = torch.qr(x)
-    else:
-        batches = x.shape[:-2]
-        other = x.shape[-2:]
-        flat = x.view((-1,) + other)
-        slices = flat.unbind(0)
-        Q, R = [], []
-        # I wish I had a parallel_for
-        for i in range(flat.shape[0]):
-            q, r = torch.qr(slices[i])
-            Q += [q]
-            R += [r]
-        Q = torch.stack(Q).view(batches + Q[0].shape)
-        R = torch.stack(R).view(batches + R[0].shape)
-        result = Q, R
-    return result
+    batches = x.shape[:-2]
+    flat = x.reshape((-1,) + x.shape[-2:])
+    U, D, V = zip(*_map_slices(torch.svd, flat))
+    U = torch.stack(U).view(batches + U[0].shape)
+    D = torch.stack(D).view(batches + D[0].shape)
+    V = torch.stack(V).view(batches + V[0].shape)
+    return U, D, V
+
+
+def _qr_loop(x):
+    batches = x.shape[:-2]
+    flat = x.reshape((-1,) + x.shape[-2:])
+    Q, R = zip(*_map_slices(torch.qr, flat))
+    Q = torch.stack(Q).view(batches + Q[0].shape)
+    R = torch.stack(R).view(batches + R[0].shape)
+    return Q, R
+
+
+def _matrix_rank_loop(x):
+    batches = x.shape[:-2]
+    flat = x.reshape((-1,) + x.shape[-2:])
+    ranks = _map_slices(torch.matrix_rank, flat)
+    return torch.stack(ranks).view(batches)
 
 
 @torch.jit.script
@@ -71,51 +239,6 @@ def extract_diag(x):  # pragma: no cover
     return x[:, idx, idx].view(batch + (k,))
 
 
-@torch.jit.script
-def matrix_rank(x):  # pragma: no cover
-    # inspired by
-    # https://discuss.pytorch.org/t/multidimensional-svd/4366/2
-    # prolonged here:
-    if x.dim() == 2:
-        result = torch.matrix_rank(x)
-    else:
-        batches = x.shape[:-2]
-        other = x.shape[-2:]
-        flat = x.view((-1,) + other)
-        slices = flat.unbind(0)
-        ranks = []
-        # I wish I had a parallel_for
-        for i in range(flat.shape[0]):
-            r = torch.matrix_rank(slices[i])
-            # interesting,
-            # ranks.append(r)
-            # does not work on pytorch 1.0.0
-            # but the below code does
-            ranks += [r]
-        result = torch.stack(ranks).view(batches)
-    return result
-
-
-@torch.jit.script
-def expm(x):  # pragma: no cover
-    # inspired by
-    # https://discuss.pytorch.org/t/multidimensional-svd/4366/2
-    # prolonged here:
-    if x.dim() == 2:
-        result = _expm.expm_one(x)
-    else:
-        other = x.shape[-2:]
-        flat = x.view((-1,) + other)
-        slices = flat.unbind(0)
-        exp = []
-        # I wish I had a parallel_for
-        for i in range(flat.shape[0]):
-            e = _expm.expm_one(slices[i])
-            exp += [e]
-        result = torch.stack(exp).view(x.shape)
-    return result
-
-
 def block_matrix(blocks):
     # [[A, B], [C, D]] ->
     # [AB]
@@ -4,5 +4,13 @@ from .stiefel import Stiefel, EuclideanStiefel, CanonicalStiefel, EuclideanStief
 from .sphere import Sphere, SphereExact
 from .poincare import PoincareBall, PoincareBallExact
 from . import poincare
-from .spd import SymmetricPositiveDefinite
+from .lorentz import Lorentz
+from . import lorentz
+from .klein import Klein
+from . import klein
+from .spd import (
+    SymmetricPositiveDefinite,
+    LogEuclideanSymmetricPositiveDefinite,
+    BuresWassersteinSymmetricPositiveDefinite,
+)
 from . import spd
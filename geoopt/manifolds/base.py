@@ -1,4 +1,5 @@
 import abc
+import warnings
 import torch.nn
 from ..utils import make_tuple
 
@@ -333,6 +334,98 @@ class Manifold(torch.nn.Module, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def frechet_mean(self, x, weights=None, *, keepdim=False, max_iter=100, tol=1e-6):
+        r"""
+        Weighted Frechet (Karcher) mean of a set of points
+
+        .. math::
+
+            m = \operatorname{argmin}_m \sum_i w_i d(m, x_i)^2
+
+        Parameters
+        ----------
+        x : tensor
+            points on the manifold, the sets are reduced over the dimension
+            preceding the manifold dimensions, i.e. ``x.shape == (..., N, *point)``
+        weights : tensor
+            non negative weights of shape ``(..., N)``, uniform if not given
+        keepdim : bool
+            retain the reduced dimension?
+        max_iter : int
+            maximum number of iterations
+        tol : float
+            stop iterating for a set once the norm of the mean log map is below it
+
+        Returns
+        -------
+        tensor
+            mean point for every set
+
+        Notes
+        -----
+        The mean is updated as :math:`m \leftarrow \operatorname{Exp}_m(\sum_i w_i
+        \operatorname{Log}_m(x_i))` with normalized weights. All sets are iterated as
+        one batch, converged sets are dropped from the batch so they stop doing work.
+        Starting point comes from :meth:`_frechet_mean_init`. Requires :meth:`logmap`.
+        A :class:`RuntimeWarning` is issued for sets not converged in ``max_iter``
+        iterations.
+        """
+        reducedim = x.dim() - self.ndim - 1
+        batch_shape = x.shape[:reducedim]
+        point_shape = x.shape[reducedim + 1 :]
+        n = x.shape[reducedim]
+        x_flat = x.reshape((-1, n) + point_shape)
+        if weights is None:
+            weights = x.new_ones(n)
+        weights = weights.expand(batch_shape + (n,)).reshape(-1, n)
+        weights = weights / weights.sum(-1, keepdim=True)
+        weights_exp = weights.view(weights.shape + (1,) * self.ndim)
+        # updated in-place, only the active sets are written
+        mean = self._frechet_mean_init(x_flat, weights).clone()
+        active = torch.arange(mean.shape[0], device=x.device)
+        for _ in range(max_iter):
+            m = mean.index_select(0, active)
+            points = x_flat.index_select(0, active)
+            u = weights_exp.index_select(0, active) * self.logmap(m[:, None], points)
+            u = u.sum(1)
+            unorm = self.inner(m, u, keepdim=False).reshape(active.shape[0], -1)
+            unorm = unorm.sum(-1).clamp_min(0).sqrt()
+            todo = unorm > tol
+            if not todo.any():
+                break
+            active = active[todo]
+            mean.index_copy_(0, active, self.expmap(m[todo], u[todo]))
+        else:
+            if max_iter > 0:
+                warnings.warn(
+                    "frechet_mean did not converge for {} of {} sets in {} "
+                    "iterations".format(active.shape[0], mean.shape[0], max_iter),
+                    RuntimeWarning,
+                )
+        mean = mean.view(batch_shape + point_shape)
+        if keepdim:
+            mean = mean.unsqueeze(reducedim)
+        return mean
+
+    def _frechet_mean_init(self, x, weights):
+        """
+        Starting point for :meth:`frechet_mean`
+
+        Parameters
+        ----------
+        x : tensor
+            points of shape ``(B, N, *point)``
+        weights : tensor
+            normalized weights of shape ``(B, N)``
+
+        Returns
+        -------
+        tensor
+            initial means of shape ``(B, *point)``, default is the heaviest point
+        """
+        idx = weights.argmax(-1)
+        return x[torch.arange(x.shape[0], device=x.device), idx]
+
     def expmap_transp(self, x, u, v, *more):
         """
         Perform an exponential map from point :math:`x` with
@@ -0,0 +1,151 @@
+import torch.nn
+from . import math
+from ...tensor import ManifoldTensor
+from ...utils import make_tuple, size2shape
+from ..base import Manifold
+
+__all__ = ["Klein"]
+
+
+# noinspection PyMethodOverriding
+class Klein(Manifold):
+    r"""
+    Beltrami-Klein model of hyperbolic space
+
+    Parameters
+    ----------
+    c : float|tensor
+        ball negative curvature
+
+    Notes
+    -----
+    Points lie in the ball of radius :math:`1/\sqrt{c}` and geodesics are straight
+    chords. Weighted midpoints (:meth:`einstein_midpoint`) are a single weighted sum.
+    Use :meth:`from_poincare` and :meth:`to_poincare` to convert points from and to
+    :class:`PoincareBall` of the same curvature. Exponential and logarithmic maps
+    and parallel transport are computed on the hyperboloid. Retraction is the exact
+    exponential map.
+    """
+
+    ndim = 1
+    reversible = True
+    name = "Klein"
+
+    def __init__(self, c=1.0):
+        super().__init__()
+        self.register_buffer("c", torch.as_tensor(c, dtype=torch.get_default_dtype()))
+
+    def _check_point_on_manifold(self, x, *, atol=1e-5, rtol=1e-5):
+        px = math.project(x, c=self.c)
+        ok = torch.allclose(x, px, atol=atol, rtol=rtol)
+        if not ok:
+            reason = "'x' norm lies out of the bounds [-1/sqrt(c)+eps, 1/sqrt(c)-eps]"
+        else:
+            reason = None
+        return ok, reason
+
+    def _check_vector_on_tangent(self, x, u, *, atol=1e-5, rtol=1e-5):
+        return True, None
+
+    def dist(self, x, y, *, keepdim=False, dim=-1):
+        return math.dist(x, y, c=self.c, keepdim=keepdim, dim=dim)
+
+    def egrad2rgrad(self, x, u, *, dim=-1):
+        return math.egrad2rgrad(x, u, c=self.c, dim=dim)
+
+    def projx(self, x, *, dim=-1):
+        return math.project(x, c=self.c, dim=dim)
+
+    def proju(self, x, u):
+        return u
+
+    def inner(self, x, u, v=None, *, keepdim=False, dim=-1):
+        if v is None:
+            v = u
+        return math.inner(x, u, v, c=self.c, keepdim=keepdim, dim=dim)
+
+    def norm(self, x, u, *, keepdim=False, dim=-1):
+        return self.inner(x, u, keepdim=keepdim, dim=dim).clamp_min(0).sqrt()
+
+    def expmap(self, x, u, *, project=True, dim=-1):
+        res = math.expmap(x, u, c=self.c, dim=dim)
+        if project:
+            return math.project(res, c=self.c, dim=dim)
+        else:
+            return res
+
+    retr = expmap
+
+    def logmap(self, x, y, *, dim=-1):
+        return math.logmap(x, y, c=self.c, dim=dim)
+
+    def transp(self, x, y, v, *more, dim=-1):
+        if not more:
+            return math.parallel_transport(x, y, v, c=self.c, dim=dim)
+        else:
+            return tuple(
+                math.parallel_transport(x, y, vec, c=self.c, dim=dim)
+                for vec in (v, *more)
+            )
+
+    def transp_follow_expmap(self, x, u, v, *more, dim=-1, project=True):
+        y = self.expmap(x, u, dim=dim, project=project)
+        return self.transp(x, y, v, *more, dim=dim)
+
+    def expmap_transp(self, x, u, v, *more, dim=-1, project=True):
+        y = self.expmap(x, u, dim=dim, project=project)
+        vs = self.transp(x, y, v, *more, dim=dim)
+        return (y,) + make_tuple(vs)
+
+    transp_follow_retr = transp_follow_expmap
+    retr_transp = expmap_transp
+
+    def lorentz_factor(self, x, *, keepdim=False, dim=-1):
+        return math.lorentz_factor(x, c=self.c, keepdim=keepdim, dim=dim)
+
+    def einstein_midpoint(
+        self, x, weights=None, *, reducedim=-2, dim=-1, keepdim=False
+    ):
+        return math.einstein_midpoint(
+            x, weights, c=self.c, reducedim=reducedim, dim=dim, keepdim=keepdim
+        )
+
+    def from_poincare(self, x, *, dim=-1):
+        return math.from_poincare(x, c=self.c, dim=dim)
+
+    def to_poincare(self, x, *, dim=-1):
+        return math.to_poincare(x, c=self.c, dim=dim)
+
+    def from_lorentz(self, x, *, dim=-1):
+        return math.from_lorentz(x, c=self.c, dim=dim)
+
+    def to_lorentz(self, x, *, dim=-1):
+        return math.to_lorentz(x, c=self.c, dim=dim)
+
+    def random_normal(self, *size, mean=0, std=1):
+        """
+        Method to create a point on the manifold, measure is induced by Normal distribution on the
+        tangent space of zero
+
+        Parameters
+        ----------
+        size : shape
+            the desired shape
+        mean : float|tensor
+            mean value for the Normal distribution
+        std : float|tensor
+            std value for the Normal distribution
+
+        Returns
+        -------
+        ManifoldTensor
+            random point on the Klein manifold
+
+        Notes
+        -----
+        The device and dtype will match the device and dtype of the Manifold
+        """
+        self._assert_check_shape(size2shape(*size), "x")
+        tens = torch.randn(*size, device=self.c.device, dtype=self.c.dtype) * std + mean
+        zero = torch.zeros_like(tens)
+        return ManifoldTensor(self.expmap(zero, tens), manifold=self)
@@ -0,0 +1,457 @@
+"""
+Functions for math on the Beltrami-Klein model of hyperbolic space
+
+Points lie in the ball of radius :math:`1/\\sqrt{c}`, geodesics are straight
+chords. The exponential and logarithmic maps and parallel transport are
+computed on the hyperboloid, see :mod:`geoopt.manifolds.lorentz.math`
+"""
+
+import torch
+
+from ..lorentz import math as lmath
+from ..poincare.math import BALL_EPS
+
+MIN_NORM = 1e-15
+
+
+def lorentz_factor(x, *, c=1.0, keepdim=False, dim=-1):
+    r"""
+    Lorentz factor of a point
+
+    .. math::
+
+        \gamma_x = \frac{1}{\sqrt{1 - c\|x\|_2^2}}
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    c : float|tensor
+        ball negative curvature
+    keepdim : bool
+        retain the last dim? (default: false)
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        Lorentz factor
+    """
+    return _lorentz_factor(x, c, keepdim=keepdim, dim=dim)
+
+
+def _lorentz_factor(x, c, keepdim: bool = False, dim: int = -1):
+    return (1 - c * x.pow(2).sum(dim=dim, keepdim=keepdim)).clamp_min(MIN_NORM).rsqrt()
+
+
+def project(x, *, c=1.0, dim=-1, eps=None):
+    r"""
+    Safe projection on the manifold for numerical stability
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension to compute norm
+    eps : float
+        stability parameter, uses default for dtype if not provided
+
+    Returns
+    -------
+    tensor
+        projected vector on the manifold
+    """
+    return _project(x, c, dim=dim, eps=eps)
+
+
+def _project(x, c, dim: int = -1, eps: float = None):
+    norm = x.norm(dim=dim, keepdim=True, p=2).clamp_min(MIN_NORM)
+    if eps is None:
+        eps = BALL_EPS[x.dtype]
+    maxnorm = (1 - eps) / (c ** 0.5)
+    return torch.where(norm > maxnorm, x / norm * maxnorm, x)
+
+
+def inner(x, u, v, *, c=1.0, keepdim=False, dim=-1):
+    r"""
+    Riemannian inner product of the Klein model
+
+    .. math::
+
+        \langle u, v\rangle_x = \frac{\langle u, v\rangle}{1 - c\|x\|_2^2}
+            + \frac{c\langle x, u\rangle\langle x, v\rangle}{(1 - c\|x\|_2^2)^2}
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    u : tensor
+        tangent vector at :math:`x`
+    v : tensor
+        tangent vector at :math:`x`
+    c : float|tensor
+        ball negative curvature
+    keepdim : bool
+        retain the last dim? (default: false)
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        inner product
+    """
+    return _inner(x, u, v, c, keepdim=keepdim, dim=dim)
+
+
+def _inner(x, u, v, c, keepdim: bool = False, dim: int = -1):
+    s = 1 - c * x.pow(2).sum(dim=dim, keepdim=keepdim)
+    uv = (u * v).sum(dim=dim, keepdim=keepdim)
+    xu = (x * u).sum(dim=dim, keepdim=keepdim)
+    xv = (x * v).sum(dim=dim, keepdim=keepdim)
+    return uv / s + c * xu * xv / s.pow(2)
+
+
+def egrad2rgrad(x, grad, *, c=1.0, dim=-1):
+    r"""
+    Translate Euclidean gradient to Riemannian gradient
+
+    .. math::
+
+        \nabla_x = (1 - c\|x\|_2^2)(g - c\langle x, g\rangle x)
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    grad : tensor
+        Euclidean gradient for :math:`x`
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        Riemannian gradient
+    """
+    return _egrad2rgrad(x, grad, c, dim=dim)
+
+
+def _egrad2rgrad(x, grad, c, dim: int = -1):
+    s = 1 - c * x.pow(2).sum(dim=dim, keepdim=True)
+    return s * (grad - c * (x * grad).sum(dim=dim, keepdim=True) * x)
+
+
+def dist(x, y, *, c=1.0, keepdim=False, dim=-1):
+    r"""
+    Distance on the Klein ball
+
+    .. math::
+
+        d_c(x, y) = \frac{1}{\sqrt{c}}\cosh^{-1}\left(
+            \gamma_x\gamma_y(1 - c\langle x, y\rangle)
+        \right)
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    y : tensor
+        point on the Klein ball
+    c : float|tensor
+        ball negative curvature
+    keepdim : bool
+        retain the last dim? (default: false)
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        geodesic distance between :math:`x` and :math:`y`
+    """
+    return _dist(x, y, c, keepdim=keepdim, dim=dim)
+
+
+def _dist(x, y, c, keepdim: bool = False, dim: int = -1):
+    gamma = _lorentz_factor(x, c, keepdim=keepdim, dim=dim) * _lorentz_factor(
+        y, c, keepdim=keepdim, dim=dim
+    )
+    xy = (x * y).sum(dim=dim, keepdim=keepdim)
+    return lmath.arcosh(gamma * (1 - c * xy)) / c ** 0.5
+
+
+def from_poincare(x, *, c=1.0, dim=-1):
+    r"""
+    Map a point from the Poincare ball to the Klein ball
+
+    .. math::
+
+        k = \frac{2p}{1 + c\|p\|_2^2}
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Poincare ball with the same curvature
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the Klein ball
+    """
+    return _from_poincare(x, c, dim=dim)
+
+
+def _from_poincare(x, c, dim: int = -1):
+    return 2 * x / (1 + c * x.pow(2).sum(dim=dim, keepdim=True))
+
+
+def to_poincare(x, *, c=1.0, dim=-1):
+    r"""
+    Map a point from the Klein ball to the Poincare ball
+
+    .. math::
+
+        p = \frac{k}{1 + \sqrt{1 - c\|k\|_2^2}}
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the Poincare ball with the same curvature
+    """
+    return _to_poincare(x, c, dim=dim)
+
+
+def _to_poincare(x, c, dim: int = -1):
+    s = (1 - c * x.pow(2).sum(dim=dim, keepdim=True)).clamp_min(0)
+    return x / (1 + s.sqrt())
+
+
+def from_lorentz(x, *, c=1.0, dim=-1):
+    r"""
+    Map a point from the hyperboloid to the Klein ball
+
+    .. math::
+
+        k = \frac{x_{1:}}{\sqrt{c}x_0}
+
+    Parameters
+    ----------
+    x : tensor
+        point on the hyperboloid with the same curvature
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the Klein ball, one less component along ``dim``
+    """
+    return _from_lorentz(x, c, dim=dim)
+
+
+def _from_lorentz(x, c, dim: int = -1):
+    return lmath._space(x, dim) / (c ** 0.5 * lmath._time(x, dim))
+
+
+def to_lorentz(x, *, c=1.0, dim=-1):
+    r"""
+    Map a point from the Klein ball to the hyperboloid
+
+    .. math::
+
+        (x_0, x_{1:}) = (\gamma_k / \sqrt{c}, \gamma_k k)
+
+    Parameters
+    ----------
+    x : tensor
+        point on the Klein ball
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the hyperboloid with the same curvature,
+        one more component along ``dim``
+    """
+    return _to_lorentz(x, c, dim=dim)
+
+
+def _to_lorentz(x, c, dim: int = -1):
+    gamma = _lorentz_factor(x, c, keepdim=True, dim=dim)
+    return torch.cat([gamma / c ** 0.5, gamma * x], dim=dim)
+
+
+def _to_lorentz_u(x, u, c, dim: int = -1):
+    # differential of to_lorentz at x
+    gamma = _lorentz_factor(x, c, keepdim=True, dim=dim)
+    dgamma = c * gamma.pow(3) * (x * u).sum(dim=dim, keepdim=True)
+    return torch.cat([dgamma / c ** 0.5, dgamma * x + gamma * u], dim=dim)
+
+
+def _from_lorentz_u(y, k, v, c, dim: int = -1):
+    # differential of from_lorentz at y, k is the same point on the Klein ball
+    time = lmath._time(y, dim)
+    return (lmath._space(v, dim) / c ** 0.5 - k * lmath._time(v, dim)) / time
+
+
+def expmap(x, u, *, c=1.0, dim=-1):
+    r"""
+    Exponential map on the Klein ball, computed on the hyperboloid
+
+    Parameters
+    ----------
+    x : tensor
+        starting point on the Klein ball
+    u : tensor
+        tangent vector at :math:`x`
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        end point :math:`y`
+    """
+    return _expmap(x, u, c, dim=dim)
+
+
+def _expmap(x, u, c, dim: int = -1):
+    y = lmath._expmap(
+        _to_lorentz(x, c, dim=dim), _to_lorentz_u(x, u, c, dim=dim), c, dim=dim
+    )
+    return _from_lorentz(y, c, dim=dim)
+
+
+def logmap(x, y, *, c=1.0, dim=-1):
+    r"""
+    Logarithmic map on the Klein ball, computed on the hyperboloid
+
+    Parameters
+    ----------
+    x : tensor
+        starting point on the Klein ball
+    y : tensor
+        target point on the Klein ball
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        tangent vector that transports :math:`x` to :math:`y`
+    """
+    return _logmap(x, y, c, dim=dim)
+
+
+def _logmap(x, y, c, dim: int = -1):
+    lx = _to_lorentz(x, c, dim=dim)
+    v = lmath._logmap(lx, _to_lorentz(y, c, dim=dim), c, dim=dim)
+    return _from_lorentz_u(lx, x, v, c, dim=dim)
+
+
+def parallel_transport(x, y, v, *, c=1.0, dim=-1):
+    r"""
+    Parallel transport on the Klein ball, computed on the hyperboloid
+
+    Parameters
+    ----------
+    x : tensor
+        starting point
+    y : tensor
+        end point
+    v : tensor
+        tangent vector at :math:`x` to be transported
+    c : float|tensor
+        ball negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        transported vector
+    """
+    return _parallel_transport(x, y, v, c, dim=dim)
+
+
+def _parallel_transport(x, y, v, c, dim: int = -1):
+    lx, ly = _to_lorentz(x, c, dim=dim), _to_lorentz(y, c, dim=dim)
+    lv = lmath._parallel_transport(lx, ly, _to_lorentz_u(x, v, c, dim=dim), c, dim=dim)
+    return _from_lorentz_u(ly, y, lv, c, dim=dim)
+
+
+def einstein_midpoint(x, weights=None, *, c=1.0, reducedim=-2, dim=-1, keepdim=False):
+    r"""
+    Weighted Einstein midpoint on the Klein ball
+
+    .. math::
+
+        m = \frac{\sum_i w_i\gamma_{x_i}x_i}{\sum_i w_i\gamma_{x_i}}
+
+    Parameters
+    ----------
+    x : tensor
+        points on the Klein ball
+    weights : tensor
+        non-negative weights of points, of the shape of ``x`` without ``dim``
+        (default: None -- equal weights)
+    c : float|tensor
+        ball negative curvature
+    reducedim : int
+        dimension that indexes points
+    dim : int
+        dimension of point coordinates
+    keepdim : bool
+        retain ``reducedim``? (default: false)
+
+    Returns
+    -------
+    tensor
+        midpoint, a single weighted sum of points
+    """
+    return _einstein_midpoint(
+        x, weights, c, reducedim=reducedim, dim=dim, keepdim=keepdim
+    )
+
+
+def _einstein_midpoint(
+    x, weights, c, reducedim: int = -2, dim: int = -1, keepdim: bool = False
+):
+    gamma = _lorentz_factor(x, c, keepdim=True, dim=dim)
+    if weights is not None:
+        gamma = gamma * weights.unsqueeze(dim)
+    num = (gamma * x).sum(dim=reducedim, keepdim=True)
+    denom = gamma.sum(dim=reducedim, keepdim=True).clamp_min(MIN_NORM)
+    res = num / denom
+    if not keepdim:
+        res = res.squeeze(reducedim)
+    return res
@@ -0,0 +1,166 @@
+import torch.nn
+from . import math
+from ...tensor import ManifoldTensor
+from ...utils import make_tuple, size2shape
+from ..base import Manifold
+
+__all__ = ["Lorentz"]
+
+
+# noinspection PyMethodOverriding
+class Lorentz(Manifold):
+    r"""
+    Lorentz (hyperboloid) model of hyperbolic space
+
+    .. math::
+
+        \mathbb{L}^n_c = \{x \in \mathbb{R}^{n+1} :
+            \langle x, x\rangle_{\mathcal{L}} = -1/c, x_0 > 0\}
+
+    Parameters
+    ----------
+    c : float|tensor
+        negative curvature
+
+    Notes
+    -----
+    Points have ``n + 1`` components, the first one is time-like. The distance
+    is a Minkowski inner product and :math:`\cosh^{-1}`, there is no boundary
+    to clamp to. Use :meth:`from_poincare` and :meth:`to_poincare` to convert
+    points from and to :class:`PoincareBall` of the same curvature. Retraction
+    is the exact exponential map.
+    """
+
+    ndim = 1
+    reversible = True
+    name = "Lorentz"
+
+    def __init__(self, c=1.0):
+        super().__init__()
+        self.register_buffer("c", torch.as_tensor(c, dtype=torch.get_default_dtype()))
+
+    def _check_shape(self, shape, name):
+        ok, reason = super()._check_shape(shape, name)
+        if ok:
+            ok = shape[-1] > 1
+            if not ok:
+                reason = "`{}` should have at least 2 components, got {}".format(
+                    name, shape[-1]
+                )
+        return ok, reason
+
+    def _check_point_on_manifold(self, x, *, atol=1e-5, rtol=1e-5):
+        xx = math.inner(x, x)
+        ok = torch.allclose(xx, -1 / self.c.expand_as(xx), atol=atol, rtol=rtol)
+        if not ok:
+            reason = "Minkowski norm of 'x' is not equal to -1/c"
+        else:
+            ok = bool((x[..., 0] > 0).all())
+            reason = None if ok else "'x' lies on the lower sheet of hyperboloid"
+        return ok, reason
+
+    def _check_vector_on_tangent(self, x, u, *, atol=1e-5, rtol=1e-5):
+        xu = math.inner(x, u)
+        ok = torch.allclose(xu, torch.zeros_like(xu), atol=atol, rtol=rtol)
+        if not ok:
+            return False, "Minkowski inner product of 'x' and 'u' is not zero"
+        return True, None
+
+    def dist(self, x, y, *, keepdim=False, dim=-1):
+        return math.dist(x, y, c=self.c, keepdim=keepdim, dim=dim)
+
+    def pairwise_dist(self, x, y):
+        return math.pairwise_dist(x, y, c=self.c)
+
+    def egrad2rgrad(self, x, u, *, dim=-1):
+        return math.egrad2rgrad(x, u, c=self.c, dim=dim)
+
+    def projx(self, x, *, dim=-1):
+        return math.project(x, c=self.c, dim=dim)
+
+    def proju(self, x, u, *, dim=-1):
+        return math.project_u(x, u, c=self.c, dim=dim)
+
+    def inner(self, x, u, v=None, *, keepdim=False, dim=-1):
+        if v is None:
+            v = u
+        return math.inner(u, v, keepdim=keepdim, dim=dim)
+
+    def norm(self, x, u, *, keepdim=False, dim=-1):
+        return math.norm(u, keepdim=keepdim, dim=dim)
+
+    def expmap(self, x, u, *, project=True, dim=-1):
+        res = math.expmap(x, u, c=self.c, dim=dim)
+        if project:
+            return math.project(res, c=self.c, dim=dim)
+        else:
+            return res
+
+    retr = expmap
+
+    def logmap(self, x, y, *, dim=-1):
+        return math.logmap(x, y, c=self.c, dim=dim)
+
+    def expmap0(self, u, *, project=True, dim=-1):
+        res = math.expmap0(u, c=self.c, dim=dim)
+        if project:
+            return math.project(res, c=self.c, dim=dim)
+        else:
+            return res
+
+    def logmap0(self, y, *, dim=-1):
+        return math.logmap0(y, c=self.c, dim=dim)
+
+    def transp(self, x, y, v, *more, dim=-1):
+        if not more:
+            return math.parallel_transport(x, y, v, c=self.c, dim=dim)
+        else:
+            return tuple(
+                math.parallel_transport(x, y, vec, c=self.c, dim=dim)
+                for vec in (v, *more)
+            )
+
+    def transp_follow_expmap(self, x, u, v, *more, dim=-1, project=True):
+        y = self.expmap(x, u, dim=dim, project=project)
+        return self.transp(x, y, v, *more, dim=dim)
+
+    def expmap_transp(self, x, u, v, *more, dim=-1, project=True):
+        y = self.expmap(x, u, dim=dim, project=project)
+        vs = self.transp(x, y, v, *more, dim=dim)
+        return (y,) + make_tuple(vs)
+
+    transp_follow_retr = transp_follow_expmap
+    retr_transp = expmap_transp
+
+    def from_poincare(self, x, *, dim=-1):
+        return math.from_poincare(x, c=self.c, dim=dim)
+
+    def to_poincare(self, x, *, dim=-1):
+        return math.to_poincare(x, c=self.c, dim=dim)
+
+    def random_normal(self, *size, mean=0, std=1):
+        """
+        Method to create a point on the manifold, measure is induced by Normal distribution on the
+        tangent space of the origin
+
+        Parameters
+        ----------
+        size : shape
+            the desired shape
+        mean : float|tensor
+            mean value for the Normal distribution
+        std : float|tensor
+            std value for the Normal distribution
+
+        Returns
+        -------
+        ManifoldTensor
+            random point on the Lorentz manifold
+
+        Notes
+        -----
+        The device and dtype will match the device and dtype of the Manifold
+        """
+        self._assert_check_shape(size2shape(*size), "x")
+        tens = torch.randn(*size, device=self.c.device, dtype=self.c.dtype) * std + mean
+        return ManifoldTensor(self.expmap0(tens), manifold=self)
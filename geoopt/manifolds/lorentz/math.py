@@ -0,0 +1,468 @@
+"""
+Functions for math on the Lorentz (hyperboloid) model of hyperbolic space
+
+.. math::
+
+    \\mathbb{L}^n_c = \\{x \\in \\mathbb{R}^{n+1} :
+        \\langle x, x\\rangle_{\\mathcal{L}} = -1/c, x_0 > 0\\}
+
+where :math:`\\langle x, y\\rangle_{\\mathcal{L}} = -x_0y_0 + \\sum_{i=1}^n x_iy_i`
+is the Minkowski inner product, the first component is the time-like one
+"""
+
+import torch
+
+MIN_NORM = 1e-15
+EPS = {torch.float32: 1e-7, torch.float64: 1e-15}
+
+
+def _time(x, dim: int = -1):
+    return x.narrow(dim, 0, 1)
+
+
+def _space(x, dim: int = -1):
+    return x.narrow(dim, 1, x.shape[dim] - 1)
+
+
+def arcosh(x):
+    z = x.clamp_min(1 + EPS[x.dtype])
+    return torch.log(z + (z.pow(2) - 1).sqrt())
+
+
+def inner(u, v, *, keepdim=False, dim=-1):
+    r"""
+    Minkowski inner product
+
+    .. math::
+
+        \langle u, v\rangle_{\mathcal{L}} = -u_0v_0 + \sum_{i=1}^n u_iv_i
+
+    Parameters
+    ----------
+    u : tensor
+        first vector
+    v : tensor
+        second vector
+    keepdim : bool
+        retain the last dim? (default: false)
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        inner product
+    """
+    return _inner(u, v, keepdim=keepdim, dim=dim)
+
+
+def _inner(u, v, keepdim: bool = False, dim: int = -1):
+    res = (u * v).sum(dim=dim, keepdim=True) - 2 * _time(u, dim) * _time(v, dim)
+    if not keepdim:
+        res = res.squeeze(dim)
+    return res
+
+
+def norm(u, *, keepdim=False, dim=-1):
+    r"""
+    Minkowski norm of a tangent vector
+
+    Parameters
+    ----------
+    u : tensor
+        tangent vector
+    keepdim : bool
+        retain the last dim? (default: false)
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        norm of the vector
+    """
+    return _norm(u, keepdim=keepdim, dim=dim)
+
+
+def _norm(u, keepdim: bool = False, dim: int = -1):
+    return _inner(u, u, keepdim=keepdim, dim=dim).clamp_min(MIN_NORM).sqrt()
+
+
+def project(x, *, c=1.0, dim=-1):
+    r"""
+    Project a point on the hyperboloid recomputing the time-like component
+
+    .. math::
+
+        x_0 = \sqrt{1/c + \|x_{1:}\|_2^2}
+
+    Parameters
+    ----------
+    x : tensor
+        point to be projected
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the hyperboloid
+    """
+    return _project(x, c, dim=dim)
+
+
+def _project(x, c, dim: int = -1):
+    space = _space(x, dim)
+    time = (1 / c + space.pow(2).sum(dim=dim, keepdim=True)).sqrt()
+    return torch.cat([time, space], dim=dim)
+
+
+def project_u(x, u, *, c=1.0, dim=-1):
+    r"""
+    Project a vector on the tangent space of :math:`x`
+
+    .. math::
+
+        \Pi_x(u) = u + c\langle x, u\rangle_{\mathcal{L}} x
+
+    Parameters
+    ----------
+    x : tensor
+        point on the hyperboloid
+    u : tensor
+        vector to be projected
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        tangent vector
+    """
+    return _project_u(x, u, c, dim=dim)
+
+
+def _project_u(x, u, c, dim: int = -1):
+    return u + c * _inner(x, u, keepdim=True, dim=dim) * x
+
+
+def egrad2rgrad(x, grad, *, c=1.0, dim=-1):
+    r"""
+    Translate Euclidean gradient to Riemannian gradient
+
+    The sign of the time-like component is flipped (the inverse of the metric)
+    and the result is projected on the tangent space of :math:`x`
+
+    Parameters
+    ----------
+    x : tensor
+        point on the hyperboloid
+    grad : tensor
+        Euclidean gradient for :math:`x`
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        Riemannian gradient :math:`u\in T_x\mathbb{L}^n_c`
+    """
+    return _egrad2rgrad(x, grad, c, dim=dim)
+
+
+def _egrad2rgrad(x, grad, c, dim: int = -1):
+    grad = torch.cat([-_time(grad, dim), _space(grad, dim)], dim=dim)
+    return _project_u(x, grad, c, dim=dim)
+
+
+def dist(x, y, *, c=1.0, keepdim=False, dim=-1):
+    r"""
+    Distance on the hyperboloid
+
+    .. math::
+
+        d_c(x, y) = \frac{1}{\sqrt{c}}\cosh^{-1}(-c\langle x, y\rangle_{\mathcal{L}})
+
+    Parameters
+    ----------
+    x : tensor
+        point on the hyperboloid
+    y : tensor
+        point on the hyperboloid
+    c : float|tensor
+        negative curvature
+    keepdim : bool
+        retain the last dim? (default: false)
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        geodesic distance between :math:`x` and :math:`y`
+    """
+    return _dist(x, y, c, keepdim=keepdim, dim=dim)
+
+
+def _dist(x, y, c, keepdim: bool = False, dim: int = -1):
+    return arcosh(-c * _inner(x, y, keepdim=keepdim, dim=dim)) / c ** 0.5
+
+
+def pairwise_dist(x, y, *, c=1.0):
+    r"""
+    Distances between all pairs of points on the hyperboloid
+
+    Parameters
+    ----------
+    x : tensor
+        points on the hyperboloid of shape ``(..., N, D)``
+    y : tensor
+        points on the hyperboloid of shape ``(..., M, D)``
+    c : float|tensor
+        negative curvature
+
+    Returns
+    -------
+    tensor
+        distance matrix of shape ``(..., N, M)``
+
+    Notes
+    -----
+    All inner products come from a single matrix product, the point dimension
+    is the last one
+    """
+    return _pairwise_dist(x, y, c)
+
+
+def _pairwise_dist(x, y, c):
+    # flip the time-like component of one side to get Minkowski inner products
+    y = torch.cat([-_time(y), _space(y)], dim=-1)
+    return arcosh(-c * (x @ y.transpose(-1, -2))) / c ** 0.5
+
+
+def expmap(x, u, *, c=1.0, dim=-1):
+    r"""
+    Exponential map on the hyperboloid
+
+    .. math::
+
+        \exp_x^c(u) = \cosh(\sqrt{c}\|u\|_{\mathcal{L}})x
+            + \sinh(\sqrt{c}\|u\|_{\mathcal{L}})\frac{u}{\sqrt{c}\|u\|_{\mathcal{L}}}
+
+    Parameters
+    ----------
+    x : tensor
+        starting point on the hyperboloid
+    u : tensor
+        tangent vector at :math:`x`
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        end point :math:`y`
+    """
+    return _expmap(x, u, c, dim=dim)
+
+
+def _expmap(x, u, c, dim: int = -1):
+    nomin = c ** 0.5 * _norm(u, keepdim=True, dim=dim)
+    return torch.cosh(nomin) * x + torch.sinh(nomin) * u / nomin
+
+
+def expmap0(u, *, c=1.0, dim=-1):
+    r"""
+    Exponential map from the origin :math:`(1/\sqrt{c}, 0, \dots, 0)`
+
+    Parameters
+    ----------
+    u : tensor
+        tangent vector at the origin, its time-like component is ignored
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        end point :math:`y`
+    """
+    return _expmap0(u, c, dim=dim)
+
+
+def _expmap0(u, c, dim: int = -1):
+    space = _space(u, dim)
+    nomin = c ** 0.5 * space.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
+    time = torch.cosh(nomin) / c ** 0.5
+    return torch.cat([time, torch.sinh(nomin) * space / nomin], dim=dim)
+
+
+def logmap(x, y, *, c=1.0, dim=-1):
+    r"""
+    Logarithmic map on the hyperboloid
+
+    .. math::
+
+        \log_x^c(y) = d_c(x, y)\frac{v}{\|v\|_{\mathcal{L}}},\quad
+        v = y + c\langle x, y\rangle_{\mathcal{L}} x
+
+    Parameters
+    ----------
+    x : tensor
+        starting point on the hyperboloid
+    y : tensor
+        target point on the hyperboloid
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        tangent vector that transports :math:`x` to :math:`y`
+    """
+    return _logmap(x, y, c, dim=dim)
+
+
+def _logmap(x, y, c, dim: int = -1):
+    xy = _inner(x, y, keepdim=True, dim=dim)
+    v = y + c * xy * x
+    return arcosh(-c * xy) / c ** 0.5 * v / _norm(v, keepdim=True, dim=dim)
+
+
+def logmap0(y, *, c=1.0, dim=-1):
+    r"""
+    Logarithmic map from the origin :math:`(1/\sqrt{c}, 0, \dots, 0)`
+
+    Parameters
+    ----------
+    y : tensor
+        target point on the hyperboloid
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        tangent vector at the origin with zero time-like component
+    """
+    return _logmap0(y, c, dim=dim)
+
+
+def _logmap0(y, c, dim: int = -1):
+    space = _space(y, dim)
+    space_norm = space.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
+    d = arcosh(c ** 0.5 * _time(y, dim)) / c ** 0.5
+    return torch.cat([torch.zeros_like(_time(y, dim)), d * space / space_norm], dim=dim)
+
+
+def parallel_transport(x, y, v, *, c=1.0, dim=-1):
+    r"""
+    Parallel transport along the geodesic from :math:`x` to :math:`y`
+
+    .. math::
+
+        P_{x\to y}(v) = v + \frac{\langle y, v\rangle_{\mathcal{L}}}
+            {1/c - \langle x, y\rangle_{\mathcal{L}}}(x + y)
+
+    Parameters
+    ----------
+    x : tensor
+        starting point
+    y : tensor
+        end point
+    v : tensor
+        tangent vector at :math:`x` to be transported
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        transported vector
+    """
+    return _parallel_transport(x, y, v, c, dim=dim)
+
+
+def _parallel_transport(x, y, v, c, dim: int = -1):
+    yv = _inner(y, v, keepdim=True, dim=dim)
+    xy = _inner(x, y, keepdim=True, dim=dim)
+    return v + yv / (1 / c - xy).clamp_min(MIN_NORM) * (x + y)
+
+
+def from_poincare(x, *, c=1.0, dim=-1):
+    r"""
+    Map a point from the Poincare ball to the hyperboloid
+
+    .. math::
+
+        (x_0, x_{1:}) = \left(
+            \frac{1 + c\|p\|_2^2}{\sqrt{c}(1 - c\|p\|_2^2)}, \frac{2p}{1 - c\|p\|_2^2}
+        \right)
+
+    Parameters
+    ----------
+    x : tensor
+        point :math:`p` on the Poincare ball with the same curvature
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the hyperboloid, one more component along ``dim``
+    """
+    return _from_poincare(x, c, dim=dim)
+
+
+def _from_poincare(x, c, dim: int = -1):
+    cx2 = c * x.pow(2).sum(dim=dim, keepdim=True)
+    denom = (1 - cx2).clamp_min(MIN_NORM)
+    return torch.cat([(1 + cx2) / (c ** 0.5 * denom), 2 * x / denom], dim=dim)
+
+
+def to_poincare(x, *, c=1.0, dim=-1):
+    r"""
+    Map a point from the hyperboloid to the Poincare ball
+
+    .. math::
+
+        p = \frac{x_{1:}}{1 + \sqrt{c}x_0}
+
+    Parameters
+    ----------
+    x : tensor
+        point on the hyperboloid
+    c : float|tensor
+        negative curvature
+    dim : int
+        reduction dimension
+
+    Returns
+    -------
+    tensor
+        point on the Poincare ball with the same curvature,
+        one less component along ``dim``
+    """
+    return _to_poincare(x, c, dim=dim)
+
+
+def _to_poincare(x, c, dim: int = -1):
+    return _space(x, dim) / (1 + c ** 0.5 * _time(x, dim))
@@ -1,10 +1,54 @@
 import torch.nn
 from . import math
+from . import fused
 from ...tensor import ManifoldTensor
 from ...utils import make_tuple, size2shape
 from ..base import Manifold
 
-__all__ = ["PoincareBall", "PoincareBallExact"]
+__all__ = [
+    "PoincareBall",
+    "PoincareBallExact",
+    "set_default_backend",
+    "get_default_backend",
+]
+
+_BACKENDS = {"eager": math, "script": fused}
+_default_backend = "eager"
+
+
+def set_default_backend(backend):
+    """
+    Set the math backend for :class:`PoincareBall` instances that do not specify one
+
+    Parameters
+    ----------
+    backend : str
+        ``"eager"`` for :mod:`geoopt.manifolds.poincare.math` (default) or
+        ``"script"`` for TorchScript fused kernels
+        from :mod:`geoopt.manifolds.poincare.fused`
+    """
+    global _default_backend
+    _check_backend(backend)
+    _default_backend = backend
+
+
+def get_default_backend():
+    """
+    Get the default math backend for :class:`PoincareBall`
+
+    Returns
+    -------
+    str
+    """
+    return _default_backend
+
+
+def _check_backend(backend):
+    if backend not in _BACKENDS:
+        raise ValueError(
+            "Unknown backend {}, expected one of {}".format(backend, sorted(_BACKENDS))
+        )
+
 
 _poincare_ball_doc = r"""
     Poincare ball model, see more in :doc:`/extended/poincare`
@@ -13,6 +57,14 @@ _poincare_ball_doc = r"""
     ----------
     c : float|tensor
         ball negative curvature
+    backend : str
+        math backend, ``"eager"`` or ``"script"`` (default: None -- use the value
+        set by :func:`set_default_backend`)
+    precision : str
+        precision policy of :math:`\tanh^{-1}` and :math:`\sinh^{-1}`, ``"double"``
+        or ``"native"`` (default: None -- use the value set by
+        :func:`geoopt.manifolds.poincare.math.set_default_precision`), scripted
+        kernels of the ``"script"`` backend always compute in the input dtype
 
     Notes
     -----
@@ -35,12 +87,25 @@ class PoincareBall(Manifold):
     reversible = False
     name = "Poincare ball"
 
-    def __init__(self, c=1.0):
+    def __init__(self, c=1.0, backend=None, precision=None):
         super().__init__()
         self.register_buffer("c", torch.as_tensor(c, dtype=torch.get_default_dtype()))
+        if backend is not None:
+            _check_backend(backend)
+        if precision is not None:
+            math._check_precision(precision)
+        self.backend = backend
+        self.precision = precision
+
+    @property
+    def _math(self):
+        if self.backend is None:
+            return _BACKENDS[_default_backend]
+        else:
+            return _BACKENDS[self.backend]
 
     def _check_point_on_manifold(self, x, *, atol=1e-5, rtol=1e-5):
-        px = math.project(x, c=self.c)
+        px = self._math.project(x, c=self.c)
         ok = torch.allclose(x, px, atol=atol, rtol=rtol)
         if not ok:
             reason = "'x' norm lies out of the bounds [-1/sqrt(c)+eps, 1/sqrt(c)-eps]"
@@ -52,18 +117,48 @@ class PoincareBall(Manifold):
         return True, None
 
     def dist(self, x, y, *, keepdim=False, dim=-1):
-        return math.dist(x, y, c=self.c, keepdim=keepdim, dim=dim)
+        return self._math.dist(
+            x, y, c=self.c, keepdim=keepdim, dim=dim, precision=self.precision
+        )
+
+    def pairwise_dist(self, x, y, *, chunk_size=None):
+        return self._math.pairwise_dist(
+            x, y, c=self.c, chunk_size=chunk_size, precision=self.precision
+        )
+
+    def knn(self, query, points, k, *, chunk_size=None):
+        return self._math.knn(
+            query, points, k, c=self.c, chunk_size=chunk_size, precision=self.precision
+        )
+
+    def weighted_midpoint(
+        self, x, weights=None, *, reducedim=-2, dim=-1, keepdim=False
+    ):
+        return self._math.weighted_midpoint(
+            x, weights, c=self.c, reducedim=reducedim, dim=dim, keepdim=keepdim
+        )
+
+    def frechet_mean(self, x, weights=None, *, keepdim=False, max_iter=100, tol=1e-6):
+        return self._math.frechet_mean(
+            x,
+            weights,
+            c=self.c,
+            keepdim=keepdim,
+            max_iter=max_iter,
+            tol=tol,
+            precision=self.precision,
+        )
 
     def egrad2rgrad(self, x, u, *, dim=-1):
-        return math.egrad2rgrad(x, u, c=self.c, dim=dim)
+        return self._math.egrad2rgrad(x, u, c=self.c, dim=dim)
 
     def retr(self, x, u, *, dim=-1):
         # always assume u is scaled properly
         approx = x + u
-        return math.project(approx, c=self.c, dim=dim)
+        return self._math.project(approx, c=self.c, dim=dim)
 
     def projx(self, x, dim=-1):
-        return math.project(x, c=self.c, dim=dim)
+        return self._math.project(x, c=self.c, dim=dim)
 
     def proju(self, x, u):
         return u
@@ -71,27 +166,27 @@ class PoincareBall(Manifold):
     def inner(self, x, u, v=None, *, keepdim=False, dim=-1):
         if v is None:
             v = u
-        return math.inner(x, u, v, c=self.c, keepdim=keepdim, dim=dim)
+        return self._math.inner(x, u, v, c=self.c, keepdim=keepdim, dim=dim)
 
     def norm(self, x, u, *, keepdim=False, dim=-1):
-        return math.norm(x, u, keepdim=keepdim, dim=dim)
+        return self._math.norm(x, u, keepdim=keepdim, dim=dim)
 
     def expmap(self, x, u, *, project=True, dim=-1):
-        res = math.expmap(x, u, c=self.c, dim=dim)
+        res = self._math.expmap(x, u, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def logmap(self, x, y, *, dim=-1):
-        return math.logmap(x, y, c=self.c, dim=dim)
+        return self._math.logmap(x, y, c=self.c, dim=dim, precision=self.precision)
 
     def transp(self, x, y, v, *more, dim=-1):
         if not more:
-            return math.parallel_transport(x, y, v, c=self.c, dim=dim)
+            return self._math.parallel_transport(x, y, v, c=self.c, dim=dim)
         else:
             return tuple(
-                math.parallel_transport(x, y, vec, c=self.c, dim=dim)
+                self._math.parallel_transport(x, y, vec, c=self.c, dim=dim)
                 for vec in (v, *more)
             )
 
@@ -114,105 +209,124 @@ class PoincareBall(Manifold):
         return (y,) + make_tuple(vs)
 
     def mobius_add(self, x, y, *, dim=-1, project=True):
-        res = math.mobius_add(x, y, c=self.c, dim=dim)
+        res = self._math.mobius_add(x, y, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_sub(self, x, y, *, dim=-1, project=True):
-        res = math.mobius_sub(x, y, c=self.c, dim=dim)
+        res = self._math.mobius_sub(x, y, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_coadd(self, x, y, *, dim=-1, project=True):
-        res = math.mobius_coadd(x, y, c=self.c, dim=dim)
+        res = self._math.mobius_coadd(x, y, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_cosub(self, x, y, *, dim=-1, project=True):
-        res = math.mobius_coadd(x, y, c=self.c, dim=dim)
+        res = self._math.mobius_coadd(x, y, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_scalar_mul(self, r, x, *, dim=-1, project=True):
-        res = math.mobius_scalar_mul(r, x, c=self.c, dim=dim)
+        res = self._math.mobius_scalar_mul(
+            r, x, c=self.c, dim=dim, precision=self.precision
+        )
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_pointwise_mul(self, w, x, *, dim=-1, project=True):
-        res = math.mobius_pointwise_mul(w, x, c=self.c, dim=dim)
+        res = self._math.mobius_pointwise_mul(
+            w, x, c=self.c, dim=dim, precision=self.precision
+        )
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_matvec(self, m, x, *, dim=-1, project=True):
-        res = math.mobius_matvec(m, x, c=self.c, dim=dim)
+        res = self._math.mobius_matvec(
+            m, x, c=self.c, dim=dim, precision=self.precision
+        )
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def geodesic(self, t, x, y, *, dim=-1):
-        return math.geodesic(t, x, y, c=self.c, dim=dim)
+        return self._math.geodesic(t, x, y, c=self.c, dim=dim, precision=self.precision)
 
     def geodesic_unit(self, t, x, u, *, dim=-1, project=True):
-        res = math.geodesic_unit(t, x, u, c=self.c, dim=dim)
+        res = self._math.geodesic_unit(t, x, u, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def lambda_x(self, x, *, dim=-1, keepdim=False):
-        return math.lambda_x(x, c=self.c, dim=dim, keepdim=keepdim)
+        return self._math.lambda_x(x, c=self.c, dim=dim, keepdim=keepdim)
 
     def dist0(self, x, *, dim=-1, keepdim=False):
-        return math.dist0(x, c=self.c, dim=dim, keepdim=keepdim)
+        return self._math.dist0(
+            x, c=self.c, dim=dim, keepdim=keepdim, precision=self.precision
+        )
 
     def expmap0(self, u, *, dim=-1, project=True):
-        res = math.expmap0(u, c=self.c, dim=dim)
+        res = self._math.expmap0(u, c=self.c, dim=dim)
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def logmap0(self, x, *, dim=-1):
-        return math.logmap0(x, c=self.c, dim=dim)
+        return self._math.logmap0(x, c=self.c, dim=dim, precision=self.precision)
 
     def transp0(self, y, u, *, dim=-1):
-        return math.parallel_transport0(y, u, c=self.c, dim=dim)
+        return self._math.parallel_transport0(y, u, c=self.c, dim=dim)
 
     def transp0back(self, y, u, *, dim=-1):
-        return math.parallel_transport0back(y, u, c=self.c, dim=dim)
+        return self._math.parallel_transport0back(y, u, c=self.c, dim=dim)
 
     def gyration(self, x, y, z, *, dim=-1):
-        return math.gyration(x, y, z, c=self.c, dim=dim)
+        return self._math.gyration(x, y, z, c=self.c, dim=dim)
 
     def dist2plane(self, x, p, a, *, dim=-1, keepdim=False, signed=False):
-        return math.dist2plane(
-            x, p, a, dim=dim, c=self.c, keepdim=keepdim, signed=signed
+        return self._math.dist2plane(
+            x,
+            p,
+            a,
+            dim=dim,
+            c=self.c,
+            keepdim=keepdim,
+            signed=signed,
+            precision=self.precision,
         )
 
     def mobius_fn_apply(self, fn, x, *args, dim=-1, project=True, **kwargs):
-        res = math.mobius_fn_apply(fn, x, *args, c=self.c, dim=dim, **kwargs)
+        res = self._math.mobius_fn_apply(
+            fn, x, *args, c=self.c, dim=dim, precision=self.precision, **kwargs
+        )
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
     def mobius_fn_apply_chain(self, x, *fns, project=True, dim=-1):
-        res = math.mobius_fn_apply_chain(x, *fns, c=self.c, dim=dim)
+        res = self._math.mobius_fn_apply_chain(
+            x, *fns, c=self.c, dim=dim, precision=self.precision
+        )
         if project:
-            return math.project(res, c=self.c, dim=dim)
+            return self._math.project(res, c=self.c, dim=dim)
         else:
             return res
 
@@ -0,0 +1,244 @@
+"""
+Scripted backend for math on Poincare ball model.
+
+Functions have the same signatures as in :mod:`geoopt.manifolds.poincare.math`.
+The most used primitives are compiled with TorchScript, so that chains
+of elementwise operations and reductions are fused into a small number
+of kernels. Others are taken from :mod:`geoopt.manifolds.poincare.math` as is.
+
+Notes
+-----
+:math:`\tanh^{-1}` is computed inline with ``log1p`` in the input dtype
+instead of a float64 round-trip, gradients are the same. The ``precision``
+argument of scripted functions is accepted for compatibility and ignored
+"""
+import torch.jit
+from .math import (
+    MIN_NORM,
+    BALL_EPS,
+    inner,
+    norm,
+    mobius_coadd,
+    mobius_cosub,
+    mobius_scalar_mul,
+    geodesic,
+    geodesic_unit,
+    mobius_matvec,
+    mobius_pointwise_mul,
+    mobius_fn_apply_chain,
+    mobius_fn_apply,
+    mobiusify,
+    dist2plane,
+    pairwise_dist,
+    knn,
+    weighted_midpoint,
+    frechet_mean,
+    parallel_transport0,
+    parallel_transport0back,
+)
+
+__all__ = [
+    "project",
+    "lambda_x",
+    "inner",
+    "norm",
+    "mobius_add",
+    "mobius_sub",
+    "mobius_coadd",
+    "mobius_cosub",
+    "mobius_scalar_mul",
+    "dist",
+    "dist0",
+    "pairwise_dist",
+    "knn",
+    "weighted_midpoint",
+    "frechet_mean",
+    "geodesic",
+    "expmap",
+    "expmap0",
+    "geodesic_unit",
+    "logmap",
+    "logmap0",
+    "mobius_matvec",
+    "mobius_pointwise_mul",
+    "mobius_fn_apply_chain",
+    "mobius_fn_apply",
+    "mobiusify",
+    "dist2plane",
+    "gyration",
+    "parallel_transport",
+    "parallel_transport0",
+    "parallel_transport0back",
+    "egrad2rgrad",
+]
+
+
+def _as_tensor(c, x):
+    return torch.as_tensor(c, dtype=x.dtype, device=x.device)
+
+
+def _bound(x):
+    # 1 - 1e-15 rounds to 1 in float32, the bound should be in the input dtype
+    return 1 - torch.finfo(x.dtype).eps
+
+
+def project(x, *, c=1.0, dim=-1, eps=None):
+    if eps is None:
+        eps = BALL_EPS[x.dtype]
+    return _project(x, _as_tensor(c, x), dim, eps)
+
+
+def lambda_x(x, *, c=1.0, keepdim=False, dim=-1):
+    return _lambda_x(x, _as_tensor(c, x), keepdim, dim)
+
+
+def mobius_add(x, y, *, c=1.0, dim=-1):
+    return _mobius_add(x, y, _as_tensor(c, x), dim)
+
+
+def mobius_sub(x, y, *, c=1.0, dim=-1):
+    return _mobius_add(x, -y, _as_tensor(c, x), dim)
+
+
+def dist(x, y, *, c=1.0, keepdim=False, dim=-1, precision=None):
+    return _dist(x, y, _as_tensor(c, x), keepdim, dim, _bound(x))
+
+
+def dist0(x, *, c=1.0, keepdim=False, dim=-1, precision=None):
+    return _dist0(x, _as_tensor(c, x), keepdim, dim, _bound(x))
+
+
+def expmap(x, u, *, c=1.0, dim=-1):
+    return _expmap(x, u, _as_tensor(c, x), dim)
+
+
+def expmap0(u, *, c=1.0, dim=-1):
+    return _expmap0(u, _as_tensor(c, u), dim)
+
+
+def logmap(x, y, *, c=1.0, dim=-1, precision=None):
+    return _logmap(x, y, _as_tensor(c, x), dim, _bound(x))
+
+
+def logmap0(y, *, c=1.0, dim=-1, precision=None):
+    return _logmap0(y, _as_tensor(c, y), dim, _bound(y))
+
+
+def gyration(a, b, u, *, c=1.0, dim=-1):
+    return _gyration(a, b, u, _as_tensor(c, a), dim)
+
+
+def parallel_transport(x, y, v, *, c=1.0, dim=-1):
+    return _parallel_transport(x, y, v, _as_tensor(c, x), dim)
+
+
+def egrad2rgrad(x, grad, *, c=1.0, dim=-1):
+    return _egrad2rgrad(x, grad, _as_tensor(c, x), dim)
+
+
+@torch.jit.script
+def _tanh(x):
+    return x.clamp(-15, 15).tanh()
+
+
+@torch.jit.script
+def _artanh(x, bound: float):
+    # the clamp is straight-through, the gradient is the one of the clamped
+    # value as in the eager backend
+    x = x + (x.clamp(-bound, bound) - x).detach()
+    return 0.5 * (torch.log1p(x) - torch.log1p(-x))
+
+
+@torch.jit.script
+def _project(x, c, dim: int, eps: float):
+    norm = x.norm(dim=dim, keepdim=True, p=2).clamp_min(1e-15)
+    maxnorm = (1 - eps) / c.sqrt()
+    return torch.where(norm > maxnorm, x / norm * maxnorm, x)
+
+
+@torch.jit.script
+def _lambda_x(x, c, keepdim: bool, dim: int):
+    return 2 / (1 - c * x.pow(2).sum(dim=dim, keepdim=keepdim)).clamp_min(1e-15)
+
+
+@torch.jit.script
+def _mobius_add(x, y, c, dim: int):
+    x2 = x.pow(2).sum(dim=dim, keepdim=True)
+    y2 = y.pow(2).sum(dim=dim, keepdim=True)
+    xy = (x * y).sum(dim=dim, keepdim=True)
+    num = (1 + 2 * c * xy + c * y2) * x + (1 - c * x2) * y
+    denom = 1 + 2 * c * xy + c.pow(2) * x2 * y2
+    return num / denom.clamp_min(1e-15)
+
+
+@torch.jit.script
+def _dist(x, y, c, keepdim: bool, dim: int, bound: float):
+    sqrt_c = c.sqrt()
+    sub_norm = _mobius_add(-x, y, c, dim).norm(dim=dim, p=2, keepdim=keepdim)
+    return _artanh(sqrt_c * sub_norm, bound) * 2 / sqrt_c
+
+
+@torch.jit.script
+def _dist0(x, c, keepdim: bool, dim: int, bound: float):
+    sqrt_c = c.sqrt()
+    return _artanh(sqrt_c * x.norm(dim=dim, p=2, keepdim=keepdim), bound) * 2 / sqrt_c
+
+
+@torch.jit.script
+def _expmap(x, u, c, dim: int):
+    sqrt_c = c.sqrt()
+    u_norm = u.norm(dim=dim, p=2, keepdim=True).clamp_min(1e-15)
+    lam = _lambda_x(x, c, True, dim)
+    second_term = _tanh(sqrt_c / 2 * lam * u_norm) * u / (sqrt_c * u_norm)
+    return _mobius_add(x, second_term, c, dim)
+
+
+@torch.jit.script
+def _expmap0(u, c, dim: int):
+    sqrt_c = c.sqrt()
+    u_norm = u.norm(dim=dim, p=2, keepdim=True).clamp_min(1e-15)
+    return _tanh(sqrt_c * u_norm) * u / (sqrt_c * u_norm)
+
+
+@torch.jit.script
+def _logmap(x, y, c, dim: int, bound: float):
+    sub = _mobius_add(-x, y, c, dim)
+    sub_norm = sub.norm(dim=dim, p=2, keepdim=True).clamp_min(1e-15)
+    lam = _lambda_x(x, c, True, dim)
+    sqrt_c = c.sqrt()
+    return 2 / sqrt_c / lam * _artanh(sqrt_c * sub_norm, bound) * sub / sub_norm
+
+
+@torch.jit.script
+def _logmap0(y, c, dim: int, bound: float):
+    sqrt_c = c.sqrt()
+    y_norm = y.norm(dim=dim, p=2, keepdim=True).clamp_min(1e-15)
+    return y / y_norm / sqrt_c * _artanh(sqrt_c * y_norm, bound)
+
+
+@torch.jit.script
+def _gyration(u, v, w, c, dim: int):
+    u2 = u.pow(2).sum(dim=dim, keepdim=True)
+    v2 = v.pow(2).sum(dim=dim, keepdim=True)
+    uv = (u * v).sum(dim=dim, keepdim=True)
+    uw = (u * w).sum(dim=dim, keepdim=True)
+    vw = (v * w).sum(dim=dim, keepdim=True)
+    c2 = c.pow(2)
+    a = -c2 * uw * v2 + c * vw + 2 * c2 * uv * vw
+    b = -c2 * vw * u2 - c * uw
+    d = 1 + 2 * c * uv + c2 * u2 * v2
+    return w + 2 * (a * u + b * v) / d.clamp_min(1e-15)
+
+
+@torch.jit.script
+def _parallel_transport(x, y, u, c, dim: int):
+    return (
+        _gyration(y, -x, u, c, dim)
+        * _lambda_x(x, c, True, dim)
+        / _lambda_x(y, c, True, dim)
+    )
+
+
+@torch.jit.script
+def _egrad2rgrad(x, grad, c, dim: int):
+    return grad / _lambda_x(x, c, True, dim).pow(2)
@@ -12,6 +12,56 @@ import torch.jit
 
 MIN_NORM = 1e-15
 BALL_EPS = {torch.float32: 4e-3, torch.float64: 1e-5}
+PRECISIONS = ("double", "native")
+_default_precision = "double"
+
+
+def set_default_precision(precision):
+    """
+    Set the precision policy for :func:`artanh` and :func:`arsinh`
+
+    Parameters
+    ----------
+    precision : str
+        ``"double"`` to compute in float64 and cast back (default) or
+        ``"native"`` to compute in the input dtype with ``log1p`` based formulas
+    """
+    global _default_precision
+    _check_precision(precision)
+    _default_precision = precision
+
+
+def get_default_precision():
+    """
+    Get the precision policy for :func:`artanh` and :func:`arsinh`
+
+    Returns
+    -------
+    str
+    """
+    return _default_precision
+
+
+def _check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(
+            "Unknown precision {}, expected one of {}".format(precision, PRECISIONS)
+        )
+
+
+def _resolve_precision(precision):
+    if precision is None:
+        return _default_precision
+    _check_precision(precision)
+    return precision
+
+
+def _artanh_bound(dtype, precision):
+    # 1 - 1e-15 rounds to 1 in float32, the native path needs a bound in its dtype
+    if precision == "native":
+        return 1 - torch.finfo(dtype).eps
+    else:
+        return 1 - 1e-15
 
 
 def tanh(x):
@@ -20,9 +70,13 @@ def tanh(x):
 
 class Artanh(torch.autograd.Function):
     @staticmethod
-    def forward(ctx, x):
-        x = x.clamp(-1 + 1e-15, 1 - 1e-15)
+    def forward(ctx, x, precision):
+        # the input is saved unclamped, backward stays differentiable
         ctx.save_for_backward(x)
+        ctx.bound = _artanh_bound(x.dtype, precision)
+        x = x.clamp(-ctx.bound, ctx.bound)
+        if precision == "native":
+            return (torch.log1p(x) - torch.log1p(-x)).mul_(0.5)
         dtype = x.dtype
         x = x.double()
         res = (torch.log_(1 + x).sub_(torch.log_(1 - x))).mul_(0.5)
@@ -31,28 +85,62 @@ class Artanh(torch.autograd.Function):
     @staticmethod
     def backward(ctx, grad_output):
         input, = ctx.saved_tensors
-        return grad_output / (1 - input ** 2)
+        input = input.clamp(-ctx.bound, ctx.bound)
+        return grad_output / (1 - input ** 2), None
 
 
 class Arsinh(torch.autograd.Function):
     @staticmethod
-    def forward(ctx, x):
+    def forward(ctx, x, precision):
         ctx.save_for_backward(x)
+        if precision == "native":
+            # arsinh(|x|) = log1p(|x| + x^2 / (1 + sqrt(1 + x^2))), the second
+            # term is rewritten not to overflow for large |x|
+            a = x.abs()
+            inv = a.reciprocal()
+            res = torch.log1p(a + a / (inv + torch.sqrt(1 + inv.pow(2))))
+            return res * x.sign()
         z = x.double()
         return (z + torch.sqrt_(1 + z.pow(2))).clamp_min_(MIN_NORM).log_().to(x.dtype)
 
     @staticmethod
     def backward(ctx, grad_output):
         input, = ctx.saved_tensors
-        return grad_output / (1 + input ** 2) ** 0.5
+        return grad_output / (1 + input ** 2) ** 0.5, None
+
+
+def artanh(x, precision=None):
+    return Artanh.apply(x, _resolve_precision(precision))
 
 
-def artanh(x):
-    return Artanh.apply(x)
+def arsinh(x, precision=None):
+    return Arsinh.apply(x, _resolve_precision(precision))
 
 
-def arsinh(x):
-    return Arsinh.apply(x)
+def _use_composite(c):
+    # closed form gradients below do not account for the curvature
+    return torch.is_tensor(c) and c.requires_grad
+
+
+def _composite_backward(fn, inputs, needs_input_grad, grad_output):
+    # closed form gradients are computed without a graph, for higher order
+    # derivatives the composite path is differentiated instead
+    wrt = [t for t, needs in zip(inputs, needs_input_grad) if needs]
+    grads = iter(torch.autograd.grad(fn(*inputs), wrt, grad_output, create_graph=True))
+    return tuple(next(grads) if needs else None for needs in needs_input_grad)
+
+
+def _reduce_grad(grad, shape):
+    # sum gradient over broadcasted dimensions
+    if grad.shape == shape:
+        return grad
+    extra = grad.dim() - len(shape)
+    if extra > 0:
+        grad = grad.sum(dim=tuple(range(extra)))
+    dims = tuple(i for i, s in enumerate(shape) if s == 1 and grad.shape[i] != 1)
+    if dims:
+        grad = grad.sum(dim=dims, keepdim=True)
+    return grad
 
 
 def project(x, *, c=1.0, dim=-1, eps=None):
@@ -388,7 +476,7 @@ def _mobius_cosub(x, y, c, dim: int = -1):
     return _mobius_coadd(x, -y, c, dim=dim)
 
 
-def mobius_scalar_mul(r, x, *, c=1.0, dim=-1):
+def mobius_scalar_mul(r, x, *, c=1.0, dim=-1, precision=None):
     r"""
     Left scalar multiplication on the Poincare ball
 
@@ -432,23 +520,26 @@ def mobius_scalar_mul(r, x, *, c=1.0, dim=-1):
         ball negative curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         the result of mobius scalar multiplication
     """
-    return _mobius_scalar_mul(r, x, c, dim=dim)
+    return _mobius_scalar_mul(r, x, c, dim=dim, precision=precision)
 
 
-def _mobius_scalar_mul(r, x, c, dim: int = -1):
+def _mobius_scalar_mul(r, x, c, dim: int = -1, precision: str = None):
     x_norm = x.norm(dim=dim, keepdim=True, p=2).clamp_min(MIN_NORM)
     sqrt_c = c ** 0.5
-    res_c = tanh(r * artanh(sqrt_c * x_norm)) * x / (x_norm * sqrt_c)
+    res_c = tanh(r * artanh(sqrt_c * x_norm, precision)) * x / (x_norm * sqrt_c)
     return res_c
 
 
-def dist(x, y, *, c=1.0, keepdim=False, dim=-1):
+def dist(x, y, *, c=1.0, keepdim=False, dim=-1, precision=None):
     r"""
     Distance on the Poincare ball
 
@@ -470,24 +561,208 @@ def dist(x, y, *, c=1.0, keepdim=False, dim=-1):
         retain the last dim? (default: false)
     dim : int
         reduction dimension
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         geodesic distance between :math:`x` and :math:`y`
     """
-    return _dist(x, y, c, keepdim=keepdim, dim=dim)
+    return _dist(x, y, c, keepdim=keepdim, dim=dim, precision=precision)
+
 
+def _dist(x, y, c, keepdim: bool = False, dim: int = -1, precision: str = None):
+    if not _use_composite(c):
+        return Dist.apply(x, y, c, keepdim, dim, _resolve_precision(precision))
+    return _dist_composite(x, y, c, keepdim=keepdim, dim=dim, precision=precision)
 
-def _dist(x, y, c, keepdim: bool = False, dim: int = -1):
+
+def _dist_composite(
+    x, y, c, keepdim: bool = False, dim: int = -1, precision: str = None
+):
     sqrt_c = c ** 0.5
     dist_c = artanh(
-        sqrt_c * _mobius_add(-x, y, c, dim=dim).norm(dim=dim, p=2, keepdim=keepdim)
+        sqrt_c * _mobius_add(-x, y, c, dim=dim).norm(dim=dim, p=2, keepdim=keepdim),
+        precision,
     )
     return dist_c * 2 / sqrt_c
 
 
-def dist0(x, *, c=1.0, keepdim=False, dim=-1):
+class Dist(torch.autograd.Function):
+    r"""
+    Distance with the closed form gradient
+
+    Uses :math:`\|(-x)\oplus_c y\|_2^2 = \|x - y\|_2^2 / D`, where
+    :math:`D = 1 - 2c\langle x, y\rangle + c^2\|x\|_2^2\|y\|_2^2`. Only inputs
+    and per-point scalars are saved for backward
+    """
+
+    @staticmethod
+    def forward(ctx, x, y, c, keepdim, dim, precision):
+        c = torch.as_tensor(c, dtype=x.dtype, device=x.device)
+        x2 = x.pow(2).sum(dim=dim, keepdim=True)
+        y2 = y.pow(2).sum(dim=dim, keepdim=True)
+        xy = (x * y).sum(dim=dim, keepdim=True)
+        diff2 = (x - y).pow(2).sum(dim=dim, keepdim=True)
+        denom = (1 - 2 * c * xy + c ** 2 * x2 * y2).clamp_min(MIN_NORM)
+        # norm of mobius addition
+        sub_norm = (diff2 / denom).sqrt()
+        ctx.save_for_backward(x, y, c, x2, y2, diff2, denom, sub_norm)
+        ctx.keepdim, ctx.dim, ctx.precision = keepdim, dim, precision
+        # the policy is fixed at the call, backward may run under another default
+        ctx.bound = _artanh_bound(x.dtype, precision)
+        if not keepdim:
+            sub_norm = sub_norm.squeeze(dim)
+        return artanh(c ** 0.5 * sub_norm, precision) * 2 / c ** 0.5
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        x, y, c, x2, y2, diff2, denom, sub_norm = ctx.saved_tensors
+        if torch.is_grad_enabled():
+            grads = _composite_backward(
+                lambda x, y: _dist_composite(
+                    x, y, c, ctx.keepdim, ctx.dim, precision=ctx.precision
+                ),
+                (x, y),
+                ctx.needs_input_grad[:2],
+                grad_output,
+            )
+            return grads + (None, None, None, None)
+        grad_norm = _artanh_scaled_grad(
+            grad_output, c, sub_norm, ctx.keepdim, ctx.dim, ctx.bound
+        )
+        coef = grad_norm / (sub_norm.clamp_min(MIN_NORM) * denom ** 2)
+        grad_x = grad_y = None
+        if ctx.needs_input_grad[0]:
+            grad_x = coef * (denom * (x - y) + c * diff2 * y - c ** 2 * diff2 * y2 * x)
+            grad_x = _reduce_grad(grad_x, x.shape)
+        if ctx.needs_input_grad[1]:
+            grad_y = coef * (denom * (y - x) + c * diff2 * x - c ** 2 * diff2 * x2 * y)
+            grad_y = _reduce_grad(grad_y, y.shape)
+        return grad_x, grad_y, None, None, None, None
+
+
+def _artanh_scaled_grad(grad_output, c, norm, keepdim, dim, bound):
+    # gradient of 2 / sqrt(c) * artanh(sqrt(c) * norm) w.r.t. norm,
+    # norm is of shape with kept dim
+    if not keepdim:
+        norm = norm.squeeze(dim)
+    z = (c ** 0.5 * norm).clamp_max(bound)
+    grad_norm = _reduce_grad(grad_output * 2 / (1 - z ** 2), norm.shape)
+    if not keepdim:
+        grad_norm = grad_norm.unsqueeze(dim)
+    return grad_norm
+
+
+def pairwise_dist(x, y, *, c=1.0, chunk_size=None, precision=None):
+    r"""
+    Distances between all pairs of points on the Poincare ball
+
+    .. math::
+
+        d_c(x, y) = \frac{2}{\sqrt{c}}\tanh^{-1}\left(
+            \sqrt{\frac{c\|x - y\|_2^2}{1 - 2c\langle x, y\rangle + c^2\|x\|_2^2\|y\|_2^2}}
+        \right)
+
+    Parameters
+    ----------
+    x : tensor
+        points on Poincare ball of shape ``(..., N, D)``
+    y : tensor
+        points on Poincare ball of shape ``(..., M, D)``
+    c : float|tensor
+        ball negative curvature
+    chunk_size : int
+        number of points in ``y`` processed at once (default: None -- all of them)
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
+
+    Returns
+    -------
+    tensor
+        distance matrix of shape ``(..., N, M)``
+
+    Notes
+    -----
+    The closed form needs squared norms and the Gram matrix :math:`xy^\top` only,
+    so the memory is :math:`O(NM)` instead of :math:`O(NMD)` for broadcasted
+    :func:`dist`. The point dimension is the last one
+    """
+    return _pairwise_dist(x, y, c, chunk_size=chunk_size, precision=precision)
+
+
+def _pairwise_dist(x, y, c, chunk_size: int = None, precision: str = None):
+    x2 = x.pow(2).sum(dim=-1, keepdim=True)
+    if chunk_size is None:
+        chunk_size = max(y.shape[-2], 1)
+    res = []
+    for y_ in y.split(chunk_size, dim=-2):
+        y2 = y_.pow(2).sum(dim=-1).unsqueeze(-2)
+        xy = x @ y_.transpose(-1, -2)
+        diff2 = (x2 + y2 - 2 * xy).clamp_min(0)
+        denom = (1 - 2 * c * xy + c ** 2 * x2 * y2).clamp_min(MIN_NORM)
+        sub_norm = (diff2 / denom).clamp_min(MIN_NORM).sqrt()
+        res.append(artanh(c ** 0.5 * sub_norm, precision) * 2 / c ** 0.5)
+    return torch.cat(res, dim=-1)
+
+
+def knn(query, points, k, *, c=1.0, chunk_size=None, precision=None):
+    r"""
+    Nearest neighbours of query points on the Poincare ball
+
+    Parameters
+    ----------
+    query : tensor
+        query points of shape ``(..., N, D)``
+    points : tensor
+        database points of shape ``(..., M, D)``
+    k : int
+        number of neighbours
+    c : float|tensor
+        ball negative curvature
+    chunk_size : int
+        number of database points processed at once (default: None -- all of them)
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
+
+    Returns
+    -------
+    tuple
+        distances and indices of shape ``(..., N, k)``, sorted by distance
+
+    Notes
+    -----
+    The database is streamed in chunks with :func:`pairwise_dist` and a running
+    top-k is kept, the memory is :math:`O(N(k + \text{chunk\_size}))`
+    """
+    return _knn(query, points, k, c, chunk_size=chunk_size, precision=precision)
+
+
+def _knn(query, points, k: int, c, chunk_size: int = None, precision: str = None):
+    m = points.shape[-2]
+    if not 0 < k <= m:
+        raise ValueError("k should be in [1, {}], got {}".format(m, k))
+    if chunk_size is None:
+        chunk_size = m
+    best_dist = best_idx = None
+    for start in range(0, m, chunk_size):
+        chunk = points[..., start : start + chunk_size, :]
+        dist = _pairwise_dist(query, chunk, c, precision=precision)
+        idx = torch.arange(start, start + chunk.shape[-2], device=dist.device)
+        idx = idx.expand_as(dist)
+        if best_dist is not None:
+            dist = torch.cat([best_dist, dist], dim=-1)
+            idx = torch.cat([best_idx, idx], dim=-1)
+        best_dist, pos = dist.topk(min(k, dist.shape[-1]), dim=-1, largest=False)
+        best_idx = idx.gather(-1, pos)
+    return best_dist, best_idx
+
+
+def dist0(x, *, c=1.0, keepdim=False, dim=-1, precision=None):
     r"""
     Distance on the Poincare ball to zero
 
@@ -501,22 +776,67 @@ def dist0(x, *, c=1.0, keepdim=False, dim=-1):
         retain the last dim? (default: false)
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         geodesic distance between :math:`x` and :math:`0`
     """
-    return _dist0(x, c, keepdim=keepdim, dim=dim)
+    return _dist0(x, c, keepdim=keepdim, dim=dim, precision=precision)
+
 
+def _dist0(x, c, keepdim: bool = False, dim: int = -1, precision: str = None):
+    if not _use_composite(c):
+        return Dist0.apply(x, c, keepdim, dim, _resolve_precision(precision))
+    return _dist0_composite(x, c, keepdim=keepdim, dim=dim, precision=precision)
 
-def _dist0(x, c, keepdim: bool = False, dim: int = -1):
+
+def _dist0_composite(x, c, keepdim: bool = False, dim: int = -1, precision: str = None):
     sqrt_c = c ** 0.5
-    dist_c = artanh(sqrt_c * x.norm(dim=dim, p=2, keepdim=keepdim))
+    dist_c = artanh(sqrt_c * x.norm(dim=dim, p=2, keepdim=keepdim), precision)
     return dist_c * 2 / sqrt_c
 
 
-def geodesic(t, x, y, *, c=1.0, dim=-1):
+class Dist0(torch.autograd.Function):
+    """
+    Distance to zero with the closed form gradient
+    """
+
+    @staticmethod
+    def forward(ctx, x, c, keepdim, dim, precision):
+        c = torch.as_tensor(c, dtype=x.dtype, device=x.device)
+        x_norm = x.norm(dim=dim, p=2, keepdim=True)
+        ctx.save_for_backward(x, c, x_norm)
+        ctx.keepdim, ctx.dim, ctx.precision = keepdim, dim, precision
+        ctx.bound = _artanh_bound(x.dtype, precision)
+        if not keepdim:
+            x_norm = x_norm.squeeze(dim)
+        return artanh(c ** 0.5 * x_norm, precision) * 2 / c ** 0.5
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        x, c, x_norm = ctx.saved_tensors
+        if torch.is_grad_enabled():
+            grad_x, = _composite_backward(
+                lambda x: _dist0_composite(
+                    x, c, ctx.keepdim, ctx.dim, precision=ctx.precision
+                ),
+                (x,),
+                ctx.needs_input_grad[:1],
+                grad_output,
+            )
+            return grad_x, None, None, None, None
+        grad_norm = _artanh_scaled_grad(
+            grad_output, c, x_norm, ctx.keepdim, ctx.dim, ctx.bound
+        )
+        grad_x = grad_norm * x / x_norm.clamp_min(MIN_NORM)
+        return grad_x, None, None, None, None
+
+
+def geodesic(t, x, y, *, c=1.0, dim=-1, precision=None):
     r"""
     Geodesic (the shortest) path connecting :math:`x` and :math:`y`.
     The path can be treated as and extension of a line segment between
@@ -563,19 +883,22 @@ def geodesic(t, x, y, *, c=1.0, dim=-1):
         ball negative curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         point on the Poincare ball
     """
-    return _geodesic(t, x, y, c, dim=dim)
+    return _geodesic(t, x, y, c, dim=dim, precision=precision)
 
 
-def _geodesic(t, x, y, c, dim: int = -1):
+def _geodesic(t, x, y, c, dim: int = -1, precision: str = None):
     # this is not very numerically unstable
     v = _mobius_add(-x, y, c, dim=dim)
-    tv = _mobius_scalar_mul(t, v, c, dim=dim)
+    tv = _mobius_scalar_mul(t, v, c, dim=dim, precision=precision)
     gamma_t = _mobius_add(x, tv, c, dim=dim)
     return gamma_t
 
@@ -658,12 +981,54 @@ def expmap0(u, *, c=1.0, dim=-1):
 
 
 def _expmap0(u, c, dim: int = -1):
+    if not _use_composite(c):
+        return Expmap0.apply(u, c, dim)
+    return _expmap0_composite(u, c, dim=dim)
+
+
+def _expmap0_composite(u, c, dim: int = -1):
     sqrt_c = c ** 0.5
     u_norm = u.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
     gamma_1 = tanh(sqrt_c * u_norm) * u / (sqrt_c * u_norm)
     return gamma_1
 
 
+class Expmap0(torch.autograd.Function):
+    """
+    Exponential map from zero with the closed form gradient
+    """
+
+    @staticmethod
+    def forward(ctx, u, c, dim):
+        c = torch.as_tensor(c, dtype=u.dtype, device=u.device)
+        u_norm = u.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
+        t = tanh(c ** 0.5 * u_norm)
+        ctx.save_for_backward(u, c, u_norm, t)
+        ctx.dim = dim
+        return t * u / (c ** 0.5 * u_norm)
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        u, c, u_norm, t = ctx.saved_tensors
+        if torch.is_grad_enabled():
+            grad_u, = _composite_backward(
+                lambda u: _expmap0_composite(u, c, ctx.dim),
+                (u,),
+                ctx.needs_input_grad[:1],
+                grad_output,
+            )
+            return grad_u, None, None
+        sqrt_c = c ** 0.5
+        sn = sqrt_c * u_norm
+        # tanh is clamped in forward
+        dt = sqrt_c * (1 - t ** 2) * (sn <= 15).to(t.dtype)
+        # d/dn [tanh(sqrt(c) n) / (sqrt(c) n)]
+        df = (dt * sn - t * sqrt_c) / sn ** 2
+        ug = (u * grad_output).sum(dim=ctx.dim, keepdim=True)
+        grad_u = t / sn * grad_output + df * ug * u / u_norm
+        return _reduce_grad(grad_u, u.shape), None, None
+
+
 def geodesic_unit(t, x, u, *, c=1.0, dim=-1):
     r"""
     Unit speed geodesic starting from :math:`x` with direction :math:`u/\|u\|_x`
@@ -701,7 +1066,7 @@ def _geodesic_unit(t, x, u, c, dim: int = -1):
     return gamma_1
 
 
-def logmap(x, y, *, c=1.0, dim=-1):
+def logmap(x, y, *, c=1.0, dim=-1, precision=None):
     r"""
     Logarithmic map for two points :math:`x` and :math:`y` on the manifold.
 
@@ -728,24 +1093,27 @@ def logmap(x, y, *, c=1.0, dim=-1):
         ball negative curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         tangent vector that transports :math:`x` to :math:`y`
     """
-    return _logmap(x, y, c, dim=dim)
+    return _logmap(x, y, c, dim=dim, precision=precision)
 
 
-def _logmap(x, y, c, dim: int = -1):
+def _logmap(x, y, c, dim: int = -1, precision: str = None):
     sub = _mobius_add(-x, y, c, dim=dim)
     sub_norm = sub.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
     lam = _lambda_x(x, c, keepdim=True, dim=dim)
     sqrt_c = c ** 0.5
-    return 2 / sqrt_c / lam * artanh(sqrt_c * sub_norm) * sub / sub_norm
+    return 2 / sqrt_c / lam * artanh(sqrt_c * sub_norm, precision) * sub / sub_norm
 
 
-def logmap0(y, *, c=1.0, dim=-1):
+def logmap0(y, *, c=1.0, dim=-1, precision=None):
     r"""
     Logarithmic map for :math:`y` from :math:`0` on the manifold.
 
@@ -768,22 +1136,66 @@ def logmap0(y, *, c=1.0, dim=-1):
         ball negative curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         tangent vector that transports :math:`0` to :math:`y`
     """
-    return _logmap0(y, c, dim=dim)
+    return _logmap0(y, c, dim=dim, precision=precision)
+
 
+def _logmap0(y, c, dim: int = -1, precision: str = None):
+    if not _use_composite(c):
+        return Logmap0.apply(y, c, dim, _resolve_precision(precision))
+    return _logmap0_composite(y, c, dim=dim, precision=precision)
 
-def _logmap0(y, c, dim: int = -1):
+
+def _logmap0_composite(y, c, dim: int = -1, precision: str = None):
     sqrt_c = c ** 0.5
     y_norm = y.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
-    return y / y_norm / sqrt_c * artanh(sqrt_c * y_norm)
+    return y / y_norm / sqrt_c * artanh(sqrt_c * y_norm, precision)
+
+
+class Logmap0(torch.autograd.Function):
+    """
+    Logarithmic map from zero with the closed form gradient
+    """
 
+    @staticmethod
+    def forward(ctx, y, c, dim, precision):
+        c = torch.as_tensor(c, dtype=y.dtype, device=y.device)
+        y_norm = y.norm(dim=dim, p=2, keepdim=True).clamp_min(MIN_NORM)
+        a = artanh(c ** 0.5 * y_norm, precision)
+        ctx.save_for_backward(y, c, y_norm, a)
+        ctx.dim, ctx.precision = dim, precision
+        ctx.bound = _artanh_bound(y.dtype, precision)
+        return y / y_norm / c ** 0.5 * a
 
-def mobius_matvec(m, x, *, c=1.0, dim=-1):
+    @staticmethod
+    def backward(ctx, grad_output):
+        y, c, y_norm, a = ctx.saved_tensors
+        if torch.is_grad_enabled():
+            grad_y, = _composite_backward(
+                lambda y: _logmap0_composite(y, c, ctx.dim, precision=ctx.precision),
+                (y,),
+                ctx.needs_input_grad[:1],
+                grad_output,
+            )
+            return grad_y, None, None, None
+        sqrt_c = c ** 0.5
+        z = (sqrt_c * y_norm).clamp_max(ctx.bound)
+        # d/dn [artanh(sqrt(c) n) / (sqrt(c) n)]
+        dh = (sqrt_c * y_norm / (1 - z ** 2) - a) / (sqrt_c * y_norm ** 2)
+        yg = (y * grad_output).sum(dim=ctx.dim, keepdim=True)
+        grad_y = a / (sqrt_c * y_norm) * grad_output + dh * yg * y / y_norm
+        return _reduce_grad(grad_y, y.shape), None, None, None
+
+
+def mobius_matvec(m, x, *, c=1.0, dim=-1, precision=None):
     r"""
     Generalization for matrix-vector multiplication to hyperbolic space defined as
 
@@ -806,16 +1218,19 @@ def mobius_matvec(m, x, *, c=1.0, dim=-1):
         negative ball curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         Mobius matvec result
     """
-    return _mobius_matvec(m, x, c, dim=dim)
+    return _mobius_matvec(m, x, c, dim=dim, precision=precision)
 
 
-def _mobius_matvec(m, x, c, dim: int = -1):
+def _mobius_matvec(m, x, c, dim: int = -1, precision: str = None):
     if m.dim() > 2 and dim != -1:
         raise RuntimeError(
             "broadcasted Mobius matvec is supported for the last dim only"
@@ -827,14 +1242,15 @@ def _mobius_matvec(m, x, c, dim: int = -1):
     else:
         mx = torch.matmul(m, x.unsqueeze(-1)).squeeze(-1)
     mx_norm = mx.norm(dim=dim, keepdim=True, p=2).clamp_min(MIN_NORM)
-    res_c = tanh(mx_norm / x_norm * artanh(sqrt_c * x_norm)) * mx / (mx_norm * sqrt_c)
+    res_c = tanh(mx_norm / x_norm * artanh(sqrt_c * x_norm, precision))
+    res_c = res_c * mx / (mx_norm * sqrt_c)
     cond = (mx == 0).prod(dim=dim, keepdim=True, dtype=torch.uint8)
     res_0 = torch.zeros(1, dtype=res_c.dtype, device=res_c.device)
     res = torch.where(cond, res_0, res_c)
     return res
 
 
-def mobius_pointwise_mul(w, x, *, c=1.0, dim=-1):
+def mobius_pointwise_mul(w, x, *, c=1.0, dim=-1, precision=None):
     r"""
     Generalization for point-wise multiplication to hyperbolic space defined as
 
@@ -855,28 +1271,32 @@ def mobius_pointwise_mul(w, x, *, c=1.0, dim=-1):
         negative ball curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         Mobius point-wise mul result
     """
-    return _mobius_pointwise_mul(w, x, c, dim=dim)
+    return _mobius_pointwise_mul(w, x, c, dim=dim, precision=precision)
 
 
-def _mobius_pointwise_mul(w, x, c, dim: int = -1):
+def _mobius_pointwise_mul(w, x, c, dim: int = -1, precision: str = None):
     x_norm = x.norm(dim=dim, keepdim=True, p=2).clamp_min(MIN_NORM)
     sqrt_c = c ** 0.5
     wx = w * x
     wx_norm = wx.norm(dim=dim, keepdim=True, p=2).clamp_min(MIN_NORM)
-    res_c = tanh(wx_norm / x_norm * artanh(sqrt_c * x_norm)) * wx / (wx_norm * sqrt_c)
+    res_c = tanh(wx_norm / x_norm * artanh(sqrt_c * x_norm, precision))
+    res_c = res_c * wx / (wx_norm * sqrt_c)
     cond = (wx == 0).prod(dim=dim, keepdim=True, dtype=torch.uint8)
     res_0 = torch.zeros(1, dtype=res_c.dtype, device=res_c.device)
     res = torch.where(cond, res_0, res_c)
     return res
 
 
-def mobius_fn_apply_chain(x, *fns, c=1.0, dim=-1):
+def mobius_fn_apply_chain(x, *fns, c=1.0, dim=-1, precision=None):
     r"""
     Generalization for functions in hyperbolic space.
     First, hyperbolic vector is mapped to a Euclidean space via
@@ -909,6 +1329,9 @@ def mobius_fn_apply_chain(x, *fns, c=1.0, dim=-1):
         ball negative curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
@@ -918,14 +1341,14 @@ def mobius_fn_apply_chain(x, *fns, c=1.0, dim=-1):
     if not fns:
         return x
     else:
-        ex = _logmap0(x, c, dim=dim)
+        ex = _logmap0(x, c, dim=dim, precision=precision)
         for fn in fns:
             ex = fn(ex)
         y = _expmap0(ex, c, dim=dim)
         return y
 
 
-def mobius_fn_apply(fn, x, *args, c=1.0, dim=-1, **kwargs):
+def mobius_fn_apply(fn, x, *args, c=1.0, dim=-1, precision=None, **kwargs):
     r"""
     Generalization for functions in hyperbolic space.
     First, hyperbolic vector is mapped to a Euclidean space via
@@ -948,13 +1371,16 @@ def mobius_fn_apply(fn, x, *args, c=1.0, dim=-1, **kwargs):
         ball negative curvature
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         Result of function in hyperbolic space
     """
-    ex = _logmap0(x, c, dim=dim)
+    ex = _logmap0(x, c, dim=dim, precision=precision)
     ex = fn(ex, *args, **kwargs)
     y = _expmap0(ex, c, dim=dim)
     return y
@@ -976,8 +1402,8 @@ def mobiusify(fn):
     """
 
     @functools.wraps(fn)
-    def mobius_fn(x, *args, c=1.0, dim=-1, **kwargs):
-        ex = _logmap0(x, c, dim=dim)
+    def mobius_fn(x, *args, c=1.0, dim=-1, precision=None, **kwargs):
+        ex = _logmap0(x, c, dim=dim, precision=precision)
         ex = fn(ex, *args, **kwargs)
         y = _expmap0(ex, c, dim=dim)
         return y
@@ -985,7 +1411,7 @@ def mobiusify(fn):
     return mobius_fn
 
 
-def dist2plane(x, p, a, *, c=1.0, keepdim=False, signed=False, dim=-1):
+def dist2plane(x, p, a, *, c=1.0, keepdim=False, signed=False, dim=-1, precision=None):
     r"""
     Distance from :math:`x` to a hyperbolic hyperplane in Poincare ball
     that is orthogonal to :math:`a` and contains :math:`p`.
@@ -1089,16 +1515,30 @@ def dist2plane(x, p, a, *, c=1.0, keepdim=False, signed=False, dim=-1):
         return signed distance
     dim : int
         reduction dimension for operations
+    precision : str
+        precision policy of :math:`\sinh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
 
     Returns
     -------
     tensor
         distance to the hyperplane
     """
-    return _dist2plane(x, a, p, c, keepdim=keepdim, signed=signed, dim=dim)
+    return _dist2plane(
+        x, a, p, c, keepdim=keepdim, signed=signed, dim=dim, precision=precision
+    )
 
 
-def _dist2plane(x, a, p, c, keepdim: bool = False, signed: bool = False, dim: int = -1):
+def _dist2plane(
+    x,
+    a,
+    p,
+    c,
+    keepdim: bool = False,
+    signed: bool = False,
+    dim: int = -1,
+    precision: str = None,
+):
     sqrt_c = c ** 0.5
     diff = _mobius_add(-p, x, c, dim=dim)
     diff_norm2 = diff.pow(2).sum(dim=dim, keepdim=keepdim).clamp_min(MIN_NORM)
@@ -1108,7 +1548,7 @@ def _dist2plane(x, a, p, c, keepdim: bool = False, signed: bool = False, dim: in
     a_norm = a.norm(dim=dim, keepdim=keepdim, p=2).clamp_min(MIN_NORM)
     num = 2 * sqrt_c * sc_diff_a
     denom = (1 - c * diff_norm2) * a_norm
-    return arsinh(num / denom.clamp_min(MIN_NORM)) / sqrt_c
+    return arsinh(num / denom.clamp_min(MIN_NORM), precision) / sqrt_c
 
 
 def gyration(a, b, u, *, c=1.0, dim=-1):
@@ -1329,3 +1769,158 @@ def egrad2rgrad(x, grad, *, c=1.0, dim=-1):
 
 def _egrad2rgrad(x, grad, c, dim: int = -1):
     return grad / _lambda_x(x, c, keepdim=True, dim=dim) ** 2
+
+
+def weighted_midpoint(x, weights=None, *, c=1.0, reducedim=-2, dim=-1, keepdim=False):
+    r"""
+    Weighted gyromidpoint on the Poincare ball
+
+    .. math::
+
+        m = \frac{1}{2}\otimes_c\left(
+            \frac{\sum_i w_i\lambda^c_{x_i}x_i}{\sum_i w_i(\lambda^c_{x_i} - 1)}
+        \right)
+
+    Parameters
+    ----------
+    x : tensor
+        points on the Poincare ball
+    weights : tensor
+        non-negative weights of points, of the shape of ``x`` without ``dim``
+        (default: None -- equal weights)
+    c : float|tensor
+        ball negative curvature
+    reducedim : int
+        dimension that indexes points
+    dim : int
+        dimension of point coordinates
+    keepdim : bool
+        retain ``reducedim``? (default: false)
+
+    Returns
+    -------
+    tensor
+        midpoint, a single weighted reduction over ``reducedim``
+
+    Notes
+    -----
+    The gyromidpoint is the Einstein midpoint in the Klein model mapped back to the ball,
+    it approximates the Frechet mean, see :func:`frechet_mean` for the exact one
+    """
+    return _weighted_midpoint(
+        x, weights, c, reducedim=reducedim, dim=dim, keepdim=keepdim
+    )
+
+
+def _weighted_midpoint(
+    x, weights, c, reducedim: int = -2, dim: int = -1, keepdim: bool = False
+):
+    lam = _lambda_x(x, c, keepdim=True, dim=dim)
+    if weights is None:
+        weights = torch.ones_like(lam)
+    else:
+        weights = weights.unsqueeze(dim)
+    num = (weights * lam * x).sum(dim=reducedim, keepdim=True)
+    denom = (weights * (lam - 1)).sum(dim=reducedim, keepdim=True)
+    # point in the Klein model, 1/2 (x) k in closed form
+    k = num / denom.clamp_min(MIN_NORM)
+    s = (1 - c * k.pow(2).sum(dim=dim, keepdim=True)).clamp_min(0)
+    res = k / (1 + s.sqrt())
+    if not keepdim:
+        res = res.squeeze(reducedim)
+    return res
+
+
+def frechet_mean(
+    x, weights=None, *, c=1.0, keepdim=False, max_iter=100, tol=1e-6, precision=None
+):
+    r"""
+    Weighted Frechet (Karcher) mean on the Poincare ball
+
+    .. math::
+
+        m = \arg\min_y \sum_i w_i d_c(y, x_i)^2
+
+    Parameters
+    ----------
+    x : tensor
+        points on the Poincare ball of shape ``(..., N, D)``, the sets are
+        reduced over the dimension preceding the point dimension
+    weights : tensor
+        non-negative weights of points of shape ``(..., N)``
+        (default: None -- equal weights)
+    c : float|tensor
+        ball negative curvature
+    keepdim : bool
+        retain the reduced dimension? (default: false)
+    max_iter : int
+        maximum number of iterations
+    tol : float
+        tolerance for the norm of the Riemannian gradient
+    precision : str
+        precision policy of :math:`\tanh^{-1}`, see :func:`set_default_precision`
+        (default: None -- use the default policy)
+
+    Returns
+    -------
+    tensor
+        mean of points
+
+    Notes
+    -----
+    Iterations :math:`m \gets \exp_m(t\sum_i w_i\log_m(x_i) / \sum_i w_i)` start from
+    :func:`weighted_midpoint`, the step :math:`t \le 1` is the inverse bound
+    of the Hessian. All sets of points are updated in one batch, converged ones
+    are dropped from it. The signature follows :meth:`geoopt.Manifold.frechet_mean`
+    """
+    return _frechet_mean(
+        x, weights, c, keepdim=keepdim, max_iter=max_iter, tol=tol, precision=precision
+    )
+
+
+def _frechet_mean(
+    x,
+    weights,
+    c,
+    keepdim: bool = False,
+    max_iter: int = 100,
+    tol: float = 1e-6,
+    precision: str = None,
+):
+    reducedim, dim = -2, -1
+    mean = _weighted_midpoint(x, weights, c, reducedim=reducedim, dim=dim, keepdim=True)
+    if weights is None:
+        weights = torch.ones_like(x.narrow(dim, 0, 1))
+    else:
+        weights = weights.unsqueeze(dim)
+    weights = weights / weights.sum(dim=reducedim, keepdim=True)
+    # sets are flattened into one batch, converged ones are dropped from it
+    batch_shape = mean.shape[:-2]
+    size = x.shape[-1]
+    x = x.expand(batch_shape + x.shape[-2:]).reshape(-1, x.shape[-2], size)
+    weights = weights.expand(batch_shape + weights.shape[-2:])
+    weights = weights.reshape(-1, weights.shape[-2], 1)
+    mean = mean.reshape(-1, 1, size).clone()
+    active = torch.arange(mean.shape[0], device=x.device)
+    for _ in range(max_iter):
+        m = mean.index_select(0, active)
+        points = x.index_select(0, active)
+        w = weights.index_select(0, active)
+        lam = _lambda_x(m, c, keepdim=True, dim=dim)
+        logs = _logmap(m, points, c, dim=dim, precision=precision)
+        u = (w * logs).sum(dim=reducedim, keepdim=True)
+        unorm = lam * u.norm(dim=dim, keepdim=True)
+        # the Hessian of d^2 / 2 is bounded by z coth(z), z = sqrt(c) d,
+        # the step is scaled not to overshoot for spread points
+        z = (c ** 0.5 * lam * logs.norm(dim=dim, keepdim=True)).clamp_min(MIN_NORM)
+        u = u / (w * z / tanh(z)).sum(dim=reducedim, keepdim=True)
+        todo = unorm.view(-1) > tol
+        if not todo.any():
+            break
+        active = active[todo]
+        new_mean = _project(_expmap(m[todo], u[todo], c, dim=dim), c, dim=dim)
+        mean.index_copy_(0, active, new_mean)
+    mean = mean.view(batch_shape + (1, size))
+    if not keepdim:
+        mean = mean.squeeze(reducedim)
+    return mean
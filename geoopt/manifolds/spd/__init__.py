@@ -1,49 +1,184 @@
+import weakref
 import torch
 from ..base import Manifold
+from ...utils import make_tuple, strip_tuple
 from .multi import *
 import geoopt
 
-__all__ = ["SymmetricPositiveDefinite"]
+__all__ = [
+    "SymmetricPositiveDefinite",
+    "LogEuclideanSymmetricPositiveDefinite",
+    "BuresWassersteinSymmetricPositiveDefinite",
+]
+
+
+class _Factorization(object):
+    """Cholesky factor of a batch of SPD matrices, inverses are applied with solves"""
+
+    __slots__ = ("l",)
+
+    def __init__(self, x):
+        self.l = torch.cholesky(x)
+
+    def whiten_left(self, u):
+        # :math:`L^{-1} U`
+        return torch.triangular_solve(u, self.l, upper=False).solution
+
+    def whiten(self, u):
+        # :math:`L^{-1} U L^{-\top}` with two triangular solves
+        return multitrans(self.whiten_left(multitrans(self.whiten_left(u))))
 
 
 class SymmetricPositiveDefinite(Manifold):
-    r"""The manifold of symmetric positive definite matrices."""
+    r"""The manifold of symmetric positive definite matrices.
+
+    Parameters
+    ----------
+    wmin : float
+        smallest eigenvalue kept by :meth:`projx`
+    wmax : float
+        largest eigenvalue kept by :meth:`projx`
+    requires_grad : bool
+        use differentiable solvers
+    method : str
+        matrix functions backend, ``"eig"`` for symmetric eigendecompositions or
+        ``"iterative"`` for matrix product iterations (Newton-Schulz and Pade),
+        :meth:`dist` uses an eigendecomposition with both
+    tol : float
+        tolerance of the iterative backend, machine precision dependent by default
+    """
 
     name = "Symmetrc Positive Definite"
     ndim = 2
     reversible = False
 
-    def __init__(self, wmin=1e-8, wmax=1e8, requires_grad=False):
+    def __init__(
+        self, wmin=1e-8, wmax=1e8, requires_grad=False, method="eig", tol=None
+    ):
+        super().__init__()
+        if method not in METHODS:
+            raise ValueError(
+                "Unknown method {}, should be one of {}".format(method, METHODS)
+            )
+        self._factorizations = dict()
         self.wmin = wmin
         self.wmax = wmax
         self.requires_grad = requires_grad
+        self.method = method
+        self.tol = tol
 
-    def _check_point_on_manifold(self, x, *, atol=1e-5, rtol=1e-5):
-        ok = torch.allclose(x, multitrans(x), atol=atol, rtol=rtol)
-        if not ok:
-            return (
-                False,
-                "The matrix is not symmetric with atol={}, rtol={}".format(atol, rtols),
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_factorizations"] = dict()
+        return state
+
+    def _factorize(self, x):
+        r"""
+        Cholesky factorization of :math:`x`, reused while :math:`x` is alive and is not
+        updated in-place. Nothing is cached while :math:`x` is differentiated.
+        """
+        if x.requires_grad and torch.is_grad_enabled():
+            return _Factorization(x)
+        key = id(x)
+        cached = self._factorizations.get(key)
+        if cached is not None:
+            ref, version, factorization = cached
+            if ref() is x and version == self._version_key(x):
+                return factorization
+        factorization = _Factorization(x)
+        cache = self._factorizations
+        ref = weakref.ref(x, lambda _: cache.pop(key, None))
+        cache[key] = (ref, self._version_key(x), factorization)
+        return factorization
+
+    @staticmethod
+    def _version_key(x):
+        # in-place updates bump the version counter, ``set_`` changes the storage
+        return x._version, x.data_ptr(), x.shape, x.stride()
+
+    def clear_cache(self):
+        """
+        Drop the cached Cholesky factors.
+
+        Updates through ``x.data`` do not bump the version counter of ``x``,
+        the cache has to be cleared after them.
+        """
+        self._factorizations.clear()
+
+    def _eigenvectors(self, *tensors):
+        # eigenvalues of ``torch.symeig`` are differentiable only with eigenvectors
+        return self.requires_grad or (
+            torch.is_grad_enabled() and any(t.requires_grad for t in tensors)
+        )
+
+    def batch_check_point_on_manifold(self, x, *, atol=1e-5, rtol=1e-5):
+        """
+        Check every matrix of a batch separately
+
+        Parameters
+        ----------
+        x : tensor
+            matrices of shape ``(..., n, n)``
+        atol : float
+            absolute tolerance for the symmetry check
+        rtol : float
+            relative tolerance for the symmetry check
+
+        Returns
+        -------
+        tuple
+            boolean tensor of shape ``(...)`` marking valid matrices and a reason
+            summarizing the failures, ``None`` if all matrices are valid
+
+        Notes
+        -----
+        Eigenvalues are checked to be greater than ``wmin`` with a batched Cholesky
+        factorization of :math:`x - w_{min} I` reporting failures in a mask, a
+        symmetric eigendecomposition is used if it is not available.
+        """
+        xt = multitrans(x)
+        symmetric = ((x - xt).abs() <= atol + rtol * xt.abs()).all(-1).all(-1)
+        definite = self._positive_definite_mask(x)
+        ok = symmetric & definite
+        reasons = []
+        if not bool(symmetric.all()):
+            reasons.append(
+                "{} of {} matrices are not symmetric with atol={}, rtol={}".format(
+                    int((~symmetric).sum()), symmetric.numel(), atol, rtol
+                )
             )
-        w, _ = torch.symeig(x)
-        if not all(w > self.wmin):
-            return (
-                False,
-                "The matrix is not positive definite with atol={}".format(self.wmin),
+        if not bool(definite.all()):
+            reasons.append(
+                "{} of {} matrices are not positive definite with wmin={}".format(
+                    int((~definite).sum()), definite.numel(), self.wmin
+                )
             )
-        return True, None
+        return ok, "; ".join(reasons) if reasons else None
+
+    def _positive_definite_mask(self, x):
+        wmin = self.wmin or 0.0
+        cholesky_ex = getattr(getattr(torch, "linalg", None), "cholesky_ex", None)
+        if cholesky_ex is not None:
+            eye = torch.eye(x.shape[-1], dtype=x.dtype, device=x.device)
+            return cholesky_ex(x - wmin * eye).info == 0
+        w, _ = torch.symeig(x)
+        return (w > wmin).all(-1)
+
+    def _check_point_on_manifold(self, x, *, atol=1e-5, rtol=1e-5):
+        ok, reason = self.batch_check_point_on_manifold(x, atol=atol, rtol=rtol)
+        return bool(ok.all()), reason
 
     def _check_vector_on_tangent(self, x, u, *, atol=1e-5, rtol=1e-5):
-        ok = torch.allclose(x, multitrans(x), atol=atol, rtol=rtol)
+        ok = torch.allclose(u, multitrans(u), atol=atol, rtol=rtol)
         if not ok:
             return (
                 False,
-                "The matrix is not symmetric with atol={}, rtol={}".format(atol, rtols),
+                "The matrix is not symmetric with atol={}, rtol={}".format(atol, rtol),
             )
         return True, None
 
     def _inner_no_grad(self, x, u, v=None, *, keepdim=False):
-        l = torch.cholesky(x)
+        l = self._factorize(x).l
         x_inv_u = torch.cholesky_solve(u, l)
         if v is None:
             x_inv_v = x_inv_u
@@ -73,23 +208,23 @@ class SymmetricPositiveDefinite(Manifold):
 
     def projx(self, x):
         # symmetrize it and then clamp its eigenvalues
-        return multispdproj(x, wmin=self.wmin, wmax=self.wmax)
+        return multispdproj(
+            x, wmin=self.wmin, wmax=self.wmax, method=self.method, tol=self.tol
+        )
 
     def expmap(self, x, u):
-        l = torch.cholesky(x)
-        l_inv = torch.inverse(l)
-        a = multiAXAt(l_inv, u)
-        expa = multiexp(a)
-        expx_y = multiAXAt(l, expa)
+        factorization = self._factorize(x)
+        a = factorization.whiten(u)
+        expa = multiexp(a, method=self.method)
+        expx_y = multiAXAt(factorization.l, expa)
 
         return expx_y
 
     def logmap(self, x, y):
-        l = torch.cholesky(x)
-        l_inv = torch.inverse(l)
-        a = multiAXAt(l_inv, y)
-        loga = multilog(a)
-        logx_y = multiAXAt(l, loga)
+        factorization = self._factorize(x)
+        a = factorization.whiten(y)
+        loga = multilog(a, method=self.method, tol=self.tol)
+        logx_y = multiAXAt(factorization.l, loga)
 
         return logx_y
 
@@ -97,41 +232,267 @@ class SymmetricPositiveDefinite(Manifold):
         # need to compute :math:`X + U + \frac{1}{2} U X^{-1} U`
         # the product is computed as:
         #       U X^{-1} U = U (L L^t)^{-1} U = (L^{-1} U)^t (L^{-1} U)
-        l = torch.cholesky(x)
-        l_inv_u = torch.triangular_solve(u, l, upper=False).solution
+        l_inv_u = self._factorize(x).whiten_left(u)
         u_xinv_u = torch.matmul(multitrans(l_inv_u), l_inv_u)
         y = x + u + 0.5 * u_xinv_u
 
         return y
 
     def dist(self, x, y, *, keepdim=False, squared=False):
-        l = torch.cholesky(x)
-        l_inv = torch.inverse(l)
-        a = multiAXAt(l_inv, y)
-        w, _ = torch.symeig(a, eigenvectors=self.requires_grad)
+        a = self._factorize(x).whiten(y)
+        w, _ = torch.symeig(a, eigenvectors=self._eigenvectors(x, y))
         w.data.clamp_(min=self.wmin, max=self.wmax)
         sq_dist = w.log().pow(2).sum(-1, keepdim=keepdim)
 
         return sq_dist if squared else torch.sqrt(sq_dist)
 
-    # TODO(ccruceru): Ignoring the :py:`more` args as I'm still note sure what
-    # the convention is about applying the member functions on stacked values.
+    def _frechet_mean_init(self, x, weights):
+        # the log-euclidean mean
+        logs = multilog(x, method=self.method, tol=self.tol)
+        return multiexp((weights[..., None, None] * logs).sum(-3), method=self.method)
+
+    def _transp(self, factorization, s, v, *more):
+        # :math:`E v E^\top` with :math:`E = L S L^{-1}`
+        ls = factorization.l @ s
+        result = tuple(multiAXAt(ls, factorization.whiten(vec)) for vec in (v,) + more)
+        return strip_tuple(result)
 
     def transp(self, x, y, v, *more):
-        return v
+        r"""
+        Parallel transport for the affine-invariant metric
 
-    def ptransp(self, x, y, v):
-        r"""The actual parallel transport. Use it as follows in optimizers:
+        .. math::
 
-        .. py::
-            spd = geoopt.SymmetricPositiveDefinite()
-            spd.transp = spd.ptransp
+            \Gamma_{x\to y}(v) = E v E^\top, \quad E = (y x^{-1})^{1/2} = L S L^{-1}
+
+        where :math:`x = L L^\top` and :math:`S = (L^{-1} y L^{-\top})^{1/2}`
         """
-        # TODO(ccruceru): Requires matrix square root. See
-        # https://github.com/pytorch/pytorch/issues/9983.
-        # TODO(ccruceru): Consider if the combined {expmap,retr}_transp methods
-        # do improve if we instead use the real parallel transport function.
-        raise NotImplementedError
+        factorization = self._factorize(x)
+        s = multisqrt(factorization.whiten(y), method=self.method, tol=self.tol)
+        return self._transp(factorization, s, v, *more)
+
+    ptransp = transp
+
+    def expmap_transp(self, x, u, v, *more):
+        # :math:`L^{-1} y L^{-\top} = \exp(a)`, :math:`S = \exp(a / 2)`
+        if self.method != "eig":
+            return super().expmap_transp(x, u, v, *more)
+        factorization = self._factorize(x)
+        w, q = torch.symeig(factorization.whiten(u), eigenvectors=True)
+        y = multiAXAt(factorization.l, multihgie(w.exp(), q))
+        s = multihgie((0.5 * w).exp(), q)
+        vs = self._transp(factorization, s, v, *more)
+        return (y,) + make_tuple(vs)
+
+    def retr_transp(self, x, u, v, *more):
+        # :math:`L^{-1} y L^{-\top} = I + a + a^2 / 2` shares eigenvectors with :math:`a`
+        if self.method != "eig":
+            return super().retr_transp(x, u, v, *more)
+        factorization = self._factorize(x)
+        w, q = torch.symeig(factorization.whiten(u), eigenvectors=True)
+        w = 1 + w + 0.5 * w.pow(2)
+        y = multiAXAt(factorization.l, multihgie(w, q))
+        s = multihgie(w.sqrt(), q)
+        vs = self._transp(factorization, s, v, *more)
+        return (y,) + make_tuple(vs)
+
+    def transp_follow_expmap(self, x, u, v, *more):
+        return strip_tuple(self.expmap_transp(x, u, v, *more)[1:])
+
+    def transp_follow_retr(self, x, u, v, *more):
+        return strip_tuple(self.retr_transp(x, u, v, *more)[1:])
 
     def egrad2rgrad(self, x, u):
         return multiAXAt(x, multisym(u))
+
+
+class LogEuclideanSymmetricPositiveDefinite(SymmetricPositiveDefinite):
+    r"""
+    The manifold of symmetric positive definite matrices with log-Euclidean metric
+
+    .. math::
+
+        d(x, y) = \|\log x - \log y\|_F
+
+    Notes
+    -----
+    The matrix logarithm is an isometry onto the flat space of symmetric matrices.
+    :meth:`embed` precomputes it once, after that distances are plain Euclidean
+    distances between vectors and :meth:`pairwise_dist` is a single matrix product.
+    The differential of the logarithm needs an eigendecomposition, so :meth:`inner`,
+    :meth:`expmap`, :meth:`logmap`, :meth:`transp` and :meth:`egrad2rgrad` use one
+    even with ``method="iterative"``.
+    """
+
+    name = "Symmetric Positive Definite(log-euclidean)"
+
+    def _log(self, x):
+        return multilog(x, method=self.method, tol=self.tol)
+
+    def _dlog(self, x):
+        # eigendecomposition of x and the kernel of the differential of log
+        w, v = torch.symeig(x, eigenvectors=True)
+        w.data.clamp_(min=self.wmin, max=self.wmax)
+        return w, v, multidivdiff(w, torch.log, torch.reciprocal)
+
+    def inner(self, x, u, v=None, *, keepdim=False):
+        _, q, k = self._dlog(x)
+        dlog_u = k * (q.transpose(-1, -2) @ u @ q)
+        if v is None:
+            dlog_v = dlog_u
+        else:
+            dlog_v = k * (q.transpose(-1, -2) @ v @ q)
+        return (dlog_u * dlog_v).sum((-1, -2), keepdim=keepdim)
+
+    def expmap(self, x, u):
+        w, q, k = self._dlog(x)
+        return multiexp(
+            multihgie(w.log(), q) + multikernelapply(q, k, u), method=self.method
+        )
+
+    retr = expmap
+
+    def logmap(self, x, y):
+        w, q, k = self._dlog(x)
+        logy = multilog(y, method=self.method, tol=self.tol)
+        return multikernelapply(q, k.reciprocal(), logy - multihgie(w.log(), q))
+
+    def dist(self, x, y, *, keepdim=False, squared=False):
+        sq_dist = (self._log(x) - self._log(y)).pow(2).sum((-1, -2), keepdim=keepdim)
+        return sq_dist if squared else torch.sqrt(sq_dist)
+
+    def transp(self, x, y, v, *more):
+        _, qx, kx = self._dlog(x)
+        _, qy, ky = self._dlog(y)
+        result = tuple(
+            multikernelapply(qy, ky.reciprocal(), multikernelapply(qx, kx, vec))
+            for vec in (v,) + more
+        )
+        return strip_tuple(result)
+
+    ptransp = transp
+
+    def expmap_transp(self, x, u, v, *more):
+        y = self.expmap(x, u)
+        vs = self.transp(x, y, v, *more)
+        return (y,) + make_tuple(vs)
+
+    retr_transp = expmap_transp
+
+    def egrad2rgrad(self, x, u):
+        _, q, k = self._dlog(x)
+        return multikernelapply(q, k.pow(-2), multisym(u))
+
+    def embed(self, x):
+        """
+        Vectors with Euclidean distances equal to the manifold distances
+
+        Parameters
+        ----------
+        x : tensor
+            points of shape ``(..., n, n)``
+
+        Returns
+        -------
+        tensor
+            flattened matrix logarithms of shape ``(..., n * n)``
+        """
+        return self._log(x).flatten(-2)
+
+    def pairwise_dist(self, x, y):
+        """
+        Distances between all pairs of points
+
+        Parameters
+        ----------
+        x : tensor
+            points of shape ``(..., N, n, n)``
+        y : tensor
+            points of shape ``(..., M, n, n)``
+
+        Returns
+        -------
+        tensor
+            distance matrix of shape ``(..., N, M)``
+        """
+        a = self.embed(x)
+        b = self.embed(y)
+        sq_dist = (
+            a.pow(2).sum(-1)[..., :, None]
+            + b.pow(2).sum(-1)[..., None, :]
+            - 2 * a @ b.transpose(-1, -2)
+        )
+        return sq_dist.clamp_min(0).sqrt()
+
+
+class BuresWassersteinSymmetricPositiveDefinite(SymmetricPositiveDefinite):
+    r"""
+    The manifold of symmetric positive definite matrices with Bures-Wasserstein metric
+
+    .. math::
+
+        d(x, y)^2 = \operatorname{tr}x + \operatorname{tr}y
+            - 2\operatorname{tr}(x^{1/2} y x^{1/2})^{1/2}
+
+    Notes
+    -----
+    This is the 2-Wasserstein distance between centered Gaussians with covariances
+    :math:`x` and :math:`y`. Maps need a single Lyapunov solve or matrix square root.
+    Only the identity vector transport :meth:`transp` is provided, the parallel
+    transport :meth:`ptransp` is not implemented. The Lyapunov solve and the square
+    root of :math:`x` in :meth:`inner`, :meth:`expmap`, :meth:`logmap` and
+    :meth:`dist` use eigendecompositions even with ``method="iterative"``.
+    """
+
+    name = "Symmetric Positive Definite(bures-wasserstein)"
+
+    def _sqrt(self, x):
+        w, q = torch.symeig(x, eigenvectors=True)
+        w.data.clamp_(min=self.wmin, max=self.wmax)
+        w = w.sqrt()
+        return multihgie(w, q), multihgie(w.reciprocal(), q)
+
+    def inner(self, x, u, v=None, *, keepdim=False):
+        # :math:`\frac{1}{2}\operatorname{tr}(L_x[u] v)`, :math:`x L + L x = u`
+        if v is None:
+            v = u
+        return 0.5 * (multilyap(x, u) * v).sum((-1, -2), keepdim=keepdim)
+
+    def expmap(self, x, u):
+        l = multilyap(x, u)
+        return x + u + l @ x @ l
+
+    retr = expmap
+
+    def logmap(self, x, y):
+        # :math:`(x y)^{1/2} + (y x)^{1/2} - 2 x`
+        s, s_inv = self._sqrt(x)
+        xy = s @ multisqrt(s @ y @ s, method=self.method, tol=self.tol) @ s_inv
+        return xy + multitrans(xy) - 2 * x
+
+    def dist(self, x, y, *, keepdim=False, squared=False):
+        s, _ = self._sqrt(x)
+        w, _ = torch.symeig(multisym(s @ y @ s), eigenvectors=self._eigenvectors(x, y))
+        sq_dist = multitrace(x) + multitrace(y) - 2 * w.clamp_min(0).sqrt().sum(-1)
+        sq_dist = sq_dist.clamp_min(0)
+        if keepdim:
+            sq_dist = sq_dist[..., None, None]
+        return sq_dist if squared else torch.sqrt(sq_dist)
+
+    def transp(self, x, y, v, *more):
+        return strip_tuple((v,) + more)
+
+    def ptransp(self, x, y, v):
+        raise NotImplementedError(
+            "Parallel transport is not implemented for the Bures-Wasserstein metric, "
+            "use the identity vector transport `transp` instead"
+        )
+
+    def expmap_transp(self, x, u, v, *more):
+        return (self.expmap(x, u), v) + more
+
+    retr_transp = expmap_transp
+
+    def egrad2rgrad(self, x, u):
+        xg = x @ multisym(u)
+        return 2 * (xg + multitrans(xg))
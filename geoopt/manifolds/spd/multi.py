@@ -1,5 +1,9 @@
+import warnings
+import numpy as np
 import torch
 
+METHODS = ("eig", "iterative")
+
 
 def multitrans(X):
     r"""Returns the tranpose of matrices stacked in an (...,n,n)-shaped array.
@@ -40,34 +44,239 @@ def multisymapply(X, f, *, wmin=None, wmax=None):
     return X_new
 
 
-def multispdproj(X, *, wmin=None, wmax=None):
+def multispdproj(X, *, wmin=None, wmax=None, method="eig", tol=None, max_iter=100):
     r"""Projects a batch of matrices onto the space of SPD matrices."""
     if not wmin and not wmax:
         raise ValueError("At least one of `wmin` and `wmax` must be given.")
+    _check_method(method)
+    if method == "iterative":
+        # eigenvalue clipping with the matrix absolute value
+        # :math:`\max(w, a) = (w + a + |w - a|) / 2`
+        X = multisym(X)
+        eye = _eye_like(X)
+        if wmin:
+            shifted = X - wmin * eye
+            X = 0.5 * (X + wmin * eye + _multiabs(shifted, tol=tol, max_iter=max_iter))
+        if wmax:
+            # frobenius norm bounds the eigenvalues, nothing to clip if it is small
+            shifted = wmax * eye - X
+            clipped = 0.5 * (
+                X + wmax * eye - _multiabs(shifted, tol=tol, max_iter=max_iter)
+            )
+            X = torch.where(_frobenius(X) > wmax, clipped, X)
+        return X
 
     return multisymapply(multisym(X), lambda W: W, wmin=wmin, wmax=wmax)
 
 
-def multilog(X, *, wmin=None, wmax=None):
+def multilog(X, *, wmin=None, wmax=None, method="eig", tol=None, max_iter=100):
     r"""Computes the matrix-logarithm of several positive definite matrices at
     once.
+
+    The iterative method takes Newton-Schulz square roots and 8 linear solves.
     """
+    _check_method(method)
+    if method == "iterative":
+        return _multilog_pade(X, tol=tol, max_iter=max_iter)
     return multisymapply(X, torch.log, wmin=wmin, wmax=wmax)
 
 
-def multiexp(X, *, wmin=None, wmax=None):
+def multiexp(X, *, wmin=None, wmax=None, method="eig", tol=None, max_iter=100):
     r"""Computes the matrix-exponential of several symmetric matrices at once.
+
+    The iterative method is scaling and squaring with one linear solve, it is not
+    iterated to a tolerance, ``tol`` and ``max_iter`` are accepted for uniformity.
     """
+    _check_method(method)
+    if method == "iterative":
+        return _multiexp_pade(X)
     return multisymapply(X, torch.exp, wmin=wmin, wmax=wmax)
 
 
-def multisqrt(X, *, wmin=None, wmax=None):
+def multisqrt(X, *, wmin=None, wmax=None, method="eig", tol=None, max_iter=100):
     r"""Computes the matrix square root of several positive definite matrices at
     once.
     """
+    _check_method(method)
+    if method == "iterative":
+        return multisqrtinv_newton_schulz(X, tol=tol, max_iter=max_iter)[0]
     return multisymapply(X, torch.sqrt, wmin=wmin, wmax=wmax)
 
 
+def multisqrtinv(X, *, wmin=None, wmax=None, method="eig", tol=None, max_iter=100):
+    r"""Computes the inverse matrix square root of several positive definite
+    matrices at once.
+    """
+    _check_method(method)
+    if method == "iterative":
+        return multisqrtinv_newton_schulz(X, tol=tol, max_iter=max_iter)[1]
+    return multisymapply(X, lambda W: W.rsqrt(), wmin=wmin, wmax=wmax)
+
+
 def multiAXAt(A, X):
     r"""Computes the product :math:`A X A^\top` for several matrices at once."""
-    return torch.einsum("...ij,...jk,...lk->...il", A, X, A)
+    return A @ X @ A.transpose(-1, -2)
+
+
+def multidivdiff(W, f, df):
+    r"""First divided differences :math:`(f(w_i) - f(w_j)) / (w_i - w_j)` of stacked
+    eigenvalues, :math:`f'` at the midpoint is used for (nearly) equal eigenvalues.
+    """
+    wi, wj = W[..., :, None], W[..., None, :]
+    fw = f(W)
+    den = wi - wj
+    close = den.abs() <= torch.finfo(W.dtype).eps ** 0.5 * (wi.abs() + wj.abs())
+    den = torch.where(close, torch.ones_like(den), den)
+    diff = (fw[..., :, None] - fw[..., None, :]) / den
+    return torch.where(close, df(0.5 * (wi + wj)), diff)
+
+
+def multikernelapply(V, K, U):
+    r"""Computes :math:`V (K \circ V^\top U V) V^\top` for stacked matrices."""
+    return V @ (K * (V.transpose(-1, -2) @ U @ V)) @ V.transpose(-1, -2)
+
+
+def multidiffapply(X, U, f, df, *, wmin=None, wmax=None):
+    r"""Computes the directional derivative :math:`Df(X)[U]` of an analytic function
+    for stacked symmetric matrices via the Daleckii-Krein formula.
+    """
+    W, V = torch.symeig(X, eigenvectors=True)
+    if wmin or wmax:
+        W.data.clamp_(min=wmin, max=wmax)
+    return multikernelapply(V, multidivdiff(W, f, df), U)
+
+
+def multilyap(X, U):
+    r"""Solves the Lyapunov equation :math:`X L + L X = U` for stacked symmetric
+    positive definite :math:`X` with an eigendecomposition of :math:`X`.
+    """
+    W, V = torch.symeig(X, eigenvectors=True)
+    return multikernelapply(V, 1 / (W[..., :, None] + W[..., None, :]), U)
+
+
+def _check_method(method):
+    if method not in METHODS:
+        raise ValueError(
+            "Unknown method {}, should be one of {}".format(method, METHODS)
+        )
+
+
+def _eye_like(X):
+    return torch.eye(X.shape[-1], dtype=X.dtype, device=X.device).expand_as(X)
+
+
+def _frobenius(X):
+    return X.pow(2).sum((-1, -2), keepdim=True).sqrt()
+
+
+def _solve(A, B):
+    # :math:`A^{-1} B`, ``torch.solve`` is deprecated in favour of ``torch.linalg``
+    solve = getattr(getattr(torch, "linalg", None), "solve", None)
+    if solve is None:
+        return torch.solve(B, A)[0]
+    return solve(A, B)
+
+
+def _warn_not_converged(name, max_iter):
+    warnings.warn(
+        "{} did not converge in {} iterations, the result may be inaccurate".format(
+            name, max_iter
+        ),
+        RuntimeWarning,
+    )
+
+
+def multisqrtinv_newton_schulz(X, *, tol=None, max_iter=100):
+    r"""Computes :math:`X^{1/2}` and :math:`X^{-1/2}` of stacked positive definite
+    matrices with the coupled Newton-Schulz iteration, using matrix products only.
+
+    The iteration stops once :math:`\|I - Z_k Y_k\|_F / \sqrt{n}` is below ``tol``
+    for all matrices, by default the square root of the machine epsilon as the
+    convergence is quadratic. Ill-conditioned matrices need more iterations,
+    a :class:`RuntimeWarning` is issued if ``max_iter`` is not enough.
+    """
+    if tol is None:
+        tol = torch.finfo(X.dtype).eps ** 0.5
+    norm = _frobenius(X).clamp_min(torch.finfo(X.dtype).tiny)
+    eye = _eye_like(X)
+    y = X / norm
+    z = eye
+    for _ in range(max_iter):
+        residual = eye - z @ y
+        t = eye + 0.5 * residual
+        y = y @ t
+        z = t @ z
+        if bool((_frobenius(residual) <= tol * X.shape[-1] ** 0.5).all()):
+            break
+    else:
+        _warn_not_converged("Newton-Schulz square root", max_iter)
+    return y * norm.sqrt(), z / norm.sqrt()
+
+
+def _multiabs(X, *, tol=None, max_iter=100):
+    # :math:`|X| = X \operatorname{sign}(X)` with Newton-Schulz for the sign
+    if tol is None:
+        tol = torch.finfo(X.dtype).eps ** 0.5
+    eye = _eye_like(X)
+    sign = X / _frobenius(X).clamp_min(torch.finfo(X.dtype).tiny)
+    for _ in range(max_iter):
+        residual = eye - sign @ sign
+        sign = sign @ (eye + 0.5 * residual)
+        if bool((_frobenius(residual) <= tol * X.shape[-1] ** 0.5).all()):
+            break
+    else:
+        _warn_not_converged("Newton-Schulz matrix sign", max_iter)
+    return multisym(X @ sign)
+
+
+def _pade_exp_coefficients(m):
+    c = [1.0]
+    for k in range(1, m + 1):
+        c.append(c[-1] * (m - k + 1) / (k * (2 * m - k + 1)))
+    return c
+
+
+_PADE_EXP = _pade_exp_coefficients(6)
+_PADE_LOG_NODES, _PADE_LOG_WEIGHTS = np.polynomial.legendre.leggauss(8)
+
+
+def _multiexp_pade(X):
+    # scaling and squaring with the [6/6] Pade approximant, the scaled matrices
+    # have norm at most 1/2
+    norm = _frobenius(X)
+    s = torch.ceil(torch.log2(norm / 0.5)).clamp_min(0)
+    X = X / 2 ** s
+    eye = _eye_like(X)
+    c = _PADE_EXP
+    x2 = X @ X
+    x4 = x2 @ x2
+    u = X @ (c[1] * eye + c[3] * x2 + c[5] * x4)
+    v = c[0] * eye + c[2] * x2 + c[4] * x4 + c[6] * x4 @ x2
+    r = _solve(v - u, v + u)
+    for i in range(int(s.max()) if s.numel() else 0):
+        r = torch.where(s > i, r @ r, r)
+    return multisym(r)
+
+
+def _multilog_pade(X, *, tol=None, max_iter=100):
+    # inverse scaling and squaring: square roots until :math:`\|X - I\|_F \le 1/4`,
+    # then the [8/8] Pade approximant of :math:`\log(I + E)` in partial fractions
+    eye = _eye_like(X)
+    k = torch.zeros_like(_frobenius(X))
+    # every square root halves the logarithm, 64 of them are enough for any
+    # finite matrix
+    for _ in range(64):
+        todo = _frobenius(X - eye) > 0.25
+        if not bool(todo.any()):
+            break
+        root, _ = multisqrtinv_newton_schulz(X, tol=tol, max_iter=max_iter)
+        X = torch.where(todo, root, X)
+        k = k + todo.type_as(k)
+    else:
+        _warn_not_converged("Inverse scaling and squaring", 64)
+    e = X - eye
+    r = torch.zeros_like(e)
+    for node, weight in zip(_PADE_LOG_NODES, _PADE_LOG_WEIGHTS):
+        t = 0.5 * (node + 1)
+        r = r + 0.5 * weight * _solve(eye + t * e, e)
+    return multisym(r * 2 ** k)
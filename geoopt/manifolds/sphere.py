@@ -164,6 +164,13 @@ class Sphere(Manifold):
 
     egrad2rgrad = proju
 
+    def _frechet_mean_init(self, x, weights):
+        # the normalized euclidean mean, heaviest point if it degenerates
+        mean = (weights[..., None] * x).sum(-2)
+        fallback = super()._frechet_mean_init(x, weights)
+        cond = mean.norm(dim=-1, keepdim=True) > EPS[mean.dtype]
+        return torch.where(cond, self.projx(mean), fallback)
+
     def _configure_manifold_complement(self, complement):
         Q, _ = geoopt.linalg.batch_linalg.qr(complement)
         P = -Q @ Q.transpose(-1, -2)
@@ -1,2 +1,3 @@
 from .rsgd import RiemannianSGD
 from .radam import RiemannianAdam
+from .lazy_radam import LazyRiemannianAdam
@@ -0,0 +1,109 @@
+import collections
+
+import torch
+
+from ..tensor import ManifoldParameter, ManifoldTensor
+
+
+class StackedGroup(object):
+    """
+    Parameters that can be updated as one stacked tensor
+
+    Parameters
+    ----------
+    manifold : :class:`geoopt.Manifold`
+        manifold shared by the parameters
+    points : list
+        parameters
+    concat : bool
+        concatenate parameters along the flattened batch dimension
+        instead of stacking them along a new one
+    """
+
+    def __init__(self, manifold, points, concat):
+        self.manifold = manifold
+        self.points = points
+        self.concat = concat
+
+    def stack(self, tensors):
+        if self.concat:
+            event_shape = self._event_shape()
+            return torch.cat([t.reshape((-1,) + event_shape) for t in tensors])
+        else:
+            return torch.stack(tensors)
+
+    def unstack(self, tensor):
+        if self.concat:
+            event_shape = self._event_shape()
+            sizes = [p.numel() // max(_numel(event_shape), 1) for p in self.points]
+            return [
+                t.reshape(p.shape) for t, p in zip(tensor.split(sizes), self.points)
+            ]
+        else:
+            return tensor.unbind(0)
+
+    def _event_shape(self):
+        point = self.points[0]
+        return point.shape[point.dim() - self.manifold.ndim :]
+
+
+def _numel(shape):
+    n = 1
+    for s in shape:
+        n *= s
+    return n
+
+
+def _can_concat(manifold):
+    # manifold buffers (e.g. curvature or subspace) may have batch dimensions,
+    # concatenation along batch is safe only if they do not
+    return all(buf.numel() == 1 for buf in manifold.buffers())
+
+
+def group_by_manifold(params, default_manifold, concat=False):
+    """
+    Group parameters with gradients that can be updated as one stacked tensor
+
+    Parameters
+    ----------
+    params : iterable
+        parameters to group
+    default_manifold : :class:`geoopt.Manifold`
+        manifold for parameters that are not :class:`geoopt.ManifoldParameter`
+    concat : bool
+        allow parameters with different batch shapes to be concatenated
+        along the batch dimension (if manifold permits)
+
+    Returns
+    -------
+    list
+        list of :class:`StackedGroup`, parameters in every group share
+        the manifold instance, dtype, device and shape (or manifold dimensions for
+        concatenated groups). Order of parameters is preserved.
+        Parameters with sparse gradients are left out
+    """
+    groups = collections.OrderedDict()
+    for point in params:
+        if point.grad is None or point.grad.is_sparse:
+            continue
+        if isinstance(point, (ManifoldParameter, ManifoldTensor)):
+            manifold = point.manifold
+        else:
+            manifold = default_manifold
+        concat_group = concat and _can_concat(manifold)
+        if concat_group:
+            shape = point.shape[point.dim() - manifold.ndim :]
+        else:
+            shape = point.shape
+        key = (id(manifold), concat_group, shape, point.dtype, point.device)
+        if key not in groups:
+            groups[key] = StackedGroup(manifold, [], concat_group)
+        groups[key].points.append(point)
+    return list(groups.values())
+
+
+def batch_view(values, like):
+    """
+    Reshape a 1d tensor of per-parameter values to broadcast with stacked parameters
+    """
+    return values.view((-1,) + (1,) * (like.dim() - 1))
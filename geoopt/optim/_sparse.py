@@ -0,0 +1,40 @@
+def sparse_rows(point, grad, manifold, optimizer_name):
+    """
+    Rows touched by a sparse gradient
+
+    Parameters
+    ----------
+    point : tensor
+        parameter of shape ``(rows, ...)``
+    grad : tensor
+        sparse gradient with one sparse dimension, e.g. from
+        :class:`torch.nn.Embedding` with ``sparse=True``
+    manifold : :class:`geoopt.Manifold`
+        manifold of the parameter
+    optimizer_name : str
+        name used in the error message
+
+    Returns
+    -------
+    rows, values : tensors
+        unique row indices and the dense gradient for these rows
+
+    Raises
+    ------
+    RuntimeError
+        if the manifold does not act on rows independently
+    """
+    # manifold buffers with batch dimensions would need to be gathered as well
+    row_wise = (
+        point.dim() - manifold.ndim >= 1
+        and grad.sparse_dim() == 1
+        and all(buf.numel() == 1 for buf in manifold.buffers())
+    )
+    if not row_wise:
+        raise RuntimeError(
+            "{} supports sparse gradients only for row-wise manifolds, got {}".format(
+                optimizer_name, manifold
+            )
+        )
+    grad = grad.coalesce()
+    return grad._indices()[0], grad._values()
@@ -0,0 +1,76 @@
+import torch
+
+from .radam import RiemannianAdam
+from ._sparse import sparse_rows
+
+__all__ = ["LazyRiemannianAdam"]
+
+
+class LazyRiemannianAdam(RiemannianAdam):
+    r"""Riemannian Adam with lazy moment updates for sparse gradients
+
+    The same as :class:`RiemannianAdam` for dense gradients. For sparse gradients
+    the moments of untouched rows are not decayed on every step. Instead,
+    every row remembers the last step it was updated at and the accumulated
+    decay :math:`\beta^k` for :math:`k` skipped steps is applied once
+    the row is touched again. Memory traffic per step is then proportional
+    to the number of active rows.
+
+    Parameters
+    ----------
+    params : iterable
+        iterable of parameters to optimize or dicts defining
+        parameter groups
+    lr : float (optional)
+        learning rate (default: 1e-3)
+    betas : Tuple[float, float] (optional)
+        coefficients used for computing
+        running averages of gradient and its square (default: (0.9, 0.999))
+    eps : float (optional)
+        term added to the denominator to improve
+        numerical stability (default: 1e-8)
+    weight_decay : float (optional)
+        weight decay (L2 penalty) (default: 0)
+    amsgrad : bool (optional)
+        whether to use the AMSGrad variant of this
+        algorithm from the paper `On the Convergence of Adam and Beyond`_
+        (default: False)
+    foreach : bool (optional)
+        update dense parameters that share a manifold instance, shape, dtype
+        and device as one stacked tensor (default: False)
+
+    Other Parameters
+    ----------------
+    stabilize : int
+        Stabilize parameters if they are off-manifold due to numerical
+        reasons every ``stabilize`` steps (default: ``None`` -- no stabilize)
+
+    Notes
+    -----
+    Untouched rows do not move, so their stored momentum stays in the right
+    tangent space. It is transported along with the row on its next update.
+
+
+    .. _On the Convergence of Adam and Beyond:
+        https://openreview.net/forum?id=ryQu7f-RZ
+
+    """
+
+    def _sparse_step_param(self, group, point, manifold):
+        betas = group["betas"]
+        state = self.state[point]
+        rows, _ = sparse_rows(point, point.grad, manifold, "Lazy Riemannian Adam")
+        if "last_step" in state:
+            # decay for the steps these rows were skipped at
+            skipped = state["step"] - state["last_step"][rows]
+            skipped = skipped.to(point.dtype).view((-1,) + (1,) * (point.dim() - 1))
+            for key, beta in (("exp_avg", betas[0]), ("exp_avg_sq", betas[1])):
+                buf = state[key]
+                buf.index_copy_(0, rows, buf[rows] * beta ** skipped)
+        super()._sparse_step_param(group, point, manifold)
+        if "last_step" not in state:
+            state["last_step"] = torch.zeros(
+                point.shape[0], dtype=torch.long, device=point.device
+            )
+        state["step"] += 1
+        state["last_step"][rows] = state["step"]
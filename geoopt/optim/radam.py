@@ -4,6 +4,8 @@ from .mixin import OptimMixin
 from ..tensor import ManifoldParameter, ManifoldTensor
 from ..manifolds import R
 from ..utils import copy_or_set_
+from ._foreach import group_by_manifold, batch_view
+from ._sparse import sparse_rows
 
 # in order not to create it at each iteration
 _default_manifold = R()
@@ -31,6 +33,9 @@ class RiemannianAdam(OptimMixin, torch.optim.Adam):
         whether to use the AMSGrad variant of this
         algorithm from the paper `On the Convergence of Adam and Beyond`_
         (default: False)
+    foreach : bool (optional)
+        update parameters that share a manifold instance, shape, dtype
+        and device as one stacked tensor (default: False)
 
     Other Parameters
     ----------------
@@ -38,12 +43,31 @@ class RiemannianAdam(OptimMixin, torch.optim.Adam):
         Stabilize parameters if they are off-manifold due to numerical
         reasons every ``stabilize`` steps (default: ``None`` -- no stabilize)
 
+    Notes
+    -----
+    With ``foreach=True`` the number of kernel launches per step scales with
+    the number of distinct manifolds rather than with the number of parameters.
+    This is beneficial for models with many small parameters.
+
+    Sparse gradients (e.g. from :class:`torch.nn.Embedding` with ``sparse=True``)
+    are supported for row-wise manifolds such as :class:`geoopt.PoincareBall`,
+    :class:`geoopt.Sphere` or :class:`geoopt.Euclidean`. Only rows present
+    in the gradient are updated and their moments decayed, the same
+    way as :class:`torch.optim.SparseAdam` does.
+
 
     .. _On the Convergence of Adam and Beyond:
         https://openreview.net/forum?id=ryQu7f-RZ
 
     """
 
+    def __init__(self, *args, foreach=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.defaults["foreach"] = foreach
+        for group in self.param_groups:
+            if group.get("foreach") is None:
+                group["foreach"] = foreach
+
     def step(self, closure=None):
         """Performs a single optimization step.
 
@@ -60,78 +84,199 @@ class RiemannianAdam(OptimMixin, torch.optim.Adam):
             for group in self.param_groups:
                 if "step" not in group:
                     group["step"] = 0
-                betas = group["betas"]
-                weight_decay = group["weight_decay"]
-                eps = group["eps"]
-                learning_rate = group["lr"]
-                amsgrad = group["amsgrad"]
-                for point in group["params"]:
-                    grad = point.grad
-                    if grad is None:
-                        continue
-                    if isinstance(point, (ManifoldParameter, ManifoldTensor)):
-                        manifold = point.manifold
-                    else:
-                        manifold = _default_manifold
-
-                    if grad.is_sparse:
-                        raise RuntimeError(
-                            "Riemannian Adam does not support sparse gradients yet (PR is welcome)"
-                        )
-
-                    state = self.state[point]
-
-                    # State initialization
-                    if len(state) == 0:
-                        state["step"] = 0
-                        # Exponential moving average of gradient values
-                        state["exp_avg"] = torch.zeros_like(point)
-                        # Exponential moving average of squared gradient values
-                        state["exp_avg_sq"] = torch.zeros_like(point)
-                        if amsgrad:
-                            # Maintains max of all exp. moving avg. of sq. grad. values
-                            state["max_exp_avg_sq"] = torch.zeros_like(point)
-                    # make local variables for easy access
-                    exp_avg = state["exp_avg"]
-                    exp_avg_sq = state["exp_avg_sq"]
-                    # actual step
-                    grad.add_(weight_decay, point)
-                    grad = manifold.egrad2rgrad(point, grad)
-                    exp_avg.mul_(betas[0]).add_(1 - betas[0], grad)
-                    exp_avg_sq.mul_(betas[1]).add_(
-                        1 - betas[1], manifold.inner(point, grad, keepdim=True)
-                    )
-                    if amsgrad:
-                        max_exp_avg_sq = state["max_exp_avg_sq"]
-                        # Maintains the maximum of all 2nd moment running avg. till now
-                        torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
-                        # Use the max. for normalizing running avg. of gradient
-                        denom = max_exp_avg_sq.sqrt().add_(eps)
-                    else:
-                        denom = exp_avg_sq.sqrt().add_(eps)
-                    group["step"] += 1
-                    bias_correction1 = 1 - betas[0] ** group["step"]
-                    bias_correction2 = 1 - betas[1] ** group["step"]
-                    step_size = (
-                        learning_rate * bias_correction2 ** 0.5 / bias_correction1
-                    )
-
-                    # copy the state, we need it for retraction
-                    # get the direction for ascend
-                    direction = exp_avg / denom
-                    # transport the exponential averaging to the new point
-                    new_point, exp_avg_new = manifold.retr_transp(
-                        point, -step_size * direction, exp_avg
-                    )
-                    # use copy only for user facing point
-                    copy_or_set_(point, new_point)
-                    exp_avg.set_(exp_avg_new)
-
-                    group["step"] += 1
+                if group["foreach"]:
+                    self._foreach_step_group(group)
+                else:
+                    self._step_group(group)
                 if self._stabilize is not None and group["step"] % self._stabilize == 0:
                     self.stabilize_group(group)
         return loss
 
+    def _step_group(self, group):
+        betas = group["betas"]
+        weight_decay = group["weight_decay"]
+        eps = group["eps"]
+        learning_rate = group["lr"]
+        amsgrad = group["amsgrad"]
+        for point in group["params"]:
+            grad = point.grad
+            if grad is None:
+                continue
+            if isinstance(point, (ManifoldParameter, ManifoldTensor)):
+                manifold = point.manifold
+            else:
+                manifold = _default_manifold
+
+            if grad.is_sparse:
+                self._sparse_step_param(group, point, manifold)
+                continue
+
+            state = self.state[point]
+
+            # State initialization
+            if len(state) == 0:
+                state["step"] = 0
+                # Exponential moving average of gradient values
+                state["exp_avg"] = torch.zeros_like(point)
+                # Exponential moving average of squared gradient values
+                state["exp_avg_sq"] = torch.zeros_like(point)
+                if amsgrad:
+                    # Maintains max of all exp. moving avg. of sq. grad. values
+                    state["max_exp_avg_sq"] = torch.zeros_like(point)
+            # make local variables for easy access
+            exp_avg = state["exp_avg"]
+            exp_avg_sq = state["exp_avg_sq"]
+            # actual step
+            grad.add_(weight_decay, point)
+            grad = manifold.egrad2rgrad(point, grad)
+            exp_avg.mul_(betas[0]).add_(1 - betas[0], grad)
+            exp_avg_sq.mul_(betas[1]).add_(
+                1 - betas[1], manifold.inner(point, grad, keepdim=True)
+            )
+            if amsgrad:
+                max_exp_avg_sq = state["max_exp_avg_sq"]
+                # Maintains the maximum of all 2nd moment running avg. till now
+                torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
+                # Use the max. for normalizing running avg. of gradient
+                denom = max_exp_avg_sq.sqrt().add_(eps)
+            else:
+                denom = exp_avg_sq.sqrt().add_(eps)
+            group["step"] += 1
+            bias_correction1 = 1 - betas[0] ** group["step"]
+            bias_correction2 = 1 - betas[1] ** group["step"]
+            step_size = learning_rate * bias_correction2 ** 0.5 / bias_correction1
+
+            # copy the state, we need it for retraction
+            # get the direction for ascend
+            direction = exp_avg / denom
+            # transport the exponential averaging to the new point
+            new_point, exp_avg_new = manifold.retr_transp(
+                point, -step_size * direction, exp_avg
+            )
+            # use copy only for user facing point
+            copy_or_set_(point, new_point)
+            exp_avg.set_(exp_avg_new)
+
+            group["step"] += 1
+
+    def _sparse_step_param(self, group, point, manifold):
+        # only rows present in the gradient are updated, moments of
+        # the other rows are kept as is (the same as in torch.optim.SparseAdam)
+        betas = group["betas"]
+        weight_decay = group["weight_decay"]
+        eps = group["eps"]
+        learning_rate = group["lr"]
+        amsgrad = group["amsgrad"]
+        rows, grad = sparse_rows(point, point.grad, manifold, "Riemannian Adam")
+        state = self.state[point]
+
+        # State initialization
+        if len(state) == 0:
+            state["step"] = 0
+            state["exp_avg"] = torch.zeros_like(point)
+            state["exp_avg_sq"] = torch.zeros_like(point)
+            if amsgrad:
+                state["max_exp_avg_sq"] = torch.zeros_like(point)
+        point_rows = point[rows]
+        exp_avg = state["exp_avg"][rows]
+        exp_avg_sq = state["exp_avg_sq"][rows]
+        # actual step on the selected rows
+        grad = grad.add(weight_decay, point_rows)
+        grad = manifold.egrad2rgrad(point_rows, grad)
+        exp_avg.mul_(betas[0]).add_(1 - betas[0], grad)
+        exp_avg_sq.mul_(betas[1]).add_(
+            1 - betas[1], manifold.inner(point_rows, grad, keepdim=True)
+        )
+        if amsgrad:
+            max_exp_avg_sq = state["max_exp_avg_sq"][rows]
+            torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
+            denom = max_exp_avg_sq.sqrt().add_(eps)
+            state["max_exp_avg_sq"].index_copy_(0, rows, max_exp_avg_sq)
+        else:
+            denom = exp_avg_sq.sqrt().add_(eps)
+        group["step"] += 1
+        bias_correction1 = 1 - betas[0] ** group["step"]
+        bias_correction2 = 1 - betas[1] ** group["step"]
+        step_size = learning_rate * bias_correction2 ** 0.5 / bias_correction1
+        direction = exp_avg / denom
+        new_point_rows, exp_avg_new = manifold.retr_transp(
+            point_rows, -step_size * direction, exp_avg
+        )
+        # scatter rows back
+        point.index_copy_(0, rows, new_point_rows)
+        state["exp_avg"].index_copy_(0, rows, exp_avg_new)
+        state["exp_avg_sq"].index_copy_(0, rows, exp_avg_sq)
+        group["step"] += 1
+
+    def _foreach_step_group(self, group):
+        betas = group["betas"]
+        weight_decay = group["weight_decay"]
+        eps = group["eps"]
+        learning_rate = group["lr"]
+        amsgrad = group["amsgrad"]
+        # step sizes are computed exactly as the sequential loop does
+        step_sizes = dict()
+        for point in group["params"]:
+            if point.grad is None:
+                continue
+            if point.grad.is_sparse:
+                if isinstance(point, (ManifoldParameter, ManifoldTensor)):
+                    manifold = point.manifold
+                else:
+                    manifold = _default_manifold
+                self._sparse_step_param(group, point, manifold)
+                continue
+            group["step"] += 1
+            bias_correction1 = 1 - betas[0] ** group["step"]
+            bias_correction2 = 1 - betas[1] ** group["step"]
+            step_sizes[point] = (
+                learning_rate * bias_correction2 ** 0.5 / bias_correction1
+            )
+            group["step"] += 1
+        for stacked in group_by_manifold(group["params"], _default_manifold):
+            manifold, points = stacked.manifold, stacked.points
+            for point in points:
+                state = self.state[point]
+                # State initialization
+                if len(state) == 0:
+                    state["step"] = 0
+                    state["exp_avg"] = torch.zeros_like(point)
+                    state["exp_avg_sq"] = torch.zeros_like(point)
+                    if amsgrad:
+                        state["max_exp_avg_sq"] = torch.zeros_like(point)
+            states = [self.state[point] for point in points]
+            # stack everything, the update below is the same as in the loop
+            point = stacked.stack(points)
+            grad = stacked.stack([p.grad for p in points])
+            exp_avg = stacked.stack([state["exp_avg"] for state in states])
+            exp_avg_sq = stacked.stack([state["exp_avg_sq"] for state in states])
+            grad.add_(weight_decay, point)
+            grad = manifold.egrad2rgrad(point, grad)
+            exp_avg.mul_(betas[0]).add_(1 - betas[0], grad)
+            exp_avg_sq.mul_(betas[1]).add_(
+                1 - betas[1], manifold.inner(point, grad, keepdim=True)
+            )
+            if amsgrad:
+                max_exp_avg_sq = stacked.stack(
+                    [state["max_exp_avg_sq"] for state in states]
+                )
+                torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
+                denom = max_exp_avg_sq.sqrt().add_(eps)
+            else:
+                denom = exp_avg_sq.sqrt().add_(eps)
+            step_size = point.new_tensor([step_sizes[p] for p in points])
+            direction = exp_avg / denom
+            new_point, exp_avg_new = manifold.retr_transp(
+                point, -batch_view(step_size, point) * direction, exp_avg
+            )
+            # scatter back to the parameters
+            for i, (p, state) in enumerate(zip(points, states)):
+                copy_or_set_(p, new_point[i])
+                state["exp_avg"].set_(exp_avg_new[i])
+                state["exp_avg_sq"].set_(exp_avg_sq[i])
+                if amsgrad:
+                    state["max_exp_avg_sq"].set_(max_exp_avg_sq[i])
+
     @torch.no_grad()
     def stabilize_group(self, group):
         for p in group["params"]:
@@ -3,6 +3,8 @@ from ..manifolds import R
 from ..tensor import ManifoldParameter, ManifoldTensor
 from .mixin import OptimMixin
 from ..utils import copy_or_set_
+from ._foreach import group_by_manifold
+from ._sparse import sparse_rows
 
 __all__ = ["RiemannianSGD"]
 
@@ -27,12 +29,27 @@ class RiemannianSGD(OptimMixin, torch.optim.Optimizer):
         dampening for momentum (default: 0)
     nesterov : bool (optional)
         enables Nesterov momentum (default: False)
+    foreach : bool (optional)
+        update parameters sharing a manifold at once (default: False)
 
     Other Parameters
     ----------------
     stabilize : int
         Stabilize parameters if they are off-manifold due to numerical
         reasons every ``stabilize`` steps (default: ``None`` -- no stabilize)
+
+    Notes
+    -----
+    With ``foreach=True`` parameters that share a manifold instance are
+    concatenated along the batch dimension, updated once and scattered back,
+    so step latency scales with the number of manifolds rather than
+    the number of tensors. If the manifold has batched buffers, only
+    parameters of the same shape are grouped.
+
+    Sparse gradients (e.g. from :class:`torch.nn.Embedding` with ``sparse=True``)
+    are supported for row-wise manifolds such as :class:`geoopt.PoincareBall`,
+    :class:`geoopt.Sphere` or :class:`geoopt.Euclidean`. Only rows present
+    in the gradient are updated, momentum of other rows is kept as is.
     """
 
     def __init__(
@@ -44,8 +61,11 @@ class RiemannianSGD(OptimMixin, torch.optim.Optimizer):
         weight_decay=0,
         nesterov=False,
         stabilize=None,
+        foreach=False,
     ):
-        if not all(isinstance(g, dict) and 'lr' in g for g in params) and lr < 0.0:
+        # params may be a generator (e.g. ``model.parameters()``), it is consumed below
+        params = list(params)
+        if not all(isinstance(g, dict) and "lr" in g for g in params) and lr < 0.0:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if momentum < 0.0:
             raise ValueError("Invalid momentum value: {}".format(momentum))
@@ -58,6 +78,7 @@ class RiemannianSGD(OptimMixin, torch.optim.Optimizer):
             dampening=dampening,
             weight_decay=weight_decay,
             nesterov=nesterov,
+            foreach=foreach,
         )
         if nesterov and (momentum <= 0 or dampening != 0):
             raise ValueError("Nesterov momentum requires a momentum and zero dampening")
@@ -79,51 +100,144 @@ class RiemannianSGD(OptimMixin, torch.optim.Optimizer):
             for group in self.param_groups:
                 if "step" not in group:
                     group["step"] = 0
-                weight_decay = group["weight_decay"]
-                momentum = group["momentum"]
-                dampening = group["dampening"]
-                nesterov = group["nesterov"]
-                learning_rate = group["lr"]
-                for point in group["params"]:
-                    grad = point.grad
-                    if grad is None:
-                        continue
-                    state = self.state[point]
-
-                    # State initialization
-                    if len(state) == 0:
-                        if momentum > 0:
-                            state["momentum_buffer"] = grad.clone()
-                    if isinstance(point, (ManifoldParameter, ManifoldTensor)):
-                        manifold = point.manifold
-                    else:
-                        manifold = _default_manifold
-
-                    grad.add_(weight_decay, point)
-                    grad = manifold.egrad2rgrad(point, grad)
-                    if momentum > 0:
-                        momentum_buffer = state["momentum_buffer"]
-                        momentum_buffer.mul_(momentum).add_(1 - dampening, grad)
-                        if nesterov:
-                            grad = grad.add_(momentum, momentum_buffer)
-                        else:
-                            grad = momentum_buffer
-                        # we have all the things projected
-                        new_point, new_momentum_buffer = manifold.retr_transp(
-                            point, -learning_rate * grad, momentum_buffer
-                        )
-                        momentum_buffer.set_(new_momentum_buffer)
-                        # use copy only for user facing point
-                        copy_or_set_(point, new_point)
-                    else:
-                        new_point = manifold.retr(point, -learning_rate * grad)
-                        copy_or_set_(point, new_point)
-
-                    group["step"] += 1
+                if group["foreach"]:
+                    self._foreach_step_group(group)
+                else:
+                    self._step_group(group)
                 if self._stabilize is not None and group["step"] % self._stabilize == 0:
                     self.stabilize_group(group)
         return loss
 
+    def _step_group(self, group):
+        weight_decay = group["weight_decay"]
+        momentum = group["momentum"]
+        dampening = group["dampening"]
+        nesterov = group["nesterov"]
+        learning_rate = group["lr"]
+        for point in group["params"]:
+            grad = point.grad
+            if grad is None:
+                continue
+            if isinstance(point, (ManifoldParameter, ManifoldTensor)):
+                manifold = point.manifold
+            else:
+                manifold = _default_manifold
+            if grad.is_sparse:
+                self._sparse_step_param(group, point, manifold)
+                continue
+            state = self.state[point]
+
+            # State initialization
+            if len(state) == 0:
+                if momentum > 0:
+                    state["momentum_buffer"] = grad.clone()
+
+            grad.add_(weight_decay, point)
+            grad = manifold.egrad2rgrad(point, grad)
+            if momentum > 0:
+                momentum_buffer = state["momentum_buffer"]
+                momentum_buffer.mul_(momentum).add_(1 - dampening, grad)
+                if nesterov:
+                    grad = grad.add_(momentum, momentum_buffer)
+                else:
+                    grad = momentum_buffer
+                # we have all the things projected
+                new_point, new_momentum_buffer = manifold.retr_transp(
+                    point, -learning_rate * grad, momentum_buffer
+                )
+                momentum_buffer.set_(new_momentum_buffer)
+                # use copy only for user facing point
+                copy_or_set_(point, new_point)
+            else:
+                new_point = manifold.retr(point, -learning_rate * grad)
+                copy_or_set_(point, new_point)
+
+            group["step"] += 1
+
+    def _sparse_step_param(self, group, point, manifold):
+        weight_decay = group["weight_decay"]
+        momentum = group["momentum"]
+        dampening = group["dampening"]
+        nesterov = group["nesterov"]
+        learning_rate = group["lr"]
+        rows, grad = sparse_rows(point, point.grad, manifold, "Riemannian SGD")
+        state = self.state[point]
+
+        # State initialization, rows that are not touched start with zero momentum
+        if len(state) == 0:
+            if momentum > 0:
+                state["momentum_buffer"] = torch.zeros_like(point).index_copy_(
+                    0, rows, grad
+                )
+        point_rows = point[rows]
+        grad = grad.add(weight_decay, point_rows)
+        grad = manifold.egrad2rgrad(point_rows, grad)
+        if momentum > 0:
+            momentum_buffer = state["momentum_buffer"][rows]
+            momentum_buffer.mul_(momentum).add_(1 - dampening, grad)
+            if nesterov:
+                grad = grad.add_(momentum, momentum_buffer)
+            else:
+                grad = momentum_buffer
+            new_point_rows, new_momentum_buffer = manifold.retr_transp(
+                point_rows, -learning_rate * grad, momentum_buffer
+            )
+            state["momentum_buffer"].index_copy_(0, rows, new_momentum_buffer)
+        else:
+            new_point_rows = manifold.retr(point_rows, -learning_rate * grad)
+        # scatter rows back
+        point.index_copy_(0, rows, new_point_rows)
+        group["step"] += 1
+
+    def _foreach_step_group(self, group):
+        weight_decay = group["weight_decay"]
+        momentum = group["momentum"]
+        dampening = group["dampening"]
+        nesterov = group["nesterov"]
+        learning_rate = group["lr"]
+        for point in group["params"]:
+            if point.grad is not None and point.grad.is_sparse:
+                if isinstance(point, (ManifoldParameter, ManifoldTensor)):
+                    manifold = point.manifold
+                else:
+                    manifold = _default_manifold
+                self._sparse_step_param(group, point, manifold)
+        for stacked in group_by_manifold(
+            group["params"], _default_manifold, concat=True
+        ):
+            manifold, points = stacked.manifold, stacked.points
+            for point in points:
+                state = self.state[point]
+                # State initialization
+                if len(state) == 0:
+                    if momentum > 0:
+                        state["momentum_buffer"] = point.grad.clone()
+            # concatenate everything, the update below is the same as in the loop
+            point = stacked.stack(points)
+            grad = stacked.stack([p.grad for p in points])
+            grad.add_(weight_decay, point)
+            grad = manifold.egrad2rgrad(point, grad)
+            if momentum > 0:
+                momentum_buffer = stacked.stack(
+                    [self.state[p]["momentum_buffer"] for p in points]
+                )
+                momentum_buffer.mul_(momentum).add_(1 - dampening, grad)
+                if nesterov:
+                    grad = grad.add_(momentum, momentum_buffer)
+                else:
+                    grad = momentum_buffer
+                new_point, new_momentum_buffer = manifold.retr_transp(
+                    point, -learning_rate * grad, momentum_buffer
+                )
+                for p, buf in zip(points, stacked.unstack(new_momentum_buffer)):
+                    self.state[p]["momentum_buffer"].set_(buf)
+            else:
+                new_point = manifold.retr(point, -learning_rate * grad)
+            # scatter back to the parameters
+            for p, new_p in zip(points, stacked.unstack(new_point)):
+                copy_or_set_(p, new_p)
+            group["step"] += len(points)
+
     @torch.no_grad()
     def stabilize_group(self, group):
         for p in group["params"]:
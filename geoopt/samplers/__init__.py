@@ -1,3 +1,4 @@
 from geoopt.samplers.sgrhmc import SGRHMC
 from geoopt.samplers.rhmc import RHMC
 from geoopt.samplers.rsgld import RSGLD
+from geoopt.samplers.history import History
@@ -1,21 +1,32 @@
+import torch
 from torch import optim as optim
 
 from geoopt.optim.mixin import OptimMixin
 from geoopt.tensor import ManifoldParameter, ManifoldTensor
+from geoopt.samplers.history import History
 
 
 __all__ = ["Sampler"]
 
 
 class Sampler(OptimMixin, optim.Optimizer):
-    def __init__(self, params, defaults):
+    # number of buffered device tensors that are moved to the histories
+    # in the sync free mode, bounds the memory of long runs
+    max_pending = 1024
+
+    def __init__(self, params, defaults, sync=True, history=None):
         super().__init__(params, defaults)
         self.n_rejected = 0
         self.steps = 0
         self.burnin = True
+        self.sync = sync
 
-        self.log_probs = []
-        self.acceptance_probs = []
+        if history is None:
+            history = dict()
+        self.log_probs = History(name="log_probs", **history)
+        self.acceptance_probs = History(name="acceptance_probs", **history)
+        # device tensors waiting for flush_logs in the sync free mode
+        self._pending = dict(log_probs=[], acceptance_probs=[], n_rejected=[])
         for group in self.param_groups:
             for p in group["params"]:
                 if isinstance(p, (ManifoldParameter, ManifoldTensor)):
@@ -27,7 +38,46 @@ class Sampler(OptimMixin, optim.Optimizer):
 
     @property
     def rejection_rate(self):
+        self._flush_pending()
         if self.steps > 0:
             return self.n_rejected / self.steps
         else:
             return 0.0
+
+    def flush_logs(self):
+        """
+        Move buffered device logs to :attr:`log_probs`, :attr:`acceptance_probs`
+        and :attr:`n_rejected` and export the last values of the histories
+
+        In the sync free mode (``sync=False``) the values stay on device and are
+        transferred in bulk by this method. They are also transferred automatically
+        once :attr:`max_pending` values of a log are buffered, so memory stays
+        bounded. Histories with ``export_dir`` write their last partial chunk,
+        call this method at the end of a run not to lose it.
+        """
+        self._flush_pending()
+        self.log_probs.flush()
+        self.acceptance_probs.flush()
+
+    def _flush_pending(self):
+        for name in ("log_probs", "acceptance_probs"):
+            pending = self._pending[name]
+            if pending:
+                getattr(self, name).extend(torch.stack(pending))
+                pending.clear()
+        pending = self._pending["n_rejected"]
+        if pending:
+            self.n_rejected += int(torch.stack(pending).sum())
+            pending.clear()
+
+    def _record(self, name, value):
+        # tensors are transferred to host in the sync mode only
+        if not self.sync:
+            pending = self._pending[name]
+            pending.append(value)
+            if len(pending) >= self.max_pending:
+                self._flush_pending()
+        elif name == "n_rejected":
+            self.n_rejected += int(torch.as_tensor(value).sum())
+        else:
+            getattr(self, name).append(value)
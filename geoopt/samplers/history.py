@@ -0,0 +1,222 @@
+import os
+
+import numpy as np
+import torch
+
+__all__ = ["History"]
+
+
+class History(object):
+    """
+    Tensor-backed history of sampler values with bounded memory
+
+    Parameters
+    ----------
+    capacity : int
+        number of retained values, the oldest ones are overwritten
+        (default: None -- unbounded)
+    thin : int
+        retain every ``thin``-th appended value (default: 1)
+    export_dir : str
+        directory to stream retained values to, as ``.npy`` chunks
+        (default: None -- no export)
+    chunk_size : int
+        number of values in an exported chunk (default: ``capacity`` or 1000)
+    name : str
+        prefix of exported files (default: ``"history"``)
+    dtype : torch.dtype
+        storage dtype (default: ``torch.float64``)
+
+    Notes
+    -----
+    Behaves like a list of retained values: it supports ``len``, iteration,
+    indexing, :meth:`append` and :meth:`extend`. Values are stored on CPU.
+    Summary statistics (:meth:`summary`) are updated incrementally with
+    every appended value, including the ones dropped by thinning or overwritten.
+    """
+
+    def __init__(
+        self,
+        capacity=None,
+        thin=1,
+        export_dir=None,
+        chunk_size=None,
+        name="history",
+        dtype=torch.float64,
+    ):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity should be positive, got {}".format(capacity))
+        if thin < 1:
+            raise ValueError("thin should be positive, got {}".format(thin))
+        if chunk_size is None:
+            chunk_size = capacity if capacity is not None else 1000
+        if capacity is not None and chunk_size > capacity:
+            raise ValueError(
+                "chunk_size should not exceed capacity, got {} > {}".format(
+                    chunk_size, capacity
+                )
+            )
+        self.capacity = capacity
+        self.thin = thin
+        self.export_dir = export_dir
+        self.chunk_size = chunk_size
+        self.name = name
+        self.dtype = dtype
+        if export_dir is not None:
+            os.makedirs(export_dir, exist_ok=True)
+        self.clear()
+
+    def clear(self):
+        """
+        Remove all values and reset statistics
+        """
+        # ring buffer, allocated with the first value
+        self._buffer = None
+        self._start = 0
+        self._size = 0
+        self._seen = 0
+        self._unexported = 0
+        self._n_chunks = 0
+        self._mean = self._m2 = self._min = self._max = None
+
+    def append(self, value):
+        """
+        Append a value, a float or a tensor of a fixed shape (e.g. per-chain values)
+        """
+        self.extend(torch.as_tensor(value, dtype=self.dtype).unsqueeze(0))
+
+    def extend(self, values):
+        """
+        Append values stacked along the first dimension
+        """
+        values = torch.as_tensor(values, dtype=self.dtype, device="cpu")
+        if values.shape[0] == 0:
+            return
+        self._update_summary(values)
+        # thinning is aligned with the total number of appended values
+        offset = -self._seen % self.thin
+        self._seen += values.shape[0]
+        values = values[offset :: self.thin]
+        while values.shape[0] > 0:
+            if self.export_dir is None:
+                n = values.shape[0]
+            else:
+                # a chunk should be exported before it can be overwritten
+                n = min(values.shape[0], self.chunk_size - self._unexported)
+            self._write(values[:n])
+            values = values[n:]
+            if self.export_dir is not None:
+                self._unexported += n
+                if self._unexported == self.chunk_size:
+                    self.flush()
+
+    def flush(self):
+        """
+        Export values that are not exported yet, no-op without ``export_dir``
+        """
+        if self.export_dir is None or self._unexported == 0:
+            return
+        chunk = self.as_tensor()[self._size - self._unexported :]
+        path = os.path.join(
+            self.export_dir, "{}_{:06d}.npy".format(self.name, self._n_chunks)
+        )
+        np.save(path, chunk.numpy())
+        self._unexported = 0
+        self._n_chunks += 1
+
+    def as_tensor(self):
+        """
+        Retained values in order of appending
+
+        Returns
+        -------
+        tensor
+            values stacked along the first dimension
+        """
+        if self._buffer is None:
+            return torch.empty(0, dtype=self.dtype)
+        idx = (torch.arange(self._size) + self._start) % self._buffer.shape[0]
+        return self._buffer[idx]
+
+    def tolist(self):
+        return self.as_tensor().tolist()
+
+    def summary(self):
+        """
+        Statistics of all appended values
+
+        Returns
+        -------
+        dict
+            ``count``, ``mean``, ``var``, ``std``, ``min`` and ``max``,
+            the variance is biased as in :func:`numpy.var`
+        """
+        if self._seen == 0:
+            return dict(count=0)
+        var = self._m2 / self._seen
+        return dict(
+            count=self._seen,
+            mean=self._mean.tolist(),
+            var=var.tolist(),
+            std=var.sqrt().tolist(),
+            min=self._min.tolist(),
+            max=self._max.tolist(),
+        )
+
+    def _write(self, values):
+        n = values.shape[0]
+        if self._buffer is None:
+            size = self.capacity if self.capacity is not None else max(n, 16)
+            self._buffer = values.new_empty((size,) + values.shape[1:])
+        elif self.capacity is None and self._size + n > self._buffer.shape[0]:
+            # amortized growth for the unbounded history
+            size = max(2 * self._buffer.shape[0], self._size + n)
+            buffer = values.new_empty((size,) + values.shape[1:])
+            buffer[: self._size] = self.as_tensor()
+            self._buffer, self._start = buffer, 0
+        capacity = self._buffer.shape[0]
+        if n >= capacity:
+            self._buffer.copy_(values[-capacity:])
+            self._start, self._size = 0, capacity
+            return
+        idx = (torch.arange(n) + self._start + self._size) % capacity
+        self._buffer[idx] = values
+        overwritten = max(self._size + n - capacity, 0)
+        self._start = (self._start + overwritten) % capacity
+        self._size = min(self._size + n, capacity)
+
+    def _update_summary(self, values):
+        # Chan et al. parallel update of the Welford statistics
+        n = values.shape[0]
+        mean = values.mean(0)
+        m2 = ((values - mean) ** 2).sum(0)
+        vmin, vmax = values.min(0)[0], values.max(0)[0]
+        if self._seen == 0:
+            self._mean, self._m2, self._min, self._max = mean, m2, vmin, vmax
+        else:
+            total = self._seen + n
+            delta = mean - self._mean
+            self._mean = self._mean + delta * n / total
+            self._m2 = self._m2 + m2 + delta ** 2 * self._seen * n / total
+            self._min = torch.min(self._min, vmin)
+            self._max = torch.max(self._max, vmax)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.tolist()[item]
+        if item < 0:
+            item += self._size
+        if not 0 <= item < self._size:
+            raise IndexError("history index out of range")
+        return self._buffer[(self._start + item) % self._buffer.shape[0]].tolist()
+
+    def __repr__(self):
+        return "History(capacity={}, thin={}, len={})".format(
+            self.capacity, self.thin, len(self)
+        )
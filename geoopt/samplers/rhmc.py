@@ -22,12 +22,41 @@ class RHMC(Sampler):
         step size
     n_steps : int
         number of leapfrog steps
+    sync : bool
+        synchronize with the device on every step (default: True). With ``False``
+        the Hamiltonians, the acceptance test and the logs stay on device,
+        call :meth:`flush_logs` to get the logs
+    n_chains : int
+        number of independent chains sampled in parallel (default: None -- single
+        chain). The first dimension of every parameter indexes chains and
+        the closure should return log probabilities of shape ``(n_chains,)``
+    history : dict
+        keyword arguments for :class:`History` of :attr:`log_probs`
+        and :attr:`acceptance_probs`, e.g. ``dict(capacity=10000, thin=10)``
+
+    Notes
+    -----
+    In the multi-chain mode every chain has its own Metropolis test and
+    rejected chains are restored with a masked copy. Logs contain a list of
+    per-chain values for every step, :attr:`steps` and :attr:`n_rejected`
+    count transitions of all chains.
     """
 
-    def __init__(self, params, epsilon=1e-3, n_steps=1):
+    def __init__(
+        self, params, epsilon=1e-3, n_steps=1, sync=True, n_chains=None, history=None
+    ):
         defaults = dict(epsilon=epsilon)
-        super().__init__(params, defaults)
+        super().__init__(params, defaults, sync=sync, history=history)
         self.n_steps = n_steps
+        self.n_chains = n_chains
+        if n_chains is not None:
+            for group in self.param_groups:
+                for p in group["params"]:
+                    if p.dim() == 0 or p.shape[0] != n_chains:
+                        raise ValueError(
+                            "The first dimension of parameters should be equal "
+                            "to n_chains={}, got shape {}".format(n_chains, p.shape)
+                        )
 
     def _step(self, p, r, epsilon):
         if isinstance(p, (ManifoldParameter, ManifoldTensor)):
@@ -43,6 +72,23 @@ class RHMC(Sampler):
         copy_or_set_(p, p_)
         r.set_(r_)
 
+    def _kinetic(self, r):
+        if self.n_chains is None:
+            return 0.5 * (r * r).sum()
+        else:
+            return 0.5 * (r * r).reshape(self.n_chains, -1).sum(-1)
+
+    def _logp(self, closure):
+        logp = closure()
+        if self.n_chains is not None and logp.shape != (self.n_chains,):
+            raise ValueError(
+                "closure should return log probabilities of shape (n_chains,), "
+                "got {}".format(logp.shape)
+            )
+        # chains are independent, the sum gives gradients for every chain
+        logp.sum().backward()
+        return logp.detach()
+
     def step(self, closure):
         """Performs a single sampling step.
 
@@ -53,10 +99,7 @@ class RHMC(Sampler):
             and returns the log probability.
         """
 
-        logp = closure()
-        logp.backward()
-
-        old_logp = logp.item()
+        old_logp = self._logp(closure)
         old_H = -old_logp
         with torch.no_grad():
             for group in self.param_groups:
@@ -81,7 +124,7 @@ class RHMC(Sampler):
                     r.normal_()
                     r.set_(egrad2rgrad(p, r))
 
-                    old_H += 0.5 * (r * r).sum().item()
+                    old_H = old_H + self._kinetic(r)
 
                     state["old_p"].copy_(p)
                     state["old_r"].copy_(r)
@@ -91,8 +134,7 @@ class RHMC(Sampler):
                     p.grad.zero_()
 
         for i in range(1, self.n_steps):
-            logp = closure()
-            logp.backward()
+            self._logp(closure)
             with torch.no_grad():
                 for group in self.param_groups:
                     for p in group["params"]:
@@ -102,10 +144,7 @@ class RHMC(Sampler):
                         self._step(p, self.state[p]["r"], group["epsilon"])
                         p.grad.zero_()
 
-        logp = closure()
-        logp.backward()
-
-        new_logp = logp.item()
+        new_logp = self._logp(closure)
         new_H = -new_logp
         with torch.no_grad():
             for group in self.param_groups:
@@ -124,28 +163,44 @@ class RHMC(Sampler):
                     r.add_(0.5 * epsilon * egrad2rgrad(p, p.grad))
                     p.grad.zero_()
 
-                    new_H += 0.5 * (r * r).sum().item()
+                    new_H = new_H + self._kinetic(r)
 
-            rho = min(1.0, math.exp(old_H - new_H))
+            if self.sync and self.n_chains is None:
+                rho = min(1.0, math.exp((old_H - new_H).item()))
+                reject = bool(np.random.rand(1) >= rho)
+            else:
+                rho = (old_H - new_H).exp().clamp(max=1.0)
+                reject = torch.rand_like(rho) >= rho
 
             if not self.burnin:
-                self.steps += 1
-                self.acceptance_probs.append(rho)
-
-            if np.random.rand(1) >= rho:  # reject
-                if not self.burnin:
-                    self.n_rejected += 1
-
-                for group in self.param_groups:
-                    for p in group["params"]:
-                        if p.grad is None:
-                            continue
-
-                        state = self.state[p]
-                        r = state["r"]
-                        p.copy_(state["old_p"])
-                        r.copy_(state["old_r"])
-
-                self.log_probs.append(old_logp)
+                self.steps += 1 if self.n_chains is None else self.n_chains
+                self._record("acceptance_probs", rho)
+                self._record("n_rejected", reject)
+
+            if self.sync and self.n_chains is None:
+                if reject:
+                    self._restore()
+                    self._record("log_probs", old_logp)
+                else:
+                    self._record("log_probs", new_logp)
             else:
-                self.log_probs.append(new_logp)
+                self._restore(reject)
+                self._record("log_probs", torch.where(reject, old_logp, new_logp))
+
+    def _restore(self, mask=None):
+        # mask selects proposals to reject, all of them are rejected if it is None
+        for group in self.param_groups:
+            for p in group["params"]:
+                if p.grad is None:
+                    continue
+
+                state = self.state[p]
+                r = state["r"]
+                if mask is None:
+                    p.copy_(state["old_p"])
+                    r.copy_(state["old_r"])
+                else:
+                    # per-chain mask broadcasts over the rest of dimensions
+                    mask_ = mask.view(mask.shape + (1,) * (p.dim() - mask.dim()))
+                    p.copy_(torch.where(mask_, state["old_p"], p))
+                    r.copy_(torch.where(mask_, state["old_r"], r))
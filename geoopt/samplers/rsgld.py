@@ -19,11 +19,17 @@ class RSGLD(Sampler):
         iterables of tensors for which to perform sampling
     epsilon : float
         step size
+    sync : bool
+        synchronize with the device on every step (default: True). With ``False``
+        the logs stay on device, call :meth:`flush_logs` to get them
+    history : dict
+        keyword arguments for :class:`History` of :attr:`log_probs`
+        and :attr:`acceptance_probs`, e.g. ``dict(capacity=10000, thin=10)``
     """
 
-    def __init__(self, params, epsilon=1e-3):
+    def __init__(self, params, epsilon=1e-3, sync=True, history=None):
         defaults = dict(epsilon=epsilon)
-        super().__init__(params, defaults)
+        super().__init__(params, defaults, sync=sync, history=history)
 
     def step(self, closure):
         """Performs a single sampling step.
@@ -56,7 +62,7 @@ class RSGLD(Sampler):
 
         if not self.burnin:
             self.steps += 1
-            self.log_probs.append(logp.item())
+            self._record("log_probs", logp.detach())
 
     def stabilize(self):
         """Stabilize parameters if they are off-manifold due to numerical reasons
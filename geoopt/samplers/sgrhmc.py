@@ -23,11 +23,19 @@ class SGRHMC(Sampler):
         number of leapfrog steps
     alpha : float
         :math:`(1 - alpha)` -- momentum term
+    sync : bool
+        synchronize with the device on every step (default: True). With ``False``
+        the logs stay on device, call :meth:`flush_logs` to get them
+    history : dict
+        keyword arguments for :class:`History` of :attr:`log_probs`
+        and :attr:`acceptance_probs`, e.g. ``dict(capacity=10000, thin=10)``
     """
 
-    def __init__(self, params, epsilon=1e-3, n_steps=1, alpha=0.1):
+    def __init__(
+        self, params, epsilon=1e-3, n_steps=1, alpha=0.1, sync=True, history=None
+    ):
         defaults = dict(epsilon=epsilon, alpha=alpha)
-        super().__init__(params, defaults)
+        super().__init__(params, defaults, sync=sync, history=history)
         self.n_steps = n_steps
 
     def step(self, closure):
@@ -39,9 +47,6 @@ class SGRHMC(Sampler):
             A closure that reevaluates the model
             and returns the log probability.
         """
-        H_old = 0.0
-        H_new = 0.0
-
         for group in self.param_groups:
             for p in group["params"]:
                 state = self.state[p]
@@ -53,13 +58,9 @@ class SGRHMC(Sampler):
                 v = state["v"]
                 v.normal_().mul_(epsilon)
 
-                r = v / epsilon
-                H_old += 0.5 * (r * r).sum().item()
-        logp = float("nan")
         for i in range(self.n_steps + 1):
             logp = closure()
             logp.backward()
-            logp = logp.item()
             with torch.no_grad():
                 for group in self.param_groups:
                     for p in group["params"]:
@@ -85,12 +86,9 @@ class SGRHMC(Sampler):
                         )
                         p.grad.zero_()
 
-                        r = v / epsilon
-                        H_new += 0.5 * (r * r).sum().item()
-
         if not self.burnin:
             self.steps += 1
-            self.log_probs.append(logp)
+            self._record("log_probs", logp.detach())
 
     def stabilize(self):
         """Stabilize parameters if they are off-manifold due to numerical reasons
@@ -0,0 +1,46 @@
+"""
+Benchmark for per-matrix linalg fallbacks with a different number of workers.
+
+Usage::
+
+    python scripts/benchmark_linalg_workers.py --batch 10000 --size 8
+"""
+import argparse
+import timeit
+
+import torch
+import geoopt.linalg.batch_linalg as batch_linalg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4, 8])
+    args = parser.parse_args()
+
+    x = torch.randn(args.batch, args.size, args.size, dtype=torch.float64)
+    fallbacks = dict(
+        svd=batch_linalg._svd_loop,
+        qr=batch_linalg._qr_loop,
+        matrix_rank=batch_linalg._matrix_rank_loop,
+    )
+    print("torch threads: {}".format(torch.get_num_threads()))
+    for name, fn in fallbacks.items():
+        baseline = None
+        for workers in args.workers:
+            batch_linalg.set_num_workers(workers)
+            fn(x[:10])  # warmup the pool
+            t = min(timeit.repeat(lambda: fn(x), number=1, repeat=args.repeat))
+            baseline = baseline or t
+            print(
+                "{:<12} workers={:<3} {:.3f}s speedup={:.2f}x".format(
+                    name, workers, t, baseline / t
+                )
+            )
+    batch_linalg.set_num_workers(0)
+
+
+if __name__ == "__main__":
+    main()
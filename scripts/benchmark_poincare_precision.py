@@ -0,0 +1,56 @@
+"""
+Benchmark for precision policies of artanh and arsinh on Poincare ball.
+
+Usage::
+
+    python scripts/benchmark_poincare_precision.py --size 1000000 --device cuda
+"""
+import argparse
+import timeit
+
+import torch
+from geoopt.manifolds.poincare import math as pmath
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=10)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    x = torch.rand(args.size, device=args.device) * 1.998 - 0.999
+    a = torch.randn(args.size // args.dim, args.dim, device=args.device) * 0.1
+    b = torch.randn(args.size // args.dim, args.dim, device=args.device) * 0.1
+    benchmarks = dict(
+        artanh=lambda p: pmath.artanh(x, p),
+        arsinh=lambda p: pmath.arsinh(x * 10, p),
+        dist=lambda p: pmath.dist(a, b, precision=p),
+    )
+
+    def sync():
+        if x.is_cuda:
+            torch.cuda.synchronize()
+
+    for name, fn in benchmarks.items():
+        baseline = None
+        for precision in pmath.PRECISIONS:
+            fn(precision)  # warmup
+
+            def run():
+                fn(precision)
+                sync()
+
+            t = min(timeit.repeat(run, number=args.number, repeat=args.repeat))
+            baseline = baseline or t
+            print(
+                "{:<8} {:<8} {:.4f}s speedup={:.2f}x".format(
+                    name, precision, t / args.number, baseline / t
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
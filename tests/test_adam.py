@@ -51,3 +51,139 @@ def test_adam_poincare():
     for _ in range(2000):
         optim.step(closure)
     np.testing.assert_allclose(start.data, ideal, atol=1e-5, rtol=1e-5)
+
+
+def _foreach_params():
+    torch.manual_seed(42)
+    stiefel = geoopt.manifolds.Stiefel()
+    ball = geoopt.PoincareBall()
+    params = []
+    for _ in range(3):
+        with torch.no_grad():
+            params.append(
+                geoopt.ManifoldParameter(torch.randn(6, 3), manifold=stiefel).proj_()
+            )
+            params.append(
+                geoopt.ManifoldParameter(
+                    ball.random_normal(4, 2, std=0.3), manifold=ball
+                )
+            )
+        params.append(torch.nn.Parameter(torch.randn(5)))
+    # a parameter with another shape on the same manifold
+    params.append(geoopt.ManifoldParameter(ball.random_normal(7, 2, std=0.3)))
+    return params
+
+
+@pytest.mark.parametrize("params", [dict(lr=1e-2), dict(lr=1e-2, amsgrad=True)])
+def test_adam_foreach_matches_loop(params):
+    loop_params = _foreach_params()
+    foreach_params = _foreach_params()
+
+    def closure(optim, ps):
+        optim.zero_grad()
+        loss = sum((p ** 2).sum() + p.sum() for p in ps)
+        loss.backward()
+        return loss.item()
+
+    loop = geoopt.optim.RiemannianAdam(loop_params, **params)
+    foreach = geoopt.optim.RiemannianAdam(foreach_params, foreach=True, **params)
+    for _ in range(10):
+        loop.step(lambda: closure(loop, loop_params))
+        foreach.step(lambda: closure(foreach, foreach_params))
+    for p, q in zip(loop_params, foreach_params):
+        np.testing.assert_allclose(p.data, q.data, atol=1e-6)
+        np.testing.assert_allclose(
+            loop.state[p]["exp_avg"], foreach.state[q]["exp_avg"], atol=1e-6
+        )
+    foreach.load_state_dict(foreach.state_dict())
+    foreach.step(lambda: closure(foreach, foreach_params))
+
+
+def _embedding(sparse):
+    torch.manual_seed(42)
+    ball = geoopt.PoincareBall()
+    emb = torch.nn.Embedding(10, 3, sparse=sparse)
+    emb.weight = geoopt.ManifoldParameter(
+        ball.random_normal(10, 3, std=0.3), manifold=ball
+    )
+    return emb
+
+
+@pytest.mark.parametrize("params", [dict(lr=1e-2), dict(lr=1e-2, amsgrad=True)])
+@pytest.mark.parametrize("foreach", [False, True])
+def test_adam_sparse_matches_dense(params, foreach):
+    dense = _embedding(sparse=False)
+    sparse = _embedding(sparse=True)
+    dense_optim = geoopt.optim.RiemannianAdam(dense.parameters(), **params)
+    sparse_optim = geoopt.optim.RiemannianAdam(
+        sparse.parameters(), foreach=foreach, **params
+    )
+    # every row is present, so the sparse update should be the same
+    idx = torch.tensor([[0, 1, 2, 3, 4], [5, 6, 7, 8, 9], [9, 0, 0, 1, 2]])
+    for _ in range(10):
+        for emb, optim in ((dense, dense_optim), (sparse, sparse_optim)):
+            optim.zero_grad()
+            emb(idx).pow(2).sum().backward()
+            optim.step()
+    np.testing.assert_allclose(dense.weight.data, sparse.weight.data, atol=1e-6)
+    assert dense_optim.param_groups[0]["step"] == sparse_optim.param_groups[0]["step"]
+
+
+def test_adam_sparse_touches_only_rows():
+    emb = _embedding(sparse=True)
+    before = emb.weight.data.clone()
+    optim = geoopt.optim.RiemannianAdam(emb.parameters(), lr=1e-2)
+    optim.zero_grad()
+    emb(torch.tensor([1, 3, 3])).pow(2).sum().backward()
+    optim.step()
+    changed = (emb.weight.data != before).any(-1)
+    assert changed.tolist() == [i in (1, 3) for i in range(10)]
+    assert emb.weight.manifold.check_point_on_manifold(emb.weight)
+
+
+def test_adam_sparse_not_row_wise():
+    emb = torch.nn.Embedding(10, 3, sparse=True)
+    emb.weight = geoopt.ManifoldParameter(torch.randn(10, 3), manifold=geoopt.Stiefel())
+    optim = geoopt.optim.RiemannianAdam(emb.parameters())
+    emb(torch.tensor([1, 3])).sum().backward()
+    with pytest.raises(RuntimeError, match="row-wise"):
+        optim.step()
+
+
+def test_lazy_adam_decay_matches_dense():
+    torch.manual_seed(42)
+    weight = torch.randn(10, 3)
+    coef = torch.randn(10, 3)
+    dense = torch.nn.Embedding.from_pretrained(weight.clone(), freeze=False)
+    lazy = torch.nn.Embedding.from_pretrained(weight.clone(), freeze=False, sparse=True)
+    dense_optim = geoopt.optim.RiemannianAdam(dense.parameters(), lr=1e-2)
+    lazy_optim = geoopt.optim.LazyRiemannianAdam(lazy.parameters(), lr=1e-2)
+    # linear loss, so gradients do not depend on the (differently moved) points
+    schedule = [[0, 1], [2], [3, 3], [0, 2], list(range(10))]
+    for idx in schedule:
+        idx = torch.tensor(idx)
+        for emb, optim in ((dense, dense_optim), (lazy, lazy_optim)):
+            optim.zero_grad()
+            (emb(idx) * coef[idx]).sum().backward()
+            optim.step()
+    dense_state = dense_optim.state[dense.weight]
+    lazy_state = lazy_optim.state[lazy.weight]
+    np.testing.assert_allclose(dense_state["exp_avg"], lazy_state["exp_avg"], atol=1e-7)
+    np.testing.assert_allclose(
+        dense_state["exp_avg_sq"], lazy_state["exp_avg_sq"], atol=1e-7
+    )
+    assert lazy_state["last_step"].tolist() == [5] * 10
+
+
+def test_lazy_adam_poincare():
+    emb = _embedding(sparse=True)
+    before = emb.weight.data.clone()
+    optim = geoopt.optim.LazyRiemannianAdam(emb.parameters(), lr=1e-2)
+    for idx in ([1, 3], [3], [1, 4]):
+        optim.zero_grad()
+        emb(torch.tensor(idx)).pow(2).sum().backward()
+        optim.step()
+    changed = (emb.weight.data != before).any(-1)
+    assert changed.tolist() == [i in (1, 3, 4) for i in range(10)]
+    assert optim.state[emb.weight]["last_step"].tolist()[:5] == [0, 3, 0, 2, 3]
+    assert emb.weight.manifold.check_point_on_manifold(emb.weight)
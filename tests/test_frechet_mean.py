@@ -0,0 +1,101 @@
+import torch
+import numpy as np
+import pytest
+import geoopt
+
+
+@pytest.fixture("function", autouse=True, params=range(30, 33))
+def seed(request):
+    torch.manual_seed(request.param)
+    return request.param
+
+
+def random_spd(*size):
+    a = torch.randn(*size, dtype=torch.float64)
+    return a @ a.transpose(-1, -2) + 0.5 * torch.eye(size[-1], dtype=torch.float64)
+
+
+def mean_logmap(manifold, x, weights, mean):
+    w = weights / weights.sum(-1, keepdim=True)
+    w = w.view(w.shape + (1,) * manifold.ndim)
+    return (w * manifold.logmap(mean.unsqueeze(-manifold.ndim - 1), x)).sum(
+        -manifold.ndim - 1
+    )
+
+
+def test_sphere():
+    sphere = geoopt.Sphere()
+    x = sphere.projx(torch.randn(4, 7, 3, dtype=torch.float64) + 2)
+    weights = torch.rand(4, 7, dtype=torch.float64)
+    mean = sphere.frechet_mean(x, weights, tol=1e-10)
+    assert mean.shape == (4, 3)
+    sphere.assert_check_point_on_manifold(mean)
+    np.testing.assert_allclose(
+        mean_logmap(sphere, x, weights, mean), torch.zeros(4, 3), atol=1e-8
+    )
+    assert sphere.frechet_mean(x, keepdim=True).shape == (4, 1, 3)
+
+
+def test_spd():
+    spd = geoopt.SymmetricPositiveDefinite()
+    x = random_spd(2, 3, 5, 4, 4)
+    weights = torch.rand(3, 5, dtype=torch.float64)
+    mean = spd.frechet_mean(x, weights, tol=1e-10)
+    assert mean.shape == (2, 3, 4, 4)
+    np.testing.assert_allclose(mean, mean.transpose(-1, -2))
+    assert (torch.symeig(mean)[0] > 0).all()
+    np.testing.assert_allclose(
+        mean_logmap(spd, x, weights, mean), torch.zeros(2, 3, 4, 4), atol=1e-8
+    )
+
+
+def test_spd_commuting():
+    # log-euclidean and riemannian means agree for commuting matrices
+    spd = geoopt.SymmetricPositiveDefinite()
+    x = torch.diag_embed(torch.rand(6, 3, dtype=torch.float64) + 0.1)
+    mean = spd.frechet_mean(x, max_iter=0)
+    np.testing.assert_allclose(
+        mean, torch.diag_embed(x.diagonal(dim1=-2, dim2=-1).log().mean(0).exp())
+    )
+
+
+def test_euclidean():
+    euclidean = geoopt.Euclidean(ndim=1)
+    x = torch.randn(3, 6, 2, dtype=torch.float64)
+    weights = torch.rand(6, dtype=torch.float64)
+    mean = euclidean.frechet_mean(x, weights)
+    expected = (x * weights[:, None]).sum(-2) / weights.sum()
+    np.testing.assert_allclose(mean, expected)
+
+
+def test_converged_sets_stop(monkeypatch):
+    sphere = geoopt.Sphere()
+    x = sphere.projx(torch.randn(5, 4, 3, dtype=torch.float64))
+    # the first two sets are a single repeated point, they converge at once
+    x[:2] = x[:2, :1]
+    sizes = []
+    logmap = sphere.logmap
+
+    def counting_logmap(m, y):
+        sizes.append(y.shape[0])
+        return logmap(m, y)
+
+    monkeypatch.setattr(sphere, "logmap", counting_logmap)
+    mean = sphere.frechet_mean(x)
+    assert sizes[0] == 5
+    assert max(sizes[1:]) <= 3
+    np.testing.assert_allclose(mean[:2], x[:2, 0])
+
+
+def test_not_converged_warns():
+    sphere = geoopt.Sphere()
+    x = sphere.projx(torch.randn(5, 4, 3, dtype=torch.float64))
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        sphere.frechet_mean(x, max_iter=1, tol=1e-12)
+
+
+def test_no_logmap():
+    stiefel = geoopt.Stiefel()
+    x = stiefel.projx(torch.randn(3, 4, 2))
+    with pytest.raises(NotImplementedError):
+        stiefel.frechet_mean(x)
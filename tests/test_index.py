@@ -0,0 +1,65 @@
+import io
+
+import numpy as np
+import pytest
+import torch
+
+import geoopt
+
+
+@pytest.fixture(autouse=True)
+def withdtype():
+    torch.set_default_dtype(torch.float64)
+    try:
+        yield
+    finally:
+        torch.set_default_dtype(torch.float32)
+
+
+@pytest.mark.parametrize(
+    "manifold,shape",
+    [
+        (geoopt.PoincareBall(c=0.5), (500, 3)),
+        (geoopt.Sphere(), (500, 4)),
+        (geoopt.Euclidean(ndim=1), (300, 2)),
+    ],
+)
+@pytest.mark.parametrize("leaf_size", [1, 16])
+def test_vptree_matches_brute_force(manifold, shape, leaf_size):
+    torch.manual_seed(42)
+    points = manifold.projx(torch.randn(*shape) * 0.3)
+    query = manifold.projx(torch.randn(2, 5, *shape[1:]) * 0.3)
+    tree = geoopt.index.VPTree(points, manifold=manifold, leaf_size=leaf_size)
+    dist, idx = tree.knn(query, 7)
+    assert dist.shape == idx.shape == (2, 5, 7)
+    brute = manifold.dist(query[..., None, :], points)
+    expected_dist, expected_idx = brute.topk(7, dim=-1, largest=False)
+    np.testing.assert_allclose(dist, expected_dist)
+    np.testing.assert_array_equal(idx, expected_idx)
+    r = float(expected_dist[..., 3].mean())
+    found = tree.radius_search(query, r)
+    assert len(found) == 10
+    for (d, i), b in zip(found, brute.reshape(10, -1)):
+        np.testing.assert_array_equal(i, b.argsort()[: int((b <= r).sum())])
+        assert (d <= r).all()
+
+
+def test_vptree_manifold_tensor_and_save():
+    torch.manual_seed(42)
+    ball = geoopt.PoincareBall()
+    points = geoopt.ManifoldTensor(ball.random_normal(200, 2), manifold=ball)
+    tree = geoopt.index.VPTree(points)
+    assert tree.manifold is ball
+    query = ball.random_normal(3, 2)
+    dist, idx = tree.knn(query, 5)
+    buffer = io.BytesIO()
+    geoopt.index.VPTree(torch.tensor(points.tolist()), manifold=ball).save(buffer)
+    buffer.seek(0)
+    loaded = geoopt.index.VPTree.load(buffer)
+    loaded_dist, loaded_idx = loaded.knn(query, 5)
+    np.testing.assert_allclose(loaded_dist, dist)
+    np.testing.assert_array_equal(loaded_idx, idx)
+    with pytest.raises(ValueError):
+        tree.knn(query, 201)
+    with pytest.raises(ValueError):
+        geoopt.index.VPTree(torch.randn(10, 2))
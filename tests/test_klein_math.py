@@ -0,0 +1,84 @@
+import torch
+import numpy as np
+import pytest
+from geoopt.manifolds import klein, lorentz, poincare
+
+
+@pytest.fixture("function", autouse=True, params=range(30, 35))
+def seed(request):
+    torch.manual_seed(request.param)
+    return request.param
+
+
+@pytest.fixture
+def c(seed):
+    return torch.tensor(0.5 + seed - 30, dtype=torch.float64)
+
+
+@pytest.fixture
+def ball_points(c):
+    x = torch.randn(100, 3, dtype=c.dtype) * 0.5 / c ** 0.5
+    y = torch.randn(100, 3, dtype=c.dtype) * 0.5 / c ** 0.5
+    return poincare.math.expmap0(x, c=c), poincare.math.expmap0(y, c=c)
+
+
+def test_conversions(ball_points, c):
+    a, b = ball_points
+    x = klein.math.from_poincare(a, c=c)
+    y = klein.math.from_poincare(b, c=c)
+    np.testing.assert_allclose(klein.math.to_poincare(x, c=c), a)
+    np.testing.assert_allclose(
+        klein.math.dist(x, y, c=c), poincare.math.dist(a, b, c=c)
+    )
+    lx = lorentz.math.from_poincare(a, c=c)
+    np.testing.assert_allclose(klein.math.to_lorentz(x, c=c), lx)
+    np.testing.assert_allclose(klein.math.from_lorentz(lx, c=c), x)
+
+
+def test_expmap_logmap_transp(ball_points, c):
+    a, b = ball_points
+    x = klein.math.from_poincare(a, c=c)
+    y = klein.math.from_poincare(b, c=c)
+    u = klein.math.logmap(x, y, c=c)
+    norm = klein.math.inner(x, u, u, c=c).sqrt()
+    np.testing.assert_allclose(norm, klein.math.dist(x, y, c=c))
+    np.testing.assert_allclose(klein.math.expmap(x, u, c=c), y)
+    # geodesics are straight lines
+    z = klein.math.expmap(x, 0.3 * u, c=c)
+    np.testing.assert_allclose(
+        torch.nn.functional.normalize(z - x, dim=-1),
+        torch.nn.functional.normalize(y - x, dim=-1),
+    )
+    v = torch.randn_like(x)
+    pu = klein.math.parallel_transport(x, y, u, c=c)
+    pv = klein.math.parallel_transport(x, y, v, c=c)
+    np.testing.assert_allclose(
+        klein.math.inner(y, pu, pv, c=c), klein.math.inner(x, u, v, c=c)
+    )
+    np.testing.assert_allclose(pu, -klein.math.logmap(y, x, c=c))
+
+
+def test_egrad2rgrad(c):
+    manifold = klein.Klein(c=c).to(c.dtype)
+    x = manifold.random_normal(3, std=0.5).detach().requires_grad_()
+    y = manifold.random_normal(3, std=0.5)
+    manifold.dist(x, y).pow(2).backward()
+    rgrad = manifold.egrad2rgrad(x, x.grad)
+    np.testing.assert_allclose(rgrad.detach(), -2 * manifold.logmap(x, y).detach())
+
+
+def test_einstein_midpoint(ball_points, c):
+    a, b = ball_points
+    x = klein.math.from_poincare(a, c=c)
+    y = klein.math.from_poincare(b, c=c)
+    m = klein.math.einstein_midpoint(torch.stack([x, y], dim=-2), c=c)
+    d = klein.math.dist(x, y, c=c)
+    np.testing.assert_allclose(klein.math.dist(x, m, c=c), d / 2)
+    np.testing.assert_allclose(klein.math.dist(y, m, c=c), d / 2)
+    # weighted midpoint lies on the geodesic at the weighted Lorentz centroid
+    w = torch.rand(100, 2, dtype=c.dtype)
+    m = klein.math.einstein_midpoint(torch.stack([x, y], dim=-2), w, c=c)
+    lm = w[:, :1] * klein.math.to_lorentz(x, c=c) + w[:, 1:] * klein.math.to_lorentz(
+        y, c=c
+    )
+    np.testing.assert_allclose(m, klein.math.from_lorentz(lm, c=c))
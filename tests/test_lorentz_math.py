@@ -0,0 +1,101 @@
+import torch
+import numpy as np
+import pytest
+from geoopt.manifolds import lorentz, poincare
+import geoopt
+
+
+@pytest.fixture("function", autouse=True, params=range(30, 35))
+def seed(request):
+    torch.manual_seed(request.param)
+    return request.param
+
+
+@pytest.fixture
+def c(seed):
+    # minkowski inner products lose precision in float32
+    return torch.tensor(0.5 + seed - 30, dtype=torch.float64)
+
+
+@pytest.fixture
+def ball_points(c):
+    x = torch.randn(100, 3, dtype=c.dtype) * 0.5 / c ** 0.5
+    y = torch.randn(100, 3, dtype=c.dtype) * 0.5 / c ** 0.5
+    return poincare.math.expmap0(x, c=c), poincare.math.expmap0(y, c=c)
+
+
+def test_poincare_conversion(ball_points, c):
+    a, b = ball_points
+    x = lorentz.math.from_poincare(a, c=c)
+    y = lorentz.math.from_poincare(b, c=c)
+    assert x.shape == (100, 4)
+    np.testing.assert_allclose(lorentz.math.inner(x, x), (-1 / c).expand(100))
+    np.testing.assert_allclose(lorentz.math.to_poincare(x, c=c), a)
+    np.testing.assert_allclose(
+        lorentz.math.dist(x, y, c=c), poincare.math.dist(a, b, c=c)
+    )
+
+
+def test_expmap_logmap(ball_points, c):
+    a, b = ball_points
+    x = lorentz.math.from_poincare(a, c=c)
+    y = lorentz.math.from_poincare(b, c=c)
+    u = lorentz.math.logmap(x, y, c=c)
+    np.testing.assert_allclose(
+        lorentz.math.inner(x, u), torch.zeros(100, dtype=c.dtype), atol=1e-10
+    )
+    np.testing.assert_allclose(lorentz.math.norm(u), lorentz.math.dist(x, y, c=c))
+    np.testing.assert_allclose(lorentz.math.expmap(x, u, c=c), y)
+    u0 = lorentz.math.logmap0(y, c=c)
+    np.testing.assert_allclose(lorentz.math.expmap0(u0, c=c), y)
+
+
+def test_parallel_transport(ball_points, c):
+    a, b = ball_points
+    x = lorentz.math.from_poincare(a, c=c)
+    y = lorentz.math.from_poincare(b, c=c)
+    u = lorentz.math.project_u(x, torch.randn_like(x), c=c)
+    v = lorentz.math.project_u(x, torch.randn_like(x), c=c)
+    pu = lorentz.math.parallel_transport(x, y, u, c=c)
+    pv = lorentz.math.parallel_transport(x, y, v, c=c)
+    np.testing.assert_allclose(
+        lorentz.math.inner(y, pu), torch.zeros(100, dtype=c.dtype), atol=1e-10
+    )
+    np.testing.assert_allclose(lorentz.math.inner(pu, pv), lorentz.math.inner(u, v))
+    # transport of the log map is the negated log map back
+    w = lorentz.math.logmap(x, y, c=c)
+    np.testing.assert_allclose(
+        lorentz.math.parallel_transport(x, y, w, c=c), -lorentz.math.logmap(y, x, c=c)
+    )
+
+
+def test_egrad2rgrad(c):
+    # Riemannian gradient matches the gradient of the distance
+    manifold = lorentz.Lorentz(c=c).to(c.dtype)
+    x = manifold.random_normal(3, std=0.5).detach().requires_grad_()
+    y = manifold.random_normal(3, std=0.5)
+    d = manifold.dist(x, y)
+    d.pow(2).backward()
+    rgrad = manifold.egrad2rgrad(x, x.grad)
+    expected = -2 * manifold.logmap(x, y)
+    np.testing.assert_allclose(rgrad.detach(), expected.detach())
+
+
+def test_pairwise_dist(ball_points, c):
+    a, b = ball_points
+    x = lorentz.math.from_poincare(a[:20], c=c)
+    y = lorentz.math.from_poincare(b[:30], c=c)
+    np.testing.assert_allclose(
+        lorentz.math.pairwise_dist(x, y, c=c),
+        lorentz.math.dist(x[:, None], y[None], c=c),
+    )
+
+
+def test_large_norms():
+    manifold = geoopt.Lorentz().to(torch.float64)
+    u = torch.zeros(2, 3, dtype=torch.float64)
+    u[:, 1] = torch.tensor([10.0, 20.0])
+    x = manifold.expmap0(u)
+    manifold.assert_check_point_on_manifold(x[:1])
+    np.testing.assert_allclose(manifold.dist(x[0], x[1]), 10.0)
+    np.testing.assert_allclose(manifold.logmap0(x)[:, 1], [10.0, 20.0])
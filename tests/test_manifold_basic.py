@@ -22,6 +22,8 @@ def use_floatX(request):
 
 manifold_shapes = {
     geoopt.manifolds.PoincareBall: (3,),
+    geoopt.manifolds.Lorentz: (4,),
+    geoopt.manifolds.Klein: (3,),
     geoopt.manifolds.EuclideanStiefel: (10, 5),
     geoopt.manifolds.CanonicalStiefel: (10, 5),
     geoopt.manifolds.R: (10,),
@@ -111,6 +113,39 @@ def poincare_case():
     x = geoopt.ManifoldTensor(x, manifold=manifold)
     case = UnaryCase(shape, x, ex, v, ev, manifold)
     yield case
+    manifold = geoopt.PoincareBallExact(backend="script").to(dtype=torch.float64)
+    x = geoopt.ManifoldTensor(x, manifold=manifold)
+    case = UnaryCase(shape, x, ex, v, ev, manifold)
+    yield case
+
+
+def lorentz_case():
+    torch.manual_seed(42)
+    shape = manifold_shapes[geoopt.manifolds.Lorentz]
+    ex = torch.randn(*shape, dtype=torch.float64)
+    ev = torch.randn(*shape, dtype=torch.float64)
+    x = ex.clone()
+    x[0] = (1 + x[1:] @ x[1:]).sqrt()
+    xv = x[1:] @ ev[1:] - x[0] * ev[0]
+    v = ev + xv * x
+    manifold = geoopt.Lorentz().to(dtype=torch.float64)
+    x = geoopt.ManifoldTensor(x, manifold=manifold)
+    case = UnaryCase(shape, x, ex, v, ev, manifold)
+    yield case
+
+
+def klein_case():
+    torch.manual_seed(42)
+    shape = manifold_shapes[geoopt.manifolds.Klein]
+    ex = torch.randn(*shape, dtype=torch.float64) / 3
+    ev = torch.randn(*shape, dtype=torch.float64) / 3
+    x = torch.tanh(torch.norm(ex)) * ex / torch.norm(ex)
+    ex = x.clone()
+    v = ev.clone()
+    manifold = geoopt.Klein().to(dtype=torch.float64)
+    x = geoopt.ManifoldTensor(x, manifold=manifold)
+    case = UnaryCase(shape, x, ex, v, ev, manifold)
+    yield case
 
 
 def sphere_subspace_case():
@@ -188,6 +223,8 @@ def sphere_case():
         euclidean_stiefel_case(),
         canonical_stiefel_case(),
         poincare_case(),
+        lorentz_case(),
+        klein_case(),
     ),
     ids=lambda case: case.manifold.__class__.__name__,
 )
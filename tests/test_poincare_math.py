@@ -369,3 +369,278 @@ def test_distance2plane(a, c):
     dist = poincare.math.dist2plane(z, a, vr, c=c)
 
     np.testing.assert_allclose(dist, dist1, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "fn,nargs",
+    [
+        ("mobius_add", 2),
+        ("dist", 2),
+        ("dist0", 1),
+        ("expmap", 2),
+        ("expmap0", 1),
+        ("logmap", 2),
+        ("logmap0", 1),
+        ("gyration", 3),
+        ("parallel_transport", 3),
+        ("egrad2rgrad", 2),
+        ("lambda_x", 1),
+        ("project", 1),
+    ],
+)
+def test_fused_backend(a, b, c, fn, nargs):
+    a.requires_grad_()
+    args = (a, b, b * 0.5)[:nargs]
+    expected = getattr(poincare.math, fn)(*args, c=c)
+    res = getattr(poincare.fused, fn)(*args, c=c)
+    expected_grad, = torch.autograd.grad(expected.sum(), a)
+    res_grad, = torch.autograd.grad(res.sum(), a)
+    tolerance = {
+        torch.float32: dict(atol=1e-5, rtol=1e-5),
+        torch.float64: dict(atol=1e-10),
+    }
+    np.testing.assert_allclose(res.detach(), expected.detach(), **tolerance[c.dtype])
+    # eager backend may use closed form gradients, they differ in rounding
+    grad_tolerance = {
+        torch.float32: dict(atol=1e-4, rtol=1e-4),
+        torch.float64: dict(atol=1e-10),
+    }
+    np.testing.assert_allclose(res_grad, expected_grad, **grad_tolerance[c.dtype])
+
+
+def test_backend_selection():
+    ball = poincare.PoincareBall()
+    assert ball._math is poincare.math
+    assert poincare.PoincareBall(backend="script")._math is poincare.fused
+    poincare.set_default_backend("script")
+    try:
+        assert poincare.get_default_backend() == "script"
+        assert ball._math is poincare.fused
+        assert poincare.PoincareBall(backend="eager")._math is poincare.math
+    finally:
+        poincare.set_default_backend("eager")
+    with pytest.raises(ValueError):
+        poincare.PoincareBall(backend="cuda")
+
+
+def test_fused_boundary():
+    # points on the boundary are clamped in float32 and stay finite
+    x = torch.tensor([[1.0, 0.0], [0.0, -1.0]])
+    for fn in ("dist0", "logmap0"):
+        assert torch.isfinite(getattr(poincare.fused, fn)(x)).all()
+    assert torch.isfinite(poincare.fused.dist(x[:1], -x[:1])).all()
+
+
+@pytest.mark.parametrize("fn", ["dist0", "logmap0"])
+def test_fused_boundary_gradients(fn):
+    # gradients beyond the clamping bound agree with the eager backend
+    x = torch.tensor([[1.5, 0.5], [0.0, -1.0], [0.3, 0.2]], requires_grad=True)
+    getattr(poincare.fused, fn)(x).sum().backward()
+    fused_grad, x.grad = x.grad, None
+    getattr(poincare.math, fn)(x, precision="native").sum().backward()
+    assert torch.isfinite(fused_grad).all()
+    np.testing.assert_allclose(fused_grad, x.grad, rtol=1e-5)
+
+
+@pytest.mark.parametrize("fn", ["dist", "dist0", "expmap0", "logmap0"])
+def test_closed_form_gradients(a, b, c, fn):
+    a.requires_grad_()
+    args = (a, b) if fn == "dist" else (a,)
+    # curvature that requires grad falls back to the composite implementation
+    c_ = c.clone().requires_grad_()
+    expected = getattr(poincare.math, fn)(*args, c=c_)
+    res = getattr(poincare.math, fn)(*args, c=c)
+    expected_grad, = torch.autograd.grad(expected.sum(), a)
+    res_grad, = torch.autograd.grad(res.sum(), a)
+    tolerance = {
+        torch.float32: dict(atol=1e-4, rtol=1e-4),
+        torch.float64: dict(atol=1e-10),
+    }
+    np.testing.assert_allclose(res.detach(), expected.detach(), **tolerance[c.dtype])
+    np.testing.assert_allclose(res_grad, expected_grad, **tolerance[c.dtype])
+
+
+def test_closed_form_gradcheck():
+    torch.manual_seed(42)
+    x = (torch.randn(4, 1, 3, dtype=torch.float64) * 0.2).requires_grad_()
+    y = (torch.randn(1, 5, 3, dtype=torch.float64) * 0.2).requires_grad_()
+    c = torch.tensor(0.7, dtype=torch.float64)
+    for keepdim in (False, True):
+        assert torch.autograd.gradcheck(
+            lambda x, y: poincare.math.dist(x, y, c=c, keepdim=keepdim), (x, y)
+        )
+        assert torch.autograd.gradcheck(
+            lambda x: poincare.math.dist0(x, c=c, keepdim=keepdim), (x,)
+        )
+    assert torch.autograd.gradcheck(lambda x: poincare.math.expmap0(x, c=c), (x,))
+    assert torch.autograd.gradcheck(lambda x: poincare.math.logmap0(x, c=c), (x,))
+
+
+def test_closed_form_gradgradcheck():
+    torch.manual_seed(42)
+    x = (torch.randn(4, 1, 3, dtype=torch.float64) * 0.2).requires_grad_()
+    y = (torch.randn(1, 5, 3, dtype=torch.float64) * 0.2).requires_grad_()
+    c = torch.tensor(0.7, dtype=torch.float64)
+    assert torch.autograd.gradgradcheck(
+        lambda x, y: poincare.math.dist(x, y, c=c), (x, y)
+    )
+    assert torch.autograd.gradgradcheck(lambda x: poincare.math.dist0(x, c=c), (x,))
+    assert torch.autograd.gradgradcheck(lambda x: poincare.math.expmap0(x, c=c), (x,))
+    assert torch.autograd.gradgradcheck(lambda x: poincare.math.logmap0(x, c=c), (x,))
+    # hessian vector product agrees with the composite path
+    v = torch.randn_like(x)
+    hvp = []
+    for c_ in (c, c.clone().requires_grad_()):
+        (g,) = torch.autograd.grad(
+            poincare.math.dist(x, y, c=c_).sum(), x, create_graph=True
+        )
+        hvp.append(torch.autograd.grad((g * v).sum(), x)[0])
+    np.testing.assert_allclose(hvp[0], hvp[1], atol=1e-10)
+
+
+@pytest.mark.parametrize("fn", ["artanh", "arsinh"])
+def test_native_precision(fn):
+    if fn == "artanh":
+        x = torch.linspace(-0.999, 0.999, 10001)
+    else:
+        x = torch.linspace(-10, 10, 10001)
+    expected = getattr(poincare.math, fn)(x.double())
+    res = getattr(poincare.math, fn)(x, "native")
+    large = poincare.math.arsinh(torch.tensor([-1e20, 1e20]), "native")
+    assert res.dtype == torch.float32
+    np.testing.assert_allclose(res, expected, rtol=1e-6, atol=1e-6)
+    # no overflow in x ** 2
+    np.testing.assert_allclose(large, np.arcsinh([-1e20, 1e20]), rtol=1e-6)
+    # the boundary is clamped in float32, the result is finite
+    assert torch.isfinite(
+        poincare.math.artanh(torch.tensor([-1.0, 1.0]), "native")
+    ).all()
+    with pytest.raises(ValueError):
+        poincare.math.artanh(x, "half")
+
+
+def test_precision_selection():
+    x = torch.rand(10, 3) * 0.2
+    ball = poincare.PoincareBall(precision="native")
+    np.testing.assert_allclose(
+        ball.dist0(x), poincare.PoincareBall().dist0(x), rtol=1e-6
+    )
+    with pytest.raises(ValueError):
+        poincare.PoincareBall(precision="half")
+
+
+def test_precision_in_backward():
+    # backward uses the policy of the forward call
+    x = torch.tensor([[1.0, 0.0]], requires_grad=True)
+    poincare.PoincareBall(precision="native").dist0(x).sum().backward()
+    np.testing.assert_allclose(x.grad, [[1 / torch.finfo(x.dtype).eps, 0.0]])
+    x.grad = None
+    poincare.PoincareBall(precision="native").logmap0(x).sum().backward()
+    assert torch.isfinite(x.grad).all()
+    x.grad = None
+    poincare.math.set_default_precision("native")
+    try:
+        d = poincare.PoincareBall().dist0(x)
+    finally:
+        poincare.math.set_default_precision("double")
+    d.sum().backward()
+    np.testing.assert_allclose(x.grad, [[1 / torch.finfo(x.dtype).eps, 0.0]])
+
+
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_pairwise_dist(dtype, chunk_size):
+    c = torch.tensor(random.uniform(0.1, 2), dtype=dtype)
+    x = poincare.math.expmap0(torch.randn(20, 5, dtype=dtype) * 0.5, c=c)
+    y = poincare.math.expmap0(torch.randn(30, 5, dtype=dtype) * 0.5, c=c)
+    x.requires_grad_()
+    expected = poincare.math.dist(x[:, None], y[None], c=c)
+    res = poincare.math.pairwise_dist(x, y, c=c, chunk_size=chunk_size)
+    assert res.shape == (20, 30)
+    tolerance = {
+        torch.float32: dict(atol=1e-4, rtol=1e-4),
+        torch.float64: dict(atol=1e-10),
+    }
+    np.testing.assert_allclose(res.detach(), expected.detach(), **tolerance[dtype])
+    expected_grad, = torch.autograd.grad(expected.sum(), x)
+    res_grad, = torch.autograd.grad(res.sum(), x)
+    np.testing.assert_allclose(res_grad, expected_grad, **tolerance[dtype])
+    ball = poincare.PoincareBall(c=c).to(dtype)
+    np.testing.assert_allclose(
+        ball.pairwise_dist(x, y).detach(),
+        poincare.math.pairwise_dist(x, y, c=ball.c).detach(),
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [None, 3, 7, 100])
+def test_knn(chunk_size):
+    c = torch.tensor(random.uniform(0.1, 2), dtype=torch.float64)
+    query = poincare.math.expmap0(torch.randn(2, 10, 5, dtype=c.dtype), c=c)
+    points = poincare.math.expmap0(torch.randn(2, 50, 5, dtype=c.dtype), c=c)
+    dist, idx = poincare.math.knn(query, points, 5, c=c, chunk_size=chunk_size)
+    assert dist.shape == idx.shape == (2, 10, 5)
+    expected = poincare.math.dist(query[:, :, None], points[:, None], c=c)
+    expected_dist, expected_idx = expected.topk(5, dim=-1, largest=False)
+    np.testing.assert_allclose(dist, expected_dist)
+    np.testing.assert_array_equal(idx, expected_idx)
+    ball = poincare.PoincareBall(c=c).to(c.dtype)
+    ball_dist, ball_idx = ball.knn(query, points, 5, chunk_size=chunk_size)
+    np.testing.assert_array_equal(ball_idx, idx)
+    with pytest.raises(ValueError):
+        ball.knn(query, points, 51)
+
+
+def test_weighted_midpoint(dtype):
+    from geoopt.manifolds import klein
+
+    c = torch.tensor(random.uniform(0.1, 2), dtype=dtype)
+    x = poincare.math.expmap0(torch.randn(4, 6, 3, dtype=dtype) * 0.5, c=c)
+    w = torch.rand(4, 6, dtype=dtype)
+    res = poincare.math.weighted_midpoint(x, w, c=c)
+    assert res.shape == (4, 3)
+    # Einstein midpoint in the Klein model
+    expected = klein.math.to_poincare(
+        klein.math.einstein_midpoint(klein.math.from_poincare(x, c=c), w, c=c), c=c
+    )
+    tolerance = {torch.float32: dict(atol=1e-5), torch.float64: dict(atol=1e-10)}
+    np.testing.assert_allclose(res, expected, **tolerance[dtype])
+    # midpoint of two points
+    mid = poincare.math.weighted_midpoint(x[:, :2], c=c)
+    np.testing.assert_allclose(
+        poincare.math.dist(x[:, 0], mid, c=c),
+        poincare.math.dist(x[:, 1], mid, c=c),
+        **tolerance[dtype]
+    )
+    # other reduction dims
+    res = poincare.math.weighted_midpoint(
+        x.transpose(0, 1), w.t(), c=c, reducedim=0, keepdim=True
+    )
+    np.testing.assert_allclose(res[0], expected, **tolerance[dtype])
+
+
+def test_frechet_mean():
+    c = torch.tensor(random.uniform(0.1, 2), dtype=torch.float64)
+    x = poincare.math.expmap0(torch.randn(10, 7, 3, dtype=c.dtype), c=c)
+    w = torch.rand(10, 7, dtype=c.dtype)
+    mean = poincare.math.frechet_mean(x, w, c=c, tol=1e-10)
+    # the Riemannian gradient of the weighted sum of squared distances is zero
+    mean.requires_grad_()
+    loss = (w * poincare.math.dist(mean[:, None], x, c=c) ** 2).sum()
+    grad, = torch.autograd.grad(loss, mean)
+    np.testing.assert_allclose(
+        poincare.math.egrad2rgrad(mean.detach(), grad, c=c),
+        torch.zeros_like(grad),
+        atol=1e-8,
+    )
+    # equal points are a fixed point
+    same = x[:, :1].expand(10, 5, 3)
+    np.testing.assert_allclose(poincare.math.frechet_mean(same, c=c), x[:, 0])
+    ball = poincare.PoincareBall(c=c).to(c.dtype)
+    np.testing.assert_allclose(
+        ball.frechet_mean(x, w, tol=1e-10),
+        poincare.math.frechet_mean(x, w, c=ball.c, tol=1e-10),
+    )
+    # the signature is the one of the base manifold, weights broadcast
+    np.testing.assert_allclose(
+        ball.frechet_mean(x, w[0], keepdim=True, tol=1e-10),
+        ball.frechet_mean(x, w[0].expand(10, 7), tol=1e-10).unsqueeze(-2),
+    )
@@ -72,6 +72,14 @@ def test_leapfrog_reversibility(params):
     "params",
     [
         dict(sampler="RHMC", epsilon=0.2, n_steps=5, n_burn=1000, n_samples=5000),
+        dict(
+            sampler="RHMC",
+            epsilon=0.2,
+            n_steps=5,
+            n_burn=1000,
+            n_samples=5000,
+            sync=False,
+        ),
         dict(sampler="RSGLD", epsilon=1e-3, n_burn=3000, n_samples=10000),
         dict(
             sampler="SGRHMC",
@@ -183,3 +191,175 @@ def test_sampling_manifold(params):
     for _ in range(n_samples):
         sampler.step(nd)
         points.append(nd.x.detach().numpy().copy())
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        dict(sampler="RHMC", epsilon=0.2, n_steps=5),
+        dict(sampler="RSGLD", epsilon=1e-3),
+        dict(sampler="SGRHMC", epsilon=1e-3, n_steps=1, alpha=0.5),
+    ],
+)
+def test_sampling_sync_free(params):
+    class NormalDist(torch.nn.Module):
+        def __init__(self, mu, sigma):
+            super().__init__()
+            self.d = torch.distributions.Normal(mu, sigma)
+            self.x = torch.nn.Parameter(torch.randn_like(mu))
+
+        def forward(self):
+            return self.d.log_prob(self.x).sum()
+
+    torch.manual_seed(42)
+    nd = NormalDist(torch.randn([2]), torch.ones([2]))
+    Sampler = getattr(geoopt.samplers, params.pop("sampler"))
+    sampler = Sampler(nd.parameters(), sync=False, **params)
+    for _ in range(10):
+        sampler.step(nd)
+    sampler.burnin = False
+    for _ in range(100):
+        sampler.step(nd)
+    assert len(sampler.log_probs) == 0
+    sampler.flush_logs()
+    n_logs = 110 if isinstance(sampler, geoopt.samplers.RHMC) else 100
+    assert len(sampler.log_probs) == n_logs
+    assert all(isinstance(lp, float) for lp in sampler.log_probs)
+    if isinstance(sampler, geoopt.samplers.RHMC):
+        assert len(sampler.acceptance_probs) == 100
+        assert all(0 <= rho <= 1 for rho in sampler.acceptance_probs)
+        assert 0 <= sampler.rejection_rate < 0.5
+    # flushing twice does nothing
+    sampler.flush_logs()
+    assert len(sampler.log_probs) == n_logs
+    # long runs flush automatically
+    sampler.max_pending = 16
+    for _ in range(100):
+        sampler.step(nd)
+        assert all(len(p) < 16 for p in sampler._pending.values())
+    sampler.flush_logs()
+    assert len(sampler.log_probs) == n_logs + 100
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_sampling_multichain(sync):
+    class NormalDist(torch.nn.Module):
+        def __init__(self, mu, sigma, n_chains):
+            super().__init__()
+            self.d = torch.distributions.Normal(mu, sigma)
+            self.x = torch.nn.Parameter(torch.randn((n_chains,) + mu.shape))
+
+        def forward(self):
+            return self.d.log_prob(self.x).sum(-1)
+
+    torch.manual_seed(42)
+    D, n_chains = 2, 100
+    mu = torch.randn([D])
+    sigma = torch.randn([D]).abs()
+    nd = NormalDist(mu, sigma, n_chains)
+    sampler = geoopt.samplers.RHMC(
+        nd.parameters(), epsilon=0.2, n_steps=5, sync=sync, n_chains=n_chains
+    )
+    for _ in range(100):
+        sampler.step(nd)
+    points = []
+    sampler.burnin = False
+    for _ in range(100):
+        sampler.step(nd)
+        points.append(nd.x.detach().numpy().copy())
+    points = np.concatenate(points[::5])
+    np.testing.assert_allclose(mu.numpy(), points.mean(axis=0), atol=1e-1)
+    np.testing.assert_allclose(sigma.numpy(), points.std(axis=0), atol=1e-1)
+    assert 0 < sampler.rejection_rate < 0.5
+    assert sampler.steps == 100 * n_chains
+    assert len(sampler.log_probs) == 200
+    assert len(sampler.log_probs[-1]) == n_chains
+    assert len(sampler.acceptance_probs[-1]) == n_chains
+
+
+def test_multichain_shapes():
+    x = torch.nn.Parameter(torch.randn(3, 2))
+    with pytest.raises(ValueError):
+        geoopt.samplers.RHMC([x], n_chains=4)
+    sampler = geoopt.samplers.RHMC([x], n_chains=3)
+    with pytest.raises(ValueError):
+        sampler.step(lambda: -(x ** 2).sum())
+
+
+def test_history_list_compatible():
+    history = geoopt.samplers.History()
+    for i in range(100):
+        history.append(float(i))
+    assert len(history) == 100
+    assert list(history) == [float(i) for i in range(100)]
+    assert history[-1] == 99.0
+    assert history[10:12] == [10.0, 11.0]
+    with pytest.raises(IndexError):
+        history[100]
+
+
+def test_history_ring_thin_summary():
+    history = geoopt.samplers.History(capacity=10, thin=3)
+    values = np.random.RandomState(42).randn(100, 4)
+    for chunk in np.array_split(values, 7):
+        history.extend(torch.from_numpy(chunk))
+    history.append(torch.zeros(4))
+    values = np.concatenate([values, np.zeros((1, 4))])
+    np.testing.assert_allclose(history.as_tensor(), values[::3][-10:])
+    summary = history.summary()
+    assert summary["count"] == 101
+    np.testing.assert_allclose(summary["mean"], values.mean(0))
+    np.testing.assert_allclose(summary["var"], values.var(0))
+    np.testing.assert_allclose(summary["min"], values.min(0))
+    np.testing.assert_allclose(summary["max"], values.max(0))
+
+
+def test_history_export(tmpdir):
+    history = geoopt.samplers.History(capacity=4, export_dir=str(tmpdir), name="lp")
+    history.extend(torch.arange(10.0))
+    history.append(10.0)
+    history.flush()
+    files = sorted(tmpdir.listdir())
+    assert [f.basename for f in files] == [
+        "lp_000000.npy",
+        "lp_000001.npy",
+        "lp_000002.npy",
+    ]
+    exported = np.concatenate([np.load(str(f)) for f in files])
+    np.testing.assert_allclose(exported, np.arange(11.0))
+    np.testing.assert_allclose(history.as_tensor(), [7.0, 8.0, 9.0, 10.0])
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_sampler_history_export(tmpdir, sync):
+    x = torch.nn.Parameter(torch.randn(2))
+    sampler = geoopt.samplers.RHMC(
+        [x],
+        epsilon=0.2,
+        n_steps=2,
+        sync=sync,
+        history=dict(thin=2, export_dir=str(tmpdir), chunk_size=4),
+    )
+    sampler.burnin = False
+    for _ in range(21):
+        sampler.step(lambda: -(x ** 2).sum())
+    sampler.flush_logs()
+    for name in ("log_probs", "acceptance_probs"):
+        files = sorted(tmpdir.listdir("{}_*.npy".format(name)))
+        exported = np.concatenate([np.load(str(f)) for f in files])
+        np.testing.assert_allclose(exported, getattr(sampler, name).as_tensor())
+    assert len(sampler.acceptance_probs) == 11
+    # nothing is left to export
+    sampler.flush_logs()
+    assert len(tmpdir.listdir("acceptance_probs_*.npy")) == 3
+
+
+def test_sampler_history():
+    x = torch.nn.Parameter(torch.randn(2))
+    sampler = geoopt.samplers.RHMC(
+        [x], epsilon=0.2, n_steps=2, history=dict(capacity=5, thin=2)
+    )
+    for _ in range(20):
+        sampler.step(lambda: -(x ** 2).sum())
+    assert len(sampler.log_probs) == 5
+    assert sampler.log_probs.summary()["count"] == 20
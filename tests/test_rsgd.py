@@ -61,3 +61,114 @@ def test_init_manifold():
     assert p0.is_contiguous()
     np.testing.assert_allclose(p1.data, p1old.data)
     np.testing.assert_allclose(p0.data, stiefel.projx(p0old.data), atol=1e-4)
+
+
+def _foreach_params():
+    torch.manual_seed(42)
+    stiefel = geoopt.manifolds.Stiefel()
+    ball = geoopt.PoincareBall()
+    sphere = geoopt.Sphere(intersection=torch.randn(5, 2))
+    params = []
+    for _ in range(3):
+        with torch.no_grad():
+            params.append(
+                geoopt.ManifoldParameter(torch.randn(6, 3), manifold=stiefel).proj_()
+            )
+            params.append(
+                geoopt.ManifoldParameter(
+                    ball.random_normal(4, 2, std=0.3), manifold=ball
+                )
+            )
+            params.append(
+                geoopt.ManifoldParameter(torch.randn(5), manifold=sphere).proj_()
+            )
+        params.append(torch.nn.Parameter(torch.randn(5)))
+    # parameters with other shapes on the same manifold
+    params.append(geoopt.ManifoldParameter(ball.random_normal(7, 2, std=0.3)))
+    params.append(geoopt.ManifoldParameter(ball.random_normal(2, 3, 2, std=0.3)))
+    params.append(torch.nn.Parameter(torch.randn(2, 3)))
+    return params
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        dict(lr=1e-2),
+        dict(lr=1e-2, momentum=0.9, weight_decay=1e-2),
+        dict(momentum=0.9, nesterov=True, lr=1e-2),
+    ],
+)
+def test_rsgd_foreach_matches_loop(params):
+    loop_params = _foreach_params()
+    foreach_params = _foreach_params()
+
+    def closure(optim, ps):
+        optim.zero_grad()
+        loss = sum((p ** 2).sum() + p.sum() for p in ps)
+        loss.backward()
+        return loss.item()
+
+    loop = geoopt.optim.RiemannianSGD(loop_params, **params)
+    foreach = geoopt.optim.RiemannianSGD(foreach_params, foreach=True, **params)
+    for _ in range(10):
+        loop.step(lambda: closure(loop, loop_params))
+        foreach.step(lambda: closure(foreach, foreach_params))
+    assert loop.param_groups[0]["step"] == foreach.param_groups[0]["step"]
+    for p, q in zip(loop_params, foreach_params):
+        np.testing.assert_allclose(p.data, q.data, atol=1e-6)
+        if "momentum" in params:
+            np.testing.assert_allclose(
+                loop.state[p]["momentum_buffer"],
+                foreach.state[q]["momentum_buffer"],
+                atol=1e-5,
+                rtol=1e-5,
+            )
+
+
+def _embedding(sparse):
+    torch.manual_seed(42)
+    ball = geoopt.PoincareBall()
+    emb = torch.nn.Embedding(10, 3, sparse=sparse)
+    emb.weight = geoopt.ManifoldParameter(
+        ball.random_normal(10, 3, std=0.3), manifold=ball
+    )
+    return emb
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        dict(lr=1e-2),
+        dict(lr=1e-2, momentum=0.9, weight_decay=1e-2),
+        dict(momentum=0.9, nesterov=True, lr=1e-2),
+    ],
+)
+@pytest.mark.parametrize("foreach", [False, True])
+def test_rsgd_sparse_matches_dense(params, foreach):
+    dense = _embedding(sparse=False)
+    sparse = _embedding(sparse=True)
+    dense_optim = geoopt.optim.RiemannianSGD(dense.parameters(), **params)
+    sparse_optim = geoopt.optim.RiemannianSGD(
+        sparse.parameters(), foreach=foreach, **params
+    )
+    # every row is present, so the sparse update should be the same
+    idx = torch.tensor([[0, 1, 2, 3, 4], [5, 6, 7, 8, 9], [9, 0, 0, 1, 2]])
+    for _ in range(10):
+        for emb, optim in ((dense, dense_optim), (sparse, sparse_optim)):
+            optim.zero_grad()
+            emb(idx).pow(2).sum().backward()
+            optim.step()
+    np.testing.assert_allclose(dense.weight.data, sparse.weight.data, atol=1e-6)
+
+
+def test_rsgd_sparse_touches_only_rows():
+    emb = _embedding(sparse=True)
+    before = emb.weight.data.clone()
+    optim = geoopt.optim.RiemannianSGD(emb.parameters(), lr=1e-2, momentum=0.9)
+    for _ in range(2):
+        optim.zero_grad()
+        emb(torch.tensor([1, 3, 3])).pow(2).sum().backward()
+        optim.step()
+    changed = (emb.weight.data != before).any(-1)
+    assert changed.tolist() == [i in (1, 3) for i in range(10)]
+    assert emb.weight.manifold.check_point_on_manifold(emb.weight)
@@ -0,0 +1,253 @@
+import copy
+import warnings
+import torch
+import numpy as np
+import pytest
+import geoopt
+from geoopt.manifolds.spd import multi
+
+
+@pytest.fixture("function", autouse=True, params=range(30, 33))
+def seed(request):
+    torch.manual_seed(request.param)
+    return request.param
+
+
+@pytest.fixture
+def spd():
+    return geoopt.SymmetricPositiveDefinite()
+
+
+def random_spd(*size):
+    a = torch.randn(*size, dtype=torch.float64)
+    return a @ a.transpose(-1, -2) + 0.5 * torch.eye(size[-1], dtype=torch.float64)
+
+
+def test_expmap_logmap_dist(spd):
+    x = random_spd(10, 4, 4)
+    y = random_spd(10, 4, 4)
+    # reference with an explicit inverse of the cholesky factor
+    l_inv = torch.inverse(torch.cholesky(x))
+    a = l_inv @ y @ l_inv.transpose(-1, -2)
+    w, v = torch.symeig(a, eigenvectors=True)
+    l = torch.cholesky(x)
+    expected = l @ (v * w.log()[..., None, :]) @ v.transpose(-1, -2)
+    expected = expected @ l.transpose(-1, -2)
+    u = spd.logmap(x, y)
+    np.testing.assert_allclose(u, expected)
+    np.testing.assert_allclose(spd.expmap(x, u), y)
+    np.testing.assert_allclose(spd.dist(x, y), w.log().norm(dim=-1))
+    np.testing.assert_allclose(spd.inner(x, u), spd.dist(x, y) ** 2)
+
+
+def test_factorization_cache(spd):
+    x = random_spd(10, 4, 4)
+    factorization = spd._factorize(x)
+    assert spd._factorize(x) is factorization
+    # in-place updates invalidate the cached factor
+    x.mul_(2)
+    assert spd._factorize(x) is not factorization
+    np.testing.assert_allclose(spd._factorize(x).l, torch.cholesky(x))
+    # updates through ``.data`` keep the version of ``x`` and need a reset
+    factorization = spd._factorize(x)
+    x.data.copy_(x * 2)
+    spd.clear_cache()
+    assert spd._factorize(x) is not factorization
+    np.testing.assert_allclose(spd._factorize(x).l, torch.cholesky(x))
+    copy.deepcopy(spd)
+    del x
+    assert not spd._factorizations
+
+
+def test_no_cache_with_grad(spd):
+    x = random_spd(3, 4, 4).requires_grad_()
+    y = random_spd(3, 4, 4)
+    with torch.no_grad():
+        spd.dist(x, y)
+    spd.dist(x, y, squared=True).sum().backward()
+    rgrad = spd.egrad2rgrad(x.detach(), x.grad)
+    np.testing.assert_allclose(rgrad, -2 * spd.logmap(x.detach(), y), atol=1e-8)
+
+
+def random_sym(*size):
+    a = torch.randn(*size, dtype=torch.float64)
+    return 0.5 * (a + a.transpose(-1, -2))
+
+
+def test_transp(spd):
+    x = random_spd(10, 4, 4)
+    y = random_spd(10, 4, 4)
+    v = random_sym(10, 4, 4)
+    w = random_sym(10, 4, 4)
+    pv, pw = spd.transp(x, y, v, w)
+    np.testing.assert_allclose(spd.inner(y, pv, pw), spd.inner(x, v, w))
+    np.testing.assert_allclose(pv, pv.transpose(-1, -2), atol=1e-10)
+    np.testing.assert_allclose(
+        spd.transp(x, y, spd.logmap(x, y)), -spd.logmap(y, x), atol=1e-8
+    )
+    np.testing.assert_allclose(spd.ptransp(x, y, v), pv)
+
+
+@pytest.mark.parametrize("retr", ["expmap", "retr"])
+def test_fused_transp(spd, retr):
+    x = random_spd(10, 4, 4)
+    u = 0.5 * random_sym(10, 4, 4)
+    v = random_sym(10, 4, 4)
+    y, pv = getattr(spd, retr + "_transp")(x, u, v)
+    np.testing.assert_allclose(y, getattr(spd, retr)(x, u), atol=1e-10)
+    np.testing.assert_allclose(pv, spd.transp(x, y, v), atol=1e-10)
+    np.testing.assert_allclose(
+        getattr(spd, "transp_follow_" + retr)(x, u, v), pv, atol=1e-10
+    )
+
+
+def test_adam():
+    spd = geoopt.SymmetricPositiveDefinite(requires_grad=True)
+    target = random_spd(3, 4, 4)
+    x = geoopt.ManifoldParameter(random_spd(3, 4, 4), manifold=spd)
+    optim = geoopt.optim.RiemannianAdam([x], lr=1e-1)
+    for _ in range(300):
+        optim.zero_grad()
+        spd.dist(x, target).pow(2).sum().backward()
+        optim.step()
+    np.testing.assert_allclose(x.detach(), target, atol=1e-4)
+
+
+@pytest.fixture(
+    params=[
+        geoopt.LogEuclideanSymmetricPositiveDefinite,
+        geoopt.BuresWassersteinSymmetricPositiveDefinite,
+    ]
+)
+def metric(request):
+    return request.param()
+
+
+def test_metric_expmap_logmap(metric):
+    x = random_spd(10, 4, 4)
+    y = random_spd(10, 4, 4)
+    u = metric.logmap(x, y)
+    np.testing.assert_allclose(u, u.transpose(-1, -2), atol=1e-10)
+    np.testing.assert_allclose(metric.expmap(x, u), y, atol=1e-8)
+    np.testing.assert_allclose(metric.inner(x, u), metric.dist(x, y) ** 2)
+
+
+def test_metric_egrad2rgrad(metric):
+    x = random_spd(10, 4, 4).requires_grad_()
+    y = random_spd(10, 4, 4)
+    metric.dist(x, y, squared=True).sum().backward()
+    rgrad = metric.egrad2rgrad(x.detach(), x.grad)
+    np.testing.assert_allclose(rgrad, -2 * metric.logmap(x.detach(), y), atol=1e-8)
+
+
+def test_bures_wasserstein_transp():
+    manifold = geoopt.BuresWassersteinSymmetricPositiveDefinite()
+    x = random_spd(6, 3, 3)
+    y = random_spd(6, 3, 3)
+    v = random_sym(6, 3, 3)
+    np.testing.assert_allclose(manifold.transp(x, y, v), v)
+    with pytest.raises(NotImplementedError, match="transp"):
+        manifold.ptransp(x, y, v)
+
+
+def test_log_euclidean():
+    manifold = geoopt.LogEuclideanSymmetricPositiveDefinite()
+    x = random_spd(6, 3, 3)
+    y = random_spd(8, 3, 3)
+    expected = manifold.dist(x[:, None], y[None])
+    np.testing.assert_allclose(manifold.pairwise_dist(x, y), expected)
+    np.testing.assert_allclose(
+        (manifold.embed(x)[:, None] - manifold.embed(y)[None]).norm(dim=-1), expected
+    )
+    v = random_sym(6, 3, 3)
+    pv = manifold.transp(x, y[:6], v)
+    np.testing.assert_allclose(manifold.inner(y[:6], pv), manifold.inner(x, v))
+    # the log-euclidean mean is the frechet mean
+    mean = manifold.frechet_mean(x)
+    np.testing.assert_allclose(mean, multi.multiexp(multi.multilog(x).mean(0)))
+
+
+@pytest.mark.parametrize("dtype,rtol", [(torch.float64, 1e-10), (torch.float32, 1e-3)])
+def test_iterative_matrix_functions(dtype, rtol, monkeypatch):
+    x = random_spd(20, 5, 5).to(dtype)
+    s = 2 * random_sym(20, 5, 5).to(dtype)
+    p = x - 3 * torch.eye(5, dtype=dtype)
+    expected = [
+        multi.multisqrt(x),
+        multi.multisqrtinv(x),
+        multi.multilog(x),
+        multi.multiexp(s),
+        multi.multispdproj(p, wmin=1e-3, wmax=10.0),
+    ]
+
+    def symeig(*args, **kwargs):
+        raise AssertionError("eigendecomposition is called")
+
+    monkeypatch.setattr(torch, "symeig", symeig)
+    # the deprecated solver is not used either
+    monkeypatch.setattr(torch, "solve", symeig)
+    result = [
+        multi.multisqrt(x, method="iterative"),
+        multi.multisqrtinv(x, method="iterative"),
+        multi.multilog(x, method="iterative"),
+        multi.multiexp(s, method="iterative"),
+        multi.multispdproj(p, wmin=1e-3, wmax=10.0, method="iterative"),
+    ]
+    for a, b in zip(result, expected):
+        np.testing.assert_allclose(a, b, rtol=rtol, atol=rtol * b.abs().max())
+
+
+def test_iterative_not_converged():
+    x = random_spd(5, 4, 4)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        multi.multisqrt(x, method="iterative")
+        multi.multiexp(x, method="iterative", tol=1e-3, max_iter=1)
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        multi.multisqrt(x, method="iterative", max_iter=2)
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        multi.multispdproj(-x, wmin=1e-3, method="iterative", max_iter=2)
+
+
+def test_iterative_method(spd):
+    iterative = geoopt.SymmetricPositiveDefinite(method="iterative")
+    x = random_spd(10, 4, 4)
+    y = random_spd(10, 4, 4)
+    v = random_sym(10, 4, 4)
+    u = iterative.logmap(x, y)
+    np.testing.assert_allclose(u, spd.logmap(x, y))
+    np.testing.assert_allclose(iterative.expmap(x, u), y)
+    np.testing.assert_allclose(iterative.transp(x, y, v), spd.transp(x, y, v))
+    np.testing.assert_allclose(iterative.projx(v), spd.projx(v), atol=1e-10)
+    with pytest.raises(ValueError):
+        geoopt.SymmetricPositiveDefinite(method="qr")
+
+
+def test_check_point(spd):
+    x = random_spd(6, 3, 3)
+    x[1] = -x[1]
+    x[2, 0, 1] += 1
+    x[4] = torch.diag(torch.tensor([1.0, 1.0, 1e-10], dtype=x.dtype))
+    ok, reason = spd.batch_check_point_on_manifold(x)
+    np.testing.assert_array_equal(ok, [True, False, False, True, False, True])
+    assert "1 of 6 matrices are not symmetric" in reason
+    assert "2 of 6 matrices are not positive definite" in reason
+    assert not spd.check_point_on_manifold(x)
+    spd.assert_check_point_on_manifold(x[[0, 3, 5]])
+    assert spd.batch_check_point_on_manifold(x[0]) == (True, None)
+    with pytest.raises(ValueError):
+        spd.assert_check_point_on_manifold(x)
+    u = random_sym(3, 3)
+    spd.assert_check_vector_on_tangent(x[0], u)
+    assert not spd.check_vector_on_tangent(x[0], u + torch.triu(u, 1))
+
+
+def test_check_point_without_cholesky_ex(spd, monkeypatch):
+    x = random_spd(4, 3, 3)
+    x[2] = -x[2]
+    expected = spd.batch_check_point_on_manifold(x)
+    if hasattr(torch, "linalg"):
+        monkeypatch.delattr(torch.linalg, "cholesky_ex", raising=False)
+    ok, reason = spd.batch_check_point_on_manifold(x)
+    np.testing.assert_array_equal(ok, expected[0])
+    assert reason == expected[1]
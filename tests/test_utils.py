@@ -4,6 +4,8 @@ import numpy as np
 import geoopt
 import tempfile
 import os
+import threading
+import time
 
 
 @pytest.fixture
@@ -116,3 +118,109 @@ def test_manifold_is_submodule_poincare():
     container = torch.nn.ModuleDict({"ball": ball})
     container.to(torch.float64)
     assert ball.c.dtype == torch.float64
+
+
+def test_svd_loop_fallback(A):
+    u, d, v = geoopt.linalg.batch_linalg.svd(A)
+    ul, dl, vl = geoopt.linalg.batch_linalg._svd_loop(A)
+    np.testing.assert_allclose(u.detach(), ul.detach(), atol=1e-10)
+    np.testing.assert_allclose(d.detach(), dl.detach(), atol=1e-10)
+    np.testing.assert_allclose(v.detach(), vl.detach(), atol=1e-10)
+
+
+def test_qr_loop_fallback(A):
+    q, r = geoopt.linalg.batch_linalg.qr(A)
+    ql, rl = geoopt.linalg.batch_linalg._qr_loop(A)
+    np.testing.assert_allclose(q.detach(), ql.detach(), atol=1e-10)
+    np.testing.assert_allclose(r.detach(), rl.detach(), atol=1e-10)
+
+
+def test_matrix_rank(A):
+    ranks = geoopt.linalg.matrix_rank(A.detach().view(2, 5, 3, 3))
+    assert ranks.shape == (2, 5)
+    for r, a in zip(ranks.view(-1), A.detach()):
+        assert r.item() == torch.matrix_rank(a).item()
+
+
+def test_expm_nested_batch(A):
+    expm_nested = geoopt.linalg.expm(A.view(2, 5, 3, 3))
+    assert expm_nested.shape == (2, 5, 3, 3)
+    for e, a in zip(expm_nested.view(-1, 3, 3), A):
+        np.testing.assert_allclose(
+            e.detach(), geoopt.linalg._expm.expm_one(a).detach(), atol=1e-10
+        )
+
+
+def test_expm_mixed_scales():
+    from scipy.linalg import expm
+
+    torch.manual_seed(42)
+    # norms span all the Pade orders and several squarings
+    scales = torch.tensor([1e-3, 1e-1, 0.5, 1.0, 3.0, 10.0, 50.0]).double()
+    a = torch.randn(len(scales), 4, 4).double()
+    a = a / a.abs().sum(-2).max(-1)[0][:, None, None] * scales[:, None, None]
+    expm_torch = geoopt.linalg.expm(a)
+    for e, x in zip(expm_torch, a):
+        expm_scipy = expm(x.numpy())
+        np.testing.assert_allclose(
+            e, expm_scipy, rtol=1e-8, atol=1e-12 * np.abs(expm_scipy).max()
+        )
+
+
+def test_set_num_workers_concurrently():
+    # the pool may be replaced while other threads are mapping slices
+    a = torch.randn(8, 3, 3, dtype=torch.float64)
+    errors = []
+
+    def slow(s):
+        time.sleep(1e-4)
+        return s
+
+    def run():
+        for _ in range(50):
+            try:
+                res = geoopt.linalg.batch_linalg._map_slices(slow, a)
+                assert torch.equal(torch.stack(res), a)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    try:
+        for t in threads:
+            t.start()
+        for i in range(100):
+            geoopt.linalg.set_num_workers(2 + i % 2)
+            time.sleep(1e-4)
+        for t in threads:
+            t.join()
+    finally:
+        geoopt.linalg.set_num_workers(0)
+    assert not errors
+
+
+@pytest.mark.parametrize("num_workers", [0, 4])
+def test_loop_fallback_workers(A, num_workers):
+    geoopt.linalg.set_num_workers(num_workers)
+    try:
+        assert geoopt.linalg.get_num_workers() == num_workers
+        u, d, v = geoopt.linalg.batch_linalg._svd_loop(A.view(2, 5, 3, 3))
+        q, r = geoopt.linalg.batch_linalg._qr_loop(A)
+        ranks = geoopt.linalg.batch_linalg._matrix_rank_loop(A.detach())
+    finally:
+        geoopt.linalg.set_num_workers(0)
+    assert u.shape == (2, 5, 3, 3)
+    # ordering of the results is preserved
+    for i, a in enumerate(A.detach()):
+        ut, dt, vt = torch.svd(a)
+        qt, rt = torch.qr(a)
+        np.testing.assert_allclose(d.detach().view(-1, 3)[i], dt)
+        np.testing.assert_allclose(q.detach()[i], qt)
+        np.testing.assert_allclose(r.detach()[i], rt)
+        assert ranks[i].item() == torch.matrix_rank(a).item()
+    u.sum().backward()  # this should work
+
+
+def test_expm_empty_batch():
+    a = torch.zeros(0, 3, 3, dtype=torch.float64)
+    assert geoopt.linalg._expm.expm_batched(a).shape == (0, 3, 3)
+    assert geoopt.linalg.expm(a.view(0, 2, 3, 3)).shape == (0, 2, 3, 3)